@@ -1,3 +0,0 @@
-from app.api import *
-from app.db import *
-from app.core import *
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import asdict
+from typing import AsyncIterator, List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.v1.search import filters_from_request
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.session import get_db
+from app.models.knowledge_base import KnowledgeBase
+from app.schemas.answer import AnswerCacheStats, AnswerRequest
+from app.services.embeddings import get_embedder
+from app.services.kb_index import get_kb_index
+from app.services.llm_cache import exact_key, get_response_cache
+from app.services.rag import build_messages, format_sse, rerank_hits
+from app.services.search import SearchHit, hybrid_search
+
+router = APIRouter()
+logger = get_logger("app.answers")
+
+
+def _get_kb_or_404(knowledge_base_id: UUID, db: Session) -> KnowledgeBase:
+    kb = db.query(KnowledgeBase).filter(KnowledgeBase.id == knowledge_base_id).first()
+    if not kb:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Knowledge base not found.",
+        )
+    return kb
+
+
+def _retrieve(knowledge_base_id: UUID, payload: AnswerRequest) -> List[SearchHit]:
+    index = get_kb_index(knowledge_base_id)
+    # Over-fetch so the reranker has something to choose from.
+    return hybrid_search(
+        index,
+        payload.question,
+        filters_from_request(payload),
+        top_k=payload.top_k * 3,
+    )
+
+
+def _retrieval_fingerprint(payload: AnswerRequest) -> str:
+    """
+    Stable hash of everything that decides which passages are retrieved
+    (filters and top_k), so cached answers are only reused for the same
+    slice of the knowledge base.
+    """
+    fields = payload.model_dump(
+        include={"collection_ids", "mime_types", "created_after", "created_before", "top_k"},
+        mode="json",
+    )
+    for key in ("collection_ids", "mime_types"):
+        if fields[key] is not None:
+            fields[key] = sorted(fields[key])
+    encoded = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _ms(start: float, end: float) -> float:
+    return round((end - start) * 1000, 2)
+
+
+@router.post("/knowledge-bases/{knowledge_base_id}/answer")
+async def answer_question(
+    knowledge_base_id: UUID,
+    payload: AnswerRequest,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """
+    Answer a question from a knowledge base, streaming tokens as SSE.
+
+    The LLM connection is pre-opened concurrently with retrieval and prompt
+    assembly, so the handshake is off the time-to-first-token path. The last
+    event reports per-stage timings (retrieve, rerank, first token, total).
+
+    Completions are served from the response cache when the exact prompt
+    (or, if enabled, a semantically similar question on the same KB index
+    version) was answered before.
+    """
+    # Deferred: the LLM client (and httpx) is only loaded once answers are used.
+    from app.services.llm import LLMError, get_llm_client
+
+    started = time.perf_counter()
+    settings = get_settings()
+    client = get_llm_client()
+
+    # Start DNS/TCP/TLS setup now; it overlaps with everything below.
+    prewarm = asyncio.create_task(client.prewarm())
+
+    try:
+        kb = await run_in_threadpool(_get_kb_or_404, knowledge_base_id, db)
+        candidates = await run_in_threadpool(_retrieve, knowledge_base_id, payload)
+    except Exception:
+        prewarm.cancel()
+        raise
+    retrieved = time.perf_counter()
+
+    hits = rerank_hits(payload.question, candidates, limit=payload.top_k)
+    messages = build_messages(payload.question, hits, settings.RAG_MAX_CONTEXT_CHARS)
+    reranked = time.perf_counter()
+
+    params = {
+        key: value
+        for key, value in (("temperature", payload.temperature), ("max_tokens", payload.max_tokens))
+        if value is not None
+    }
+
+    cache = get_response_cache()
+    model = payload.model or client.model
+    stats_key = str(knowledge_base_id)
+    cache_key = exact_key(model, messages, params)
+    # Semantic matches are only valid against the same index contents,
+    # retrieval filters and generation settings.
+    scope = (
+        f"{knowledge_base_id}:{kb.index_version}:{_retrieval_fingerprint(payload)}"
+        f":{model}:{sorted(params.items())}"
+    )
+    embedding = get_embedder().embed_one(payload.question) if cache.semantic_threshold is not None else None
+    cached, cache_kind = cache.get(cache_key, stats_key, scope=scope, embedding=embedding)
+    if cached is not None:
+        prewarm.cancel()
+
+    async def events() -> AsyncIterator[str]:
+        yield format_sse(
+            [
+                {"n": n, **{k: v for k, v in asdict(hit).items() if k != "text"}}
+                for n, hit in enumerate(hits, start=1)
+            ],
+            event="sources",
+        )
+
+        first_token = None
+        if cached is not None:
+            first_token = time.perf_counter()
+            yield format_sse({"content": cached}, event="token")
+        else:
+            parts = []
+            try:
+                await prewarm
+                async for delta in client.stream(messages, model=model, **params):
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    parts.append(delta)
+                    yield format_sse({"content": delta}, event="token")
+            except LLMError as exc:
+                logger.warning("Answer generation failed for KB %s: %s", knowledge_base_id, exc)
+                yield format_sse({"detail": str(exc)}, event="error")
+            else:
+                cache.put(cache_key, "".join(parts), scope=scope, embedding=embedding)
+
+        finished = time.perf_counter()
+        timings = {
+            "retrieve_ms": _ms(started, retrieved),
+            "rerank_ms": _ms(retrieved, reranked),
+            "first_token_ms": _ms(started, first_token) if first_token else None,
+            "total_ms": _ms(started, finished),
+            "cache": cache_kind,
+        }
+        logger.info("Answer timings for KB %s: %s", knowledge_base_id, timings)
+        yield format_sse(timings, event="timings")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/knowledge-bases/{knowledge_base_id}/answer/cache-stats",
+    response_model=AnswerCacheStats,
+)
+def get_answer_cache_stats(
+    knowledge_base_id: UUID,
+    db: Session = Depends(get_db),
+) -> AnswerCacheStats:
+    """
+    Hit / miss counters of the LLM response cache for this knowledge base
+    (per worker process).
+    """
+    _get_kb_or_404(knowledge_base_id, db)
+    stats = get_response_cache().stats(str(knowledge_base_id))
+    return AnswerCacheStats(
+        exact_hits=stats.exact_hits,
+        semantic_hits=stats.semantic_hits,
+        misses=stats.misses,
+        hit_rate=stats.hit_rate,
+    )
@@ -1,18 +1,53 @@
-from typing import List
+import io
+import json
+from typing import Any, Dict, List, Tuple
 from uuid import UUID
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query as QueryParam, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.core.logging import get_logger
 from app.db.session import get_db
 from app.models.workspace import Workspace
-from app.models.dataset import Dataset
-from app.schemas.dataset import DatasetRead
+from app.models.dataset import Dataset, DatasetSegment, DatasetVersion
+from app.schemas.dataset import (
+    DatasetIndexRead,
+    DatasetIndexRequest,
+    DatasetProfile,
+    DatasetQuery,
+    DatasetRead,
+    DatasetRows,
+    DatasetSearchHit,
+    DatasetSearchRequest,
+    DatasetSearchResponse,
+    DatasetVersionRead,
+)
+from app.services.columnar import convert_csv
+from app.services.csv_profile import CSVProfileError, profile_csv, sniff_delimiter
+from app.services.dataset_export import EXPORT_FORMATS, ExportError, export_chunks, export_filename
+from app.services.dataset_index import get_dataset_index, read_row_at, sync_index
+from app.services.dataset_query import Aggregate, Order, Predicate, Query, QueryError, QueryPlan, page_lines
+from app.services.dataset_rows import RowSource, preview_rows, sample_rows
+from app.services.dataset_versions import (
+    ColumnarCopyMissingError,
+    SegmentedDataset,
+    VersionNotFoundError,
+    column_types,
+    extend_profile,
+    initial_segment,
+    load_version,
+    resolve_version,
+)
+from app.services.embeddings import get_embedder
 from app.services.storage import get_default_storage_backend
 
 
 router = APIRouter()
+logger = get_logger("app.datasets")
 
 
 def _get_workspace_or_404(workspace_id: UUID, db: Session) -> Workspace:
@@ -32,6 +67,52 @@ def _get_workspace_or_404(workspace_id: UUID, db: Session) -> Workspace:
     return workspace
 
 
+def _get_dataset_or_404(workspace_id: UUID, dataset_id: UUID, db: Session) -> Dataset:
+    """
+    Helper to fetch a dataset of a workspace or raise 404.
+    """
+    dataset = (
+        db.query(Dataset)
+        .filter(Dataset.id == dataset_id, Dataset.workspace_id == workspace_id)
+        .first()
+    )
+    if not dataset:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset not found.",
+        )
+    return dataset
+
+
+def _check_csv_upload(file: UploadFile) -> None:
+    """
+    Helper to reject uploads that do not look like a CSV with 400.
+    """
+    content_type = file.content_type or ""
+    if "csv" not in content_type.lower() and not (file.filename or "").lower().endswith(".csv"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded file does not look like a CSV (content-type or extension mismatch).",
+        )
+
+
+async def _profile_upload(file_bytes: bytes):
+    """
+    Helper to profile an uploaded CSV or raise 400.
+    """
+    # Profiling is CPU-bound: keep it off the event loop.
+    settings = get_settings()
+    try:
+        return await run_in_threadpool(
+            profile_csv, io.BytesIO(file_bytes), settings.DATASET_MAX_MALFORMED_FRACTION
+        )
+    except CSVProfileError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid CSV: {exc}",
+        ) from exc
+
+
 @router.post(
     "/workspaces/{workspace_id}/datasets",
     response_model=DatasetRead,
@@ -48,28 +129,53 @@ async def upload_dataset(
 
     The dataset gets a logical name, and the CSV file is stored using
     the default storage backend.
+
+    The file is profiled in a single streaming pass before it is stored
+    (delimiter, column types, nulls, min/max, distinct counts, quantiles);
+    CSVs that cannot be parsed consistently are rejected with 400.
+    A typed, memory-mappable columnar copy is written next to the CSV.
+    The upload becomes segment 0 and version 1 of the dataset.
     """
     _get_workspace_or_404(workspace_id, db)
 
-    content_type = file.content_type or ""
-    if "csv" not in content_type.lower() and not (file.filename or "").lower().endswith(".csv"):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Uploaded file does not look like a CSV (content-type or extension mismatch).",
-        )
+    _check_csv_upload(file)
 
     storage = get_default_storage_backend()
 
     file_bytes = await file.read()
     size_bytes = len(file_bytes)
 
+    profile = await _profile_upload(file_bytes)
+    settings = get_settings()
+
     safe_filename = file.filename or "dataset.csv"
 
     dataset_id = uuid.uuid4()
 
-    relative_path = f"workspaces/{workspace_id}/datasets/{dataset_id}/{safe_filename}"
+    relative_dir = f"workspaces/{workspace_id}/datasets/{dataset_id}"
+    relative_path = f"{relative_dir}/{safe_filename}"
 
     storage_path = storage.save(relative_path, file_bytes)
+    # Mergeable sketch state, kept so statistics can be extended without a rescan.
+    state_path = storage.save(f"{relative_dir}/.profile-state.json", json.dumps(profile.state()).encode("utf-8"))
+
+    columnar_path = None
+    columnar_relative = f"{relative_dir}/columnar"
+    if not storage.supports_local_paths:
+        logger.warning("Storage backend has no local files: dataset %s gets no columnar copy", dataset_id)
+    else:
+        try:
+            await run_in_threadpool(
+                convert_csv,
+                io.BytesIO(file_bytes),
+                profile,
+                storage.local_path(columnar_relative),
+                settings.DATASET_ROW_GROUP_SIZE,
+            )
+            columnar_path = columnar_relative
+        except (ValueError, OSError):
+            # The CSV itself is fine; readers fall back to it.
+            logger.exception("Columnar conversion of dataset %s failed", dataset_id)
 
     dataset = Dataset(
         id=dataset_id,
@@ -79,6 +185,29 @@ async def upload_dataset(
         mime_type=file.content_type,
         size_bytes=size_bytes,
         storage_path=storage_path,
+        row_count=profile.row_count,
+        profile=profile.summary(),
+        columnar_path=columnar_path,
+        current_version=1,
+    )
+    segment = DatasetSegment(
+        id=uuid.uuid4(),
+        sequence=0,
+        storage_path=storage_path,
+        columnar_path=columnar_path,
+        delimiter=profile.delimiter,
+        row_count=profile.row_count,
+        size_bytes=size_bytes,
+    )
+    dataset.segments.append(segment)
+    dataset.versions.append(
+        DatasetVersion(
+            version=1,
+            segment_ids=[str(segment.id)],
+            row_count=profile.row_count,
+            profile=dataset.profile,
+            profile_state_path=state_path,
+        )
     )
 
     db.add(dataset)
@@ -115,3 +244,546 @@ def list_datasets(
     )
 
     return datasets
+
+
+def _dataset_dir(dataset: Dataset) -> str:
+    return f"workspaces/{dataset.workspace_id}/datasets/{dataset.id}"
+
+
+def _resolve_version(
+    dataset: Dataset, version: int | None
+) -> Tuple[Dict[str, Any] | None, List[DatasetSegment]]:
+    """
+    Helper returning (profile, segments) of a dataset version or raising 404.
+    """
+    try:
+        return resolve_version(dataset, version)
+    except VersionNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        ) from exc
+
+
+def _load_version_or_error(dataset: Dataset, version: int | None) -> SegmentedDataset:
+    """
+    Helper to open the columnar copies of a dataset version or raise 404 / 409.
+    """
+    try:
+        return load_version(dataset, version)
+    except VersionNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(exc),
+        ) from exc
+    except ColumnarCopyMissingError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+        ) from exc
+
+
+_VERSION_PARAM = QueryParam(None, ge=1, description="Dataset version to read (default: the current one).")
+
+
+@router.get(
+    "/workspaces/{workspace_id}/datasets/{dataset_id}/profile",
+    response_model=DatasetProfile,
+)
+def get_dataset_profile(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    version: int | None = _VERSION_PARAM,
+    db: Session = Depends(get_db),
+) -> DatasetProfile:
+    """
+    Return the profile of a dataset version (the files are not read again).
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    profile, _ = _resolve_version(dataset, version)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dataset has no profile (uploaded before profiling was enabled).",
+        )
+    return DatasetProfile.model_validate(profile)
+
+
+@router.get(
+    "/workspaces/{workspace_id}/datasets/{dataset_id}/versions",
+    response_model=List[DatasetVersionRead],
+)
+def list_dataset_versions(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    db: Session = Depends(get_db),
+) -> List[DatasetVersionRead]:
+    """
+    List the versions of a dataset, oldest first.
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    if not dataset.versions:
+        return [
+            DatasetVersionRead(
+                version=1,
+                row_count=dataset.row_count or 0,
+                segment_count=1,
+                created_at=dataset.created_at,
+            )
+        ]
+    return [
+        DatasetVersionRead(
+            version=v.version,
+            row_count=v.row_count,
+            segment_count=len(v.segment_ids),
+            created_at=v.created_at,
+        )
+        for v in dataset.versions
+    ]
+
+
+def _stored(relative_path: str) -> bool:
+    try:
+        get_default_storage_backend().open(relative_path).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _ensure_versions(dataset: Dataset, db: Session) -> None:
+    """
+    Helper to persist segment 0 / version 1 of a dataset uploaded before
+    appends existed, or raise 409 if it cannot be extended.
+    """
+    if dataset.versions:
+        return
+    state_path = f"{_dataset_dir(dataset)}/.profile-state.json"
+    if dataset.profile is None or not _stored(state_path):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dataset has no profile state (uploaded before profiling was enabled); re-upload it.",
+        )
+    segment = initial_segment(dataset)
+    dataset.segments.append(segment)
+    dataset.versions.append(
+        DatasetVersion(
+            version=1,
+            segment_ids=[str(segment.id)],
+            row_count=dataset.row_count,
+            profile=dataset.profile,
+            profile_state_path=state_path,
+        )
+    )
+    dataset.current_version = 1
+    db.flush()
+
+
+@router.post(
+    "/workspaces/{workspace_id}/datasets/{dataset_id}/append",
+    response_model=DatasetVersionRead,
+    status_code=status.HTTP_201_CREATED,
+)
+async def append_dataset(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+) -> DatasetVersionRead:
+    """
+    Append the rows of a CSV to a dataset and return the new version.
+
+    The rows are stored as a new segment (CSV plus columnar copy); existing
+    files are not rewritten and earlier versions stay readable. The new
+    version's profile is the previous version's sketch state merged with
+    the profile of the new segment.
+
+    The header must match the dataset's, and column types must not change,
+    except integer -> float and columns without values so far; otherwise 400.
+    """
+    _get_dataset_or_404(workspace_id, dataset_id, db)
+    _check_csv_upload(file)
+
+    file_bytes = await file.read()
+    appended = await _profile_upload(file_bytes)
+
+    # Serialize appends to the same dataset.
+    dataset = (
+        db.query(Dataset)
+        .filter(Dataset.id == dataset_id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    _ensure_versions(dataset, db)
+
+    storage = get_default_storage_backend()
+    settings = get_settings()
+    base = next(v for v in dataset.versions if v.version == dataset.current_version)
+    with storage.open(base.profile_state_path) as f:
+        base_state = json.load(f)
+    try:
+        merged = extend_profile(base_state, appended)
+    except CSVProfileError as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot append: {exc}",
+        ) from exc
+    summary = merged.summary()
+
+    sequence = max(segment.sequence for segment in dataset.segments) + 1
+    number = base.version + 1
+    relative_dir = _dataset_dir(dataset)
+    segment_path = storage.save(f"{relative_dir}/segments/{sequence:06d}.csv", file_bytes)
+    state_path = storage.save(
+        f"{relative_dir}/versions/{number:06d}.profile-state.json",
+        json.dumps(merged.state()).encode("utf-8"),
+    )
+
+    columnar_path = None
+    columnar_relative = f"{relative_dir}/segments/{sequence:06d}.columnar"
+    if not storage.supports_local_paths:
+        logger.warning(
+            "Storage backend has no local files: segment %s of dataset %s gets no columnar copy",
+            sequence, dataset.id,
+        )
+    else:
+        try:
+            # Stored with the dataset-level types, so segments only ever differ by widening.
+            await run_in_threadpool(
+                convert_csv,
+                io.BytesIO(file_bytes),
+                appended,
+                storage.local_path(columnar_relative),
+                settings.DATASET_ROW_GROUP_SIZE,
+                column_types(summary),
+            )
+            columnar_path = columnar_relative
+        except (ValueError, OSError):
+            logger.exception("Columnar conversion of segment %s of dataset %s failed", sequence, dataset.id)
+
+    segment = DatasetSegment(
+        id=uuid.uuid4(),
+        sequence=sequence,
+        storage_path=segment_path,
+        columnar_path=columnar_path,
+        delimiter=appended.delimiter,
+        row_count=appended.row_count,
+        size_bytes=len(file_bytes),
+    )
+    version = DatasetVersion(
+        version=number,
+        segment_ids=base.segment_ids + [str(segment.id)],
+        row_count=merged.row_count,
+        profile=summary,
+        profile_state_path=state_path,
+    )
+    dataset.segments.append(segment)
+    dataset.versions.append(version)
+    dataset.current_version = number
+    dataset.row_count = merged.row_count
+    dataset.profile = summary
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    db.refresh(version)
+
+    if dataset.indexed_columns:
+        # Embed only the new segment's rows.
+        try:
+            await run_in_threadpool(
+                _sync_row_index, dataset, dataset.indexed_columns, _version_segments(dataset, version)
+            )
+        except (ValueError, OSError):
+            logger.exception("Indexing segment %s of dataset %s failed", sequence, dataset.id)
+
+    return DatasetVersionRead(
+        version=version.version,
+        row_count=version.row_count,
+        segment_count=len(version.segment_ids),
+        created_at=version.created_at,
+    )
+
+
+def query_from_request(payload: DatasetQuery) -> Query:
+    """
+    Translate the request schema into the query engine's structure.
+    """
+    return Query(
+        select=payload.select,
+        where=[Predicate(p.column, p.op, p.value) for p in payload.where],
+        group_by=payload.group_by,
+        aggregates=[Aggregate(a.fn, a.column, a.alias) for a in payload.aggregates],
+        order_by=[Order(o.column, o.desc) for o in payload.order_by],
+        limit=payload.limit,
+    )
+
+
+@router.post("/workspaces/{workspace_id}/datasets/{dataset_id}/query")
+def query_dataset(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    payload: DatasetQuery,
+    version: int | None = _VERSION_PARAM,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """
+    Run a filter / project / group-by query over a dataset version.
+
+    The result streams as NDJSON: a {"columns": [...]} header, then
+    {"page": n, "rows": [...]} lines of page_size rows, then a
+    {"stats": {...}} line with row groups scanned vs. skipped.
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    columnar = _load_version_or_error(dataset, version)
+
+    try:
+        plan = QueryPlan(columnar, query_from_request(payload))
+    except QueryError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    def lines():
+        for line in page_lines(plan, payload.page_size):
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/workspaces/{workspace_id}/datasets/{dataset_id}/export")
+def export_dataset(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    format: str = QueryParam("csv", description="csv, jsonl or parquet."),
+    columns: List[str] | None = QueryParam(None, description="Columns to export (repeat the parameter); default all."),
+    compression: str = QueryParam("none", description="none or gzip."),
+    version: int | None = _VERSION_PARAM,
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """
+    Stream a dataset version transcoded to CSV, JSON Lines or Parquet.
+
+    The output is produced batch by batch from the columnar copy while it
+    is sent, so memory use does not grow with the dataset. gzip wraps CSV /
+    JSON Lines output (.gz); Parquet compresses its pages internally.
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    columnar = _load_version_or_error(dataset, version)
+
+    try:
+        chunks = export_chunks(columnar, format, columns, compression)
+    except ExportError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc),
+        ) from exc
+
+    media_type = EXPORT_FORMATS[format][0]
+    if compression == "gzip" and format != "parquet":
+        media_type = "application/gzip"
+    filename = export_filename(dataset.filename.rsplit(".", 1)[0] or "dataset", format, compression)
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _row_sources(segments: List[DatasetSegment]) -> List[RowSource]:
+    """
+    The CSV files of a version's segments, in row order.
+    """
+    storage = get_default_storage_backend()
+    return [
+        RowSource(lambda path=segment.storage_path: storage.open(path), segment.delimiter)
+        for segment in segments
+    ]
+
+
+@router.get(
+    "/workspaces/{workspace_id}/datasets/{dataset_id}/preview",
+    response_model=DatasetRows,
+)
+def preview_dataset(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    rows: int = QueryParam(20, ge=1, le=1000, description="Number of leading rows to return."),
+    version: int | None = _VERSION_PARAM,
+    db: Session = Depends(get_db),
+) -> DatasetRows:
+    """
+    Return the header and the first rows, reading only the start of the file.
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    _, segments = _resolve_version(dataset, version)
+    result = preview_rows(_row_sources(segments), rows)
+    return DatasetRows(columns=result.columns, rows=result.rows, row_numbers=result.row_numbers)
+
+
+@router.get(
+    "/workspaces/{workspace_id}/datasets/{dataset_id}/sample",
+    response_model=DatasetRows,
+)
+def sample_dataset(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    size: int = QueryParam(100, ge=1, le=10000, description="Number of rows to sample."),
+    seed: int | None = QueryParam(None, description="Seed for a reproducible sample."),
+    version: int | None = _VERSION_PARAM,
+    db: Session = Depends(get_db),
+) -> DatasetRows:
+    """
+    Return a uniform random sample of rows (in file order), drawn in one
+    pass over the version's segments with reservoir sampling; memory use
+    depends only on the sample size.
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    _, segments = _resolve_version(dataset, version)
+    result = sample_rows(_row_sources(segments), size, seed=seed)
+    return DatasetRows(columns=result.columns, rows=result.rows, row_numbers=result.row_numbers)
+
+
+def _version_segments(dataset: Dataset, version: DatasetVersion) -> List[DatasetSegment]:
+    by_id = {str(segment.id): segment for segment in dataset.segments}
+    return [by_id[segment_id] for segment_id in version.segment_ids]
+
+
+def _sync_row_index(dataset: Dataset, columns: List[str], segments: List[DatasetSegment]) -> Tuple[int, int]:
+    """
+    Index the rows of any segments the dataset's row index does not cover
+    yet. Returns (rows read, rows covered).
+    """
+    settings = get_settings()
+    return sync_index(
+        dataset.id,
+        columns,
+        [(segment.sequence, source) for segment, source in zip(segments, _row_sources(segments))],
+        get_embedder(),
+        settings.DATASET_EMBED_BATCH_SIZE,
+    )
+
+
+@router.put(
+    "/workspaces/{workspace_id}/datasets/{dataset_id}/index",
+    response_model=DatasetIndexRead,
+)
+async def index_dataset(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    payload: DatasetIndexRequest,
+    db: Session = Depends(get_db),
+) -> DatasetIndexRead:
+    """
+    Mark text columns of a dataset for semantic search and build its row index.
+
+    Rows are streamed from the stored files and embedded in batches; each
+    indexed row keeps its byte offset, so search hits are read back with a
+    single seek. Appends index their new rows automatically. Calling this
+    again with the same columns only indexes segments not covered yet;
+    other columns rebuild the index.
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    profile, segments = _resolve_version(dataset, None)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dataset has no profile (uploaded before profiling was enabled); re-upload it.",
+        )
+
+    types = column_types(profile)
+    columns = list(dict.fromkeys(payload.columns))
+    for name in columns:
+        if name not in types:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown column {name!r}.",
+            )
+        if types[name] not in ("string", "empty"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Column {name!r} is {types[name]}, not a text column.",
+            )
+
+    read, covered = await run_in_threadpool(_sync_row_index, dataset, columns, segments)
+
+    dataset.indexed_columns = columns
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return DatasetIndexRead(columns=columns, row_count=covered, rows_indexed=read)
+
+
+@router.post(
+    "/workspaces/{workspace_id}/datasets/{dataset_id}/search",
+    response_model=DatasetSearchResponse,
+)
+def search_dataset(
+    workspace_id: UUID,
+    dataset_id: UUID,
+    payload: DatasetSearchRequest,
+    version: int | None = _VERSION_PARAM,
+    db: Session = Depends(get_db),
+) -> DatasetSearchResponse:
+    """
+    Semantic search over the indexed text columns of a dataset version.
+
+    Each hit carries its row number, segment and byte offset; the row itself
+    is read back from the stored CSV with one seek per hit. Answers 409
+    while the index does not cover the version yet (see PUT .../index).
+    """
+    dataset = _get_dataset_or_404(workspace_id, dataset_id, db)
+    if not dataset.indexed_columns:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dataset has no semantic index; mark text columns with PUT .../index first.",
+        )
+    profile, segments = _resolve_version(dataset, version)
+
+    index = get_dataset_index(dataset.id)
+    row_count = sum(segment.row_count for segment in segments)
+    if index.columns != dataset.indexed_columns or index.row_count < row_count:
+        # Index missing or behind (an append still embedding, or a failed
+        # one): syncing here would make a search as slow as an index build.
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dataset index is catching up with the latest rows; retry shortly or run PUT .../index.",
+            headers={"Retry-After": "5"},
+        )
+
+    query = get_embedder().embed_one(payload.query)
+    hits = index.search(query, payload.top_k, max_row=row_count)
+
+    storage = get_default_storage_backend()
+    by_sequence = {segment.sequence: segment for segment in segments}
+    rows: Dict[Tuple[int, int], List[str]] = {}
+    for sequence in sorted({segment for _, segment, _, _ in hits}):
+        segment = by_sequence[sequence]
+        with storage.open(segment.storage_path) as f:
+            delimiter = segment.delimiter or sniff_delimiter(f)
+            for _, hit_segment, offset, _ in hits:
+                if hit_segment == sequence:
+                    rows[sequence, offset] = read_row_at(f, offset, delimiter)
+
+    return DatasetSearchResponse(
+        query=payload.query,
+        columns=[column["name"] for column in (profile or {}).get("columns", [])],
+        results=[
+            DatasetSearchHit(
+                row_number=row_number,
+                segment=sequence,
+                offset=offset,
+                score=score,
+                row=rows[sequence, offset],
+            )
+            for row_number, sequence, offset, score in hits
+        ],
+    )
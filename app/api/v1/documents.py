@@ -1,19 +1,32 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.collection import Collection
 from app.models.document import Document
-from app.schemas.document import DocumentRead
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.schemas.document import DocumentRead, DuplicateCluster
+from app.services.ingestion import (
+    apply_outcome,
+    bump_index_version,
+    content_hash,
+    index_document,
+    remove_document_from_index,
+)
+from app.services.kb_index import get_kb_index
 from app.services.storage import get_default_storage_backend
 
 
 router = APIRouter()
 
+logger = get_logger("app.documents")
+
 
 def _get_collection_or_404(collection_id: UUID, db: Session) -> Collection:
     """
@@ -40,15 +53,26 @@ def _get_collection_or_404(collection_id: UUID, db: Session) -> Collection:
 async def upload_document(
     collection_id: UUID,
     file: UploadFile = File(...),
+    skip_duplicates: bool = Query(
+        False,
+        description="Do not index the document if it is a near-duplicate of one already in the knowledge base.",
+    ),
     db: Session = Depends(get_db),
 ) -> DocumentRead:
     """
     Upload a single document into a collection.
 
-    Stores the file using the default storage backend and creates
-    a Document record in the database.
+    Stores the file using the default storage backend, creates
+    a Document record in the database and indexes its text into the
+    knowledge base's search index. Near-duplicates of existing documents
+    are flagged via duplicate_of_id (and get status "duplicate" when
+    skipped).
+
+    The record is "processing" until indexing finishes; if indexing fails
+    it is kept with status "failed" (the stored file is picked up by the
+    next re-index).
     """
-    _get_collection_or_404(collection_id, db)
+    collection = _get_collection_or_404(collection_id, db)
 
     storage = get_default_storage_backend()
 
@@ -68,7 +92,8 @@ async def upload_document(
         mime_type=file.content_type,
         size_bytes=size_bytes,
         storage_path=storage_path,
-        status="ready",
+        status="processing",
+        content_hash=content_hash(file_bytes),
     )
 
     db.add(document)
@@ -81,6 +106,26 @@ async def upload_document(
 
     db.refresh(document)
 
+    # Chunking + embedding is CPU-bound: keep it off the event loop.
+    try:
+        outcome = await run_in_threadpool(
+            index_document, document, collection.knowledge_base_id, file_bytes, skip_duplicates
+        )
+    except Exception:
+        logger.exception("Indexing document %s failed", document.id)
+        document.status = "failed"
+    else:
+        apply_outcome(document, outcome)
+        bump_index_version(db, collection.knowledge_base_id)
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    db.refresh(document)
+
     return document
 
 
@@ -104,4 +149,86 @@ def list_documents(
         .all()
     )
 
-    return docs
\ No newline at end of file
+    return docs
+
+
+@router.get(
+    "/collections/{collection_id}/duplicates",
+    response_model=List[DuplicateCluster],
+)
+def list_duplicate_clusters(
+    collection_id: UUID,
+    threshold: Optional[float] = Query(
+        None,
+        ge=0.0,
+        le=1.0,
+        description="Similarity threshold (defaults to DEDUP_THRESHOLD). "
+        "Values well below it may miss pairs that LSH never compares.",
+    ),
+    db: Session = Depends(get_db),
+) -> List[DuplicateCluster]:
+    """
+    List clusters of near-duplicate documents within a collection, largest first.
+    """
+    collection = _get_collection_or_404(collection_id, db)
+    if threshold is None:
+        threshold = get_settings().DEDUP_THRESHOLD
+
+    docs = {
+        str(doc.id): doc
+        for doc in db.query(Document).filter(Document.collection_id == collection_id).all()
+    }
+    index = get_kb_index(collection.knowledge_base_id)
+    with index.lock:
+        clusters = index.minhash.clusters(docs.keys(), threshold)
+
+    result = [
+        DuplicateCluster(
+            size=len(cluster),
+            documents=[
+                DocumentRead.model_validate(document)
+                for document in sorted((docs[doc_id] for doc_id in cluster), key=lambda d: d.created_at)
+            ],
+        )
+        for cluster in clusters
+    ]
+    result.sort(key=lambda c: -c.size)
+    return result
+
+
+@router.delete(
+    "/collections/{collection_id}/documents/{document_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+def delete_document(
+    collection_id: UUID,
+    document_id: UUID,
+    db: Session = Depends(get_db),
+) -> None:
+    """
+    Delete a document: its index entries, its stored file and its DB record.
+    """
+    collection = _get_collection_or_404(collection_id, db)
+
+    document = (
+        db.query(Document)
+        .filter(Document.id == document_id, Document.collection_id == collection_id)
+        .first()
+    )
+    if not document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found.",
+        )
+
+    remove_document_from_index(collection.knowledge_base_id, document.id)
+    get_default_storage_backend().delete(document.storage_path)
+
+    db.delete(document)
+    bump_index_version(db, collection.knowledge_base_id)
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
@@ -0,0 +1,83 @@
+from dataclasses import asdict
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.collection import Collection
+from app.models.document import Document
+from app.models.knowledge_base import KnowledgeBase
+from app.schemas.indexing import ReindexReportRead
+from app.services.ingestion import reindex_documents
+
+router = APIRouter()
+
+
+def _get_kb_or_404(knowledge_base_id: UUID, db: Session) -> KnowledgeBase:
+    kb = db.query(KnowledgeBase).filter(KnowledgeBase.id == knowledge_base_id).first()
+    if not kb:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Knowledge base not found.",
+        )
+    return kb
+
+
+def _get_collection_or_404(collection_id: UUID, db: Session) -> Collection:
+    collection = db.query(Collection).filter(Collection.id == collection_id).first()
+    if not collection:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Collection not found.",
+        )
+    return collection
+
+
+@router.post(
+    "/knowledge-bases/{knowledge_base_id}/reindex",
+    response_model=ReindexReportRead,
+)
+def reindex_knowledge_base(
+    knowledge_base_id: UUID,
+    db: Session = Depends(get_db),
+) -> ReindexReportRead:
+    """
+    Incrementally re-index every document of a knowledge base.
+
+    Unchanged documents are skipped by content hash, only new chunks are
+    embedded, and index entries of deleted documents are removed.
+    """
+    _get_kb_or_404(knowledge_base_id, db)
+
+    documents = (
+        db.query(Document)
+        .join(Collection, Document.collection_id == Collection.id)
+        .filter(Collection.knowledge_base_id == knowledge_base_id)
+        .all()
+    )
+    report = reindex_documents(db, knowledge_base_id, documents)
+    return ReindexReportRead(**asdict(report))
+
+
+@router.post(
+    "/collections/{collection_id}/reindex",
+    response_model=ReindexReportRead,
+)
+def reindex_collection(
+    collection_id: UUID,
+    db: Session = Depends(get_db),
+) -> ReindexReportRead:
+    """
+    Incrementally re-index the documents of one collection.
+    """
+    collection = _get_collection_or_404(collection_id, db)
+
+    documents = db.query(Document).filter(Document.collection_id == collection_id).all()
+    report = reindex_documents(
+        db,
+        collection.knowledge_base_id,
+        documents,
+        collection_ids=[collection_id],
+    )
+    return ReindexReportRead(**asdict(report))
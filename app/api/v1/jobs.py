@@ -0,0 +1,77 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.job import Job
+from app.schemas.job import JobCreate, JobRead
+from app.services import job_handlers  # noqa: F401  -> registers the built-in handlers
+from app.services.jobs import HANDLERS, enqueue
+
+router = APIRouter()
+
+
+def _get_job_or_404(job_id: UUID, db: Session) -> Job:
+    """
+    Helper to fetch a job or raise 404.
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found.",
+        )
+    return job
+
+
+@router.post(
+    "/jobs",
+    response_model=JobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_job(
+    payload: JobCreate,
+    db: Session = Depends(get_db),
+) -> JobRead:
+    """
+    Enqueue a background job; a worker (scripts/worker.py) runs it.
+    """
+    if payload.kind not in HANDLERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown job kind {payload.kind!r}; expected one of {sorted(HANDLERS)}.",
+        )
+
+    job = enqueue(
+        db,
+        payload.kind,
+        payload.payload,
+        priority=payload.priority,
+        delay_seconds=payload.delay_seconds,
+        max_attempts=payload.max_attempts,
+    )
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    db.refresh(job)
+
+    return job
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobRead,
+)
+def get_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+) -> JobRead:
+    """
+    Return a job's status, attempts, last error and result.
+    """
+    return _get_job_or_404(job_id, db)
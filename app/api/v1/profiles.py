@@ -0,0 +1,69 @@
+import hmac
+from typing import List
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.profiling import get_profile_store
+from app.schemas.profile import ProfileRead
+
+router = APIRouter()
+
+
+def _require_profiling_admin(authorization: str | None = Header(default=None)) -> None:
+    """
+    Profiles are only served when profiling is enabled, to callers bearing
+    PROFILING_SECRET.
+    """
+    settings = get_settings()
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is not enabled.",
+        )
+    token = (authorization or "").removeprefix("Bearer ").strip()
+    # Bytes, not str: compare_digest() raises TypeError on non-ASCII str.
+    if not settings.PROFILING_SECRET or not hmac.compare_digest(
+        token.encode("utf-8"), settings.PROFILING_SECRET.encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="A valid profiling admin token is required.",
+        )
+
+
+@router.get(
+    "/admin/profiles",
+    response_model=List[ProfileRead],
+    dependencies=[Depends(_require_profiling_admin)],
+)
+async def list_profiles() -> List[ProfileRead]:
+    """
+    List stored request profiles, most recent first.
+    """
+    profiles = await run_in_threadpool(get_profile_store().list)
+    return [ProfileRead.model_validate(profile) for profile in profiles]
+
+
+@router.get(
+    "/admin/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(_require_profiling_admin)],
+)
+async def get_profile(profile_id: str) -> PlainTextResponse:
+    """
+    Return a profile as collapsed stacks ("frame;frame;frame count" lines),
+    ready for flamegraph.pl, speedscope or inferno.
+    """
+    collapsed = await run_in_threadpool(get_profile_store().read, profile_id)
+    if collapsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found.",
+        )
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.collapsed"'},
+    )
@@ -5,6 +5,11 @@ from app.api.v1 import knowledge_bases
 from app.api.v1 import collections
 from app.api.v1 import documents
 from app.api.v1 import datasets
+from app.api.v1 import search
+from app.api.v1 import answers
+from app.api.v1 import indexing
+from app.api.v1 import profiles
+from app.api.v1 import jobs
 
 api_router = APIRouter()
 
@@ -37,3 +42,33 @@ api_router.include_router(
     prefix="",
     tags=["datasets"],
 )
+
+api_router.include_router(
+    search.router,
+    prefix="",
+    tags=["search"],
+)
+
+api_router.include_router(
+    answers.router,
+    prefix="",
+    tags=["answers"],
+)
+
+api_router.include_router(
+    indexing.router,
+    prefix="",
+    tags=["indexing"],
+)
+
+api_router.include_router(
+    profiles.router,
+    prefix="",
+    tags=["admin"],
+)
+
+api_router.include_router(
+    jobs.router,
+    prefix="",
+    tags=["jobs"],
+)
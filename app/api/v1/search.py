@@ -0,0 +1,77 @@
+from dataclasses import asdict
+from typing import Any, Dict, List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db
+from app.models.knowledge_base import KnowledgeBase
+from app.schemas.search import SearchFilterFields, SearchRequest, SearchResponse
+from app.services.kb_index import SearchFilters, get_kb_index
+from app.services.query_cache import get_search_cache, make_search_key
+from app.services.search import hybrid_search
+
+router = APIRouter()
+
+
+def _get_kb_or_404(knowledge_base_id: UUID, db: Session) -> KnowledgeBase:
+    kb = db.query(KnowledgeBase).filter(KnowledgeBase.id == knowledge_base_id).first()
+    if not kb:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Knowledge base not found.",
+        )
+    return kb
+
+
+def filters_from_request(payload: SearchFilterFields) -> SearchFilters:
+    return SearchFilters(
+        collection_ids=[str(c) for c in payload.collection_ids] if payload.collection_ids else None,
+        mime_types=payload.mime_types,
+        created_after=payload.created_after,
+        created_before=payload.created_before,
+    )
+
+
+def _run_search(knowledge_base_id: UUID, payload: SearchRequest) -> List[Dict[str, Any]]:
+    filters = filters_from_request(payload)
+    index = get_kb_index(knowledge_base_id)
+    hits = hybrid_search(index, payload.query, filters, top_k=payload.top_k)
+    return [asdict(hit) for hit in hits]
+
+
+@router.post(
+    "/knowledge-bases/{knowledge_base_id}/search",
+    response_model=SearchResponse,
+)
+def search_knowledge_base(
+    knowledge_base_id: UUID,
+    payload: SearchRequest,
+    db: Session = Depends(get_db),
+) -> SearchResponse:
+    """
+    Hybrid search over all indexed documents of a knowledge base.
+
+    Vector and BM25 candidates are generated only from chunks that pass the
+    collection / MIME type / upload date filters, then merged with
+    reciprocal rank fusion.
+
+    Results are cached per (KB, index version, normalized query, filters);
+    any ingest or delete in the KB bumps the version and retires old entries.
+    """
+    kb = _get_kb_or_404(knowledge_base_id, db)
+
+    cache = get_search_cache()
+    key = make_search_key(
+        knowledge_base_id,
+        kb.index_version,
+        payload.query,
+        payload.model_dump(exclude={"query"}, mode="json"),
+    )
+    results = cache.get(key)
+    if results is None:
+        results = _run_search(knowledge_base_id, payload)
+        cache.put(key, results)
+
+    return SearchResponse.model_validate({"query": payload.query, "results": results})
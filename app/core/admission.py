@@ -0,0 +1,381 @@
+"""
+Admission control for uploads and heavy requests.
+
+- Requests are sorted into route classes by method and path: "upload"
+  (document / dataset uploads, dataset appends) and "heavy" (dataset
+  query / search / export / index, reindexing). Everything else is never limited,
+  so a burst of uploads cannot starve cheap reads.
+- Each class has a concurrency limit and, for uploads, a body byte-rate
+  budget, enforced globally and per workspace. The workspace comes from
+  the path, or from the collection / knowledge base in it (looked up once
+  and cached).
+- A request over a concurrency limit waits in a FIFO queue for up to
+  ADMISSION_MAX_WAIT_SECONDS; when the queue is full or the wait runs out
+  it gets 429 with a Retry-After estimate. Byte budgets are token
+  buckets: bodies are read at the budgeted rate (backpressure on the
+  client), and a request arriving while the budget is more than
+  ADMISSION_MAX_WAIT_SECONDS in debt is rejected the same way.
+- Queue depth, requests admitted, waiting times and rejections (by reason)
+  are exported as metrics.
+- Limits are per worker process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Pattern, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.core.config import Settings
+from app.core.logging import get_logger
+from app.core.metrics import counter, gauge, histogram
+
+logger = get_logger("app.admission")
+
+ADMISSION_IN_FLIGHT = gauge("admission_in_flight", "Admitted requests being handled, by route class.", ("route_class",))
+ADMISSION_QUEUE_DEPTH = gauge(
+    "admission_queue_depth", "Requests waiting for admission, by route class.", ("route_class",)
+)
+ADMISSION_WAIT = histogram(
+    "admission_wait_seconds", "Time admitted requests waited for a slot, by route class.", ("route_class",)
+)
+ADMISSION_REJECTIONS = counter(
+    "admission_rejections",
+    "Requests rejected with 429, by route class and reason (queue_full, timeout, bytes).",
+    ("route_class", "reason"),
+)
+
+_ID = r"(?P<{}>[^/]+)"
+
+# (route class, method, path pattern); the named group says where the workspace comes from.
+ROUTES: List[Tuple[str, str, Pattern[str]]] = [
+    ("upload", "POST", re.compile(rf"/api/v1/collections/{_ID.format('collection')}/documents/?$")),
+    ("upload", "POST", re.compile(rf"/api/v1/workspaces/{_ID.format('workspace')}/datasets/?$")),
+    ("upload", "POST", re.compile(rf"/api/v1/workspaces/{_ID.format('workspace')}/datasets/[^/]+/append$")),
+    ("heavy", "POST", re.compile(rf"/api/v1/workspaces/{_ID.format('workspace')}/datasets/[^/]+/query$")),
+    ("heavy", "POST", re.compile(rf"/api/v1/workspaces/{_ID.format('workspace')}/datasets/[^/]+/search$")),
+    ("heavy", "GET", re.compile(rf"/api/v1/workspaces/{_ID.format('workspace')}/datasets/[^/]+/export$")),
+    ("heavy", "PUT", re.compile(rf"/api/v1/workspaces/{_ID.format('workspace')}/datasets/[^/]+/index$")),
+    ("heavy", "POST", re.compile(rf"/api/v1/knowledge-bases/{_ID.format('knowledge_base')}/reindex$")),
+    ("heavy", "POST", re.compile(rf"/api/v1/collections/{_ID.format('collection')}/reindex$")),
+]
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """
+    At most `limit` holders; up to `max_queue` others wait in FIFO order.
+    A released slot is handed straight to the oldest waiter.
+    """
+
+    def __init__(self, limit: int, max_queue: int) -> None:
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self._waiters: Deque[asyncio.Future[None]] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def idle(self) -> bool:
+        return self.active == 0 and not self._waiters
+
+    async def acquire(self, timeout: float) -> None:
+        """
+        Take a slot, waiting at most `timeout` seconds; raises
+        AdmissionRejected("queue_full" / "timeout") otherwise.
+        """
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if timeout <= 0 or len(self._waiters) >= self.max_queue:
+            raise AdmissionRejected("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot arrived as we gave up: pass it on
+            else:
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise AdmissionRejected("timeout") from None
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # slot changes hands, active stays
+                return
+        self.active -= 1
+
+
+class ByteBudget:
+    """
+    Token bucket of `rate` bytes per second holding at most one second's
+    worth. Taking more than is available puts it in debt; the debt in
+    seconds is how long readers should pause.
+    """
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(float(self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def debt_seconds(self) -> float:
+        self._refill()
+        return max(0.0, -self.tokens) / self.rate
+
+    def full(self) -> bool:
+        """
+        True once the bucket has refilled completely, i.e. a new bucket would grant nothing extra.
+        """
+        self._refill()
+        return self.tokens >= self.rate
+
+    def take(self, amount: int) -> float:
+        """
+        Spend `amount` bytes; returns the seconds to pause before reading on.
+        """
+        self._refill()
+        self.tokens -= amount
+        return max(0.0, -self.tokens) / self.rate
+
+
+@dataclass
+class _Limits:
+    """
+    The limiter and byte budget of one route class, globally or for one workspace.
+    """
+
+    limiter: Optional[ConcurrencyLimiter]
+    budget: Optional[ByteBudget]
+
+    def idle(self) -> bool:
+        # A budget that is not full must be kept: a fresh one would grant another burst.
+        return (self.limiter is None or self.limiter.idle()) and (self.budget is None or self.budget.full())
+
+
+@dataclass
+class RouteClass:
+    name: str
+    concurrency: int = 0
+    concurrency_per_workspace: int = 0
+    bytes_per_second: int = 0
+    bytes_per_second_per_workspace: int = 0
+    # Moving average of admitted request durations, for Retry-After estimates.
+    avg_duration: float = 1.0
+
+    def new_limits(self, per_workspace: bool, max_queue: int) -> _Limits:
+        concurrency = self.concurrency_per_workspace if per_workspace else self.concurrency
+        rate = self.bytes_per_second_per_workspace if per_workspace else self.bytes_per_second
+        return _Limits(
+            ConcurrencyLimiter(concurrency, max_queue) if concurrency > 0 else None,
+            ByteBudget(rate) if rate > 0 else None,
+        )
+
+
+def route_classes_from_settings(settings: Settings) -> Dict[str, RouteClass]:
+    return {
+        "upload": RouteClass(
+            "upload",
+            concurrency=settings.ADMISSION_UPLOAD_CONCURRENCY,
+            concurrency_per_workspace=settings.ADMISSION_UPLOAD_CONCURRENCY_PER_WORKSPACE,
+            bytes_per_second=settings.ADMISSION_UPLOAD_BYTES_PER_SECOND,
+            bytes_per_second_per_workspace=settings.ADMISSION_UPLOAD_BYTES_PER_SECOND_PER_WORKSPACE,
+        ),
+        "heavy": RouteClass(
+            "heavy",
+            concurrency=settings.ADMISSION_HEAVY_CONCURRENCY,
+            concurrency_per_workspace=settings.ADMISSION_HEAVY_CONCURRENCY_PER_WORKSPACE,
+        ),
+    }
+
+
+def _lookup_workspace(kind: str, object_id: uuid.UUID) -> Optional[str]:
+    from app.db.session import get_sessionmaker
+    from app.models.collection import Collection
+    from app.models.knowledge_base import KnowledgeBase
+
+    with get_sessionmaker()() as db:
+        query = db.query(KnowledgeBase.workspace_id)
+        if kind == "collection":
+            query = query.join(Collection, Collection.knowledge_base_id == KnowledgeBase.id).filter(
+                Collection.id == object_id
+            )
+        else:
+            query = query.filter(KnowledgeBase.id == object_id)
+        row = query.first()
+    return str(row[0]) if row else None
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying the route class limits described above.
+    """
+
+    # Workspaces of collections / knowledge bases seen; ids never move.
+    MAX_CACHED_OWNERS = 10_000
+
+    def __init__(self, app, settings: Settings) -> None:
+        self.app = app
+        self.max_wait = settings.ADMISSION_MAX_WAIT_SECONDS
+        self.max_queue = settings.ADMISSION_MAX_QUEUE
+        self.classes = route_classes_from_settings(settings)
+        self._global = {name: cls.new_limits(False, self.max_queue) for name, cls in self.classes.items()}
+        self._workspaces: Dict[Tuple[str, str], _Limits] = {}
+        self._owners: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def _classify(self, scope) -> Optional[Tuple[RouteClass, str, str]]:
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        for name, method, pattern in ROUTES:
+            if scope["method"] == method:
+                match = pattern.match(path)
+                if match is not None:
+                    kind, value = next(iter(match.groupdict().items()))
+                    return self.classes[name], kind, value
+        return None
+
+    async def _workspace(self, kind: str, value: str) -> Optional[str]:
+        try:
+            object_id = uuid.UUID(value)
+        except ValueError:
+            return None  # the route answers 422
+        if kind == "workspace":
+            return str(object_id)
+        key = (kind, str(object_id))
+        if key not in self._owners:
+            owner = await run_in_threadpool(_lookup_workspace, kind, object_id)
+            if owner is None:
+                return None  # the route answers 404; don't cache misses
+            if len(self._owners) >= self.MAX_CACHED_OWNERS:
+                self._owners.clear()
+            self._owners[key] = owner
+        return self._owners[key]
+
+    def _retry_after(self, route_class: RouteClass, limits: List[_Limits], reason: str) -> int:
+        if reason == "bytes":
+            seconds = max(l.budget.debt_seconds() for l in limits if l.budget is not None)
+        else:
+            # Time for the queue ahead to drain at the class's recent pace.
+            seconds = max(
+                route_class.avg_duration * (l.limiter.waiting + 1) / l.limiter.limit
+                for l in limits
+                if l.limiter is not None
+            )
+        return max(1, math.ceil(seconds))
+
+    async def __call__(self, scope, receive, send) -> None:
+        classified = self._classify(scope) if scope["type"] == "http" else None
+        if classified is None:
+            await self.app(scope, receive, send)
+            return
+        route_class, kind, value = classified
+        name = route_class.name
+
+        limits = [self._global[name]]
+        workspace = await self._workspace(kind, value)
+        workspace_key = (name, workspace) if workspace is not None else None
+        if workspace_key is not None:
+            if workspace_key not in self._workspaces:
+                self._forget_idle_workspaces()
+                self._workspaces[workspace_key] = route_class.new_limits(True, self.max_queue)
+            limits.insert(0, self._workspaces[workspace_key])  # workspace first: no global slot held while waiting on it
+
+        acquired: List[ConcurrencyLimiter] = []
+        start = time.monotonic()
+        try:
+            if any(l.budget is not None and l.budget.debt_seconds() > self.max_wait for l in limits):
+                raise AdmissionRejected("bytes")
+            queue_depth = ADMISSION_QUEUE_DEPTH.labels(name)
+            queue_depth.inc()
+            try:
+                for l in limits:
+                    if l.limiter is not None:
+                        await l.limiter.acquire(self.max_wait - (time.monotonic() - start))
+                        acquired.append(l.limiter)
+            finally:
+                queue_depth.dec()
+        except AdmissionRejected as rejected:
+            for limiter in acquired:
+                limiter.release()
+            self._forget_if_idle(workspace_key)
+            ADMISSION_REJECTIONS.labels(name, rejected.reason).inc()
+            retry_after = self._retry_after(route_class, limits, rejected.reason)
+            logger.warning(
+                "Rejected %s %s: %s limit reached (%s)", scope["method"], scope["path"], name, rejected.reason,
+                extra={"route_class": name, "reason": rejected.reason, "workspace_id": workspace},
+            )
+            response = JSONResponse(
+                {"detail": f"Too many {name} requests; retry later."},
+                status_code=429,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        except BaseException:
+            for limiter in acquired:
+                limiter.release()
+            self._forget_if_idle(workspace_key)
+            raise
+
+        admitted = time.monotonic()
+        ADMISSION_WAIT.labels(name).observe(admitted - start)
+        budgets = [l.budget for l in limits if l.budget is not None]
+
+        async def budgeted_receive():
+            message = await receive()
+            size = len(message.get("body", b""))
+            if size:
+                pause = max(budget.take(size) for budget in budgets)
+                if pause > 0:
+                    await asyncio.sleep(pause)
+            return message
+
+        in_flight = ADMISSION_IN_FLIGHT.labels(name)
+        in_flight.inc()
+        try:
+            await self.app(scope, budgeted_receive if budgets else receive, send)
+        finally:
+            in_flight.dec()
+            route_class.avg_duration = 0.8 * route_class.avg_duration + 0.2 * (time.monotonic() - admitted)
+            for limiter in acquired:
+                limiter.release()
+            self._forget_if_idle(workspace_key)
+
+    def _forget_if_idle(self, workspace_key: Optional[Tuple[str, str]]) -> None:
+        # Keeps the per-workspace table to the workspaces currently busy.
+        if workspace_key is not None:
+            limits = self._workspaces.get(workspace_key)
+            if limits is not None and limits.idle():
+                del self._workspaces[workspace_key]
+
+    def _forget_idle_workspaces(self) -> None:
+        # Workspaces whose budget was still refilling when their last request
+        # ended are only dropped here, once it is full again.
+        for key in [key for key, limits in self._workspaces.items() if limits.idle()]:
+            del self._workspaces[key]
@@ -0,0 +1,139 @@
+"""
+Single-flight coalescing of identical concurrent GET requests.
+
+- When a dashboard is opened by many users at once, the same listing and
+  detail GETs arrive within milliseconds of each other. CoalescingMiddleware
+  runs the first of a set of identical requests (same path, query string
+  and Authorization / Cookie / Accept headers) and lets the ones arriving
+  while it is in flight wait for its response instead of running their
+  own queries.
+- Only the read routes in COALESCED_ROUTES take part: their handlers are
+  side-effect free and their responses small. Streaming exports, probes
+  and admin routes are left alone.
+- The shared computation runs as its own task, so a client that
+  disconnects (cancelling its request) does not cancel it for the others.
+  If it raises, every waiting request raises the same exception and gets
+  its own error response; a response, including an error one (404, ...),
+  is replayed to each of them.
+- A request only joins a computation that is still running, so at most it
+  sees data as of a few milliseconds before it arrived; once the response
+  is ready, the next request starts a new computation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from app.core.metrics import counter
+
+HTTP_REQUESTS_COALESCED = counter(
+    "http_requests_coalesced",
+    "GET requests answered with the response of an identical request already in flight, by route template.",
+    ("route",),
+)
+
+COALESCED_ROUTES = [
+    "/api/v1/workspaces",
+    "/api/v1/workspaces/{id}",
+    "/api/v1/workspaces/{workspace_id}/knowledge-bases",
+    "/api/v1/knowledge_base/{kb_id}",
+    "/api/v1/knowledge-bases/{knowledge_base_id}/collections",
+    "/api/v1/knowledge-bases/{knowledge_base_id}/answer/cache-stats",
+    "/api/v1/collections/{collection_id}/documents",
+    "/api/v1/collections/{collection_id}/duplicates",
+    "/api/v1/workspaces/{workspace_id}/datasets",
+    "/api/v1/workspaces/{workspace_id}/datasets/{dataset_id}/profile",
+    "/api/v1/workspaces/{workspace_id}/datasets/{dataset_id}/versions",
+    "/api/v1/workspaces/{workspace_id}/datasets/{dataset_id}/preview",
+]
+
+# Request headers that can change the response, hence part of the key.
+_KEY_HEADERS = frozenset((b"authorization", b"cookie", b"accept"))
+
+# Scope entries the router fills in, copied to every request sharing a
+# response (the metrics and access log read the route template from them).
+_ROUTING_KEYS = ("route", "endpoint", "path_params")
+
+
+def _compile(template: str) -> Pattern[str]:
+    return re.compile(re.sub(r"\\\{[^/]+?\\\}", "[^/]+", re.escape(template)) + "/?$")
+
+
+# (path, query string, key headers)
+_Key = Tuple[str, bytes, Tuple[Tuple[bytes, bytes], ...]]
+
+
+@dataclass
+class _Response:
+    messages: List[Dict[str, Any]]
+    routing: Dict[str, Any]
+
+
+class CoalescingMiddleware:
+    """
+    ASGI middleware sharing one in-flight response among identical GETs.
+    """
+
+    def __init__(self, app, routes: Optional[List[str]] = None) -> None:
+        self.app = app
+        self._pattern = re.compile("|".join(f"(?:{_compile(t).pattern})" for t in routes or COALESCED_ROUTES))
+        self._flights: Dict[_Key, asyncio.Task[_Response]] = {}
+
+    def _key(self, scope) -> Optional[_Key]:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return None
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        if not self._pattern.match(path):
+            return None
+        headers = tuple(sorted((name, value) for name, value in scope.get("headers", ()) if name in _KEY_HEADERS))
+        return scope["path"], scope.get("query_string", b""), headers
+
+    async def _compute(self, key: _Key, scope) -> _Response:
+        messages: List[Dict[str, Any]] = []
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # No disconnects: the computation outlives any single client.
+            await asyncio.Event().wait()
+
+        async def capture(message) -> None:
+            messages.append(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            # Later requests start afresh rather than reuse this response.
+            self._flights.pop(key, None)
+        return _Response(messages, {k: scope[k] for k in _ROUTING_KEYS if k in scope})
+
+    async def __call__(self, scope, receive, send) -> None:
+        key = self._key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        flight = self._flights.get(key)
+        joined = flight is not None
+        if not joined:
+            flight = asyncio.create_task(self._compute(key, dict(scope)))
+            # Retrieve the outcome even if every waiting client went away.
+            flight.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._flights[key] = flight
+
+        response = await asyncio.shield(flight)
+        scope.update(response.routing)
+        if joined:
+            HTTP_REQUESTS_COALESCED.labels(getattr(scope.get("route"), "path", scope["path"])).inc()
+        for message in response.messages:
+            # Outer middlewares add per-request headers to the message: give each its own copy.
+            await send(dict(message))
@@ -8,6 +8,7 @@ Configuration module.
 """
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import AnyUrl, Field
@@ -35,18 +36,198 @@ class Settings(BaseSettings):
 
     DEBUG: bool = Field(
         default=True,
-        description="If True, enable debug mode and more verbose logging.",
+        description="If True, enable debug mode (tracebacks in responses, SQL echo).",
     )
     LOG_LVL: str = Field(
-        default="DEBUG",
+        default="INFO",
         description="logging level across the whole system",
     )
+
+    LOG_FORMAT: Literal["text", "json"] = Field(
+        default="text",
+        description="Log line format: human-readable text or one JSON object per line.",
+    )
+
+    LOG_DEBUG_SAMPLE_RATE: float = Field(
+        default=1.0,
+        description="Fraction of DEBUG records kept when LOG_LVL is DEBUG (e.g. 0.05 under load).",
+    )
+
+    LOG_QUEUE_SIZE: int = Field(
+        default=10000,
+        description="Records buffered for the log writer thread; records beyond it are dropped, never waited on.",
+    )
     # --- Deployment / proxy configuration ---
 
     ROOT_PATH: str = Field(
         default="",
         description="URL root path when running behind a reverse proxy (e.g. /proxy/8000).",
     )
+    # --- Startup warm-up ---
+
+    WARMUP_ENABLED: bool = Field(
+        default=True,
+        description="Warm up DB connections, indexes and caches at startup; /ready reports 503 until done.",
+    )
+
+    WARMUP_DB_CONNECTIONS: int = Field(
+        default=5,
+        description="Database connections opened at startup (capped at the pool size).",
+    )
+
+    WARMUP_MAX_INDEXES: int = Field(
+        default=20,
+        description="Most recent knowledge-base / dataset search indexes loaded at startup.",
+    )
+
+    # --- Health checks ---
+
+    HEALTH_PROBE_INTERVAL_SECONDS: float = Field(
+        default=10.0,
+        description="Seconds between background health probes (DB, pool, storage); /health serves the cached results.",
+    )
+
+    HEALTH_POOL_SATURATION_THRESHOLD: float = Field(
+        default=0.9,
+        description="Fraction of the DB pool's capacity checked out at which health reports degraded.",
+    )
+
+    HEALTH_STALE_AFTER_INTERVALS: float = Field(
+        default=3.0,
+        description="Probe results older than this many intervals count as failing.",
+    )
+
+    # --- Metrics ---
+
+    METRICS_ENABLED: bool = Field(
+        default=True,
+        description="Record request / DB pool / storage metrics and serve them at /metrics (Prometheus format).",
+    )
+
+    # --- Request profiling ---
+
+    PROFILING_ENABLED: bool = Field(
+        default=False,
+        description="Install the request profiling middleware and the /api/v1/admin/profiles endpoints.",
+    )
+
+    PROFILING_SECRET: str = Field(
+        default="",
+        description="Key for signed X-Profile request headers; also the bearer token of the admin profile endpoints.",
+        repr=False,
+    )
+
+    PROFILING_SAMPLE_RATE: float = Field(
+        default=0.0,
+        description="Fraction of requests profiled at random (0 profiles only signed requests).",
+    )
+
+    PROFILING_INTERVAL_MS: float = Field(
+        default=2.0,
+        description="Milliseconds between stack samples of a profiled request.",
+    )
+
+    PROFILING_DIR: str | None = Field(
+        default=None,
+        description="Directory for stored profiles (defaults to STORAGE_ROOT/profiles).",
+    )
+
+    PROFILING_MAX_PROFILES: int = Field(
+        default=100,
+        description="Most recent profiles kept on disk.",
+    )
+
+    # --- Admission control (per worker process; 0 means unlimited) ---
+
+    ADMISSION_ENABLED: bool = Field(
+        default=True,
+        description="Limit concurrency and upload byte rate of upload and heavy routes (429 + Retry-After when over).",
+    )
+
+    ADMISSION_MAX_WAIT_SECONDS: float = Field(
+        default=10.0,
+        description="Longest a request waits for admission before a 429 (0 rejects at once when at the limit).",
+    )
+
+    ADMISSION_MAX_QUEUE: int = Field(
+        default=64,
+        description="Requests that may wait for one limit at a time; more are rejected at once.",
+    )
+
+    ADMISSION_UPLOAD_CONCURRENCY: int = Field(
+        default=8,
+        description="Uploads (documents, datasets, appends) handled at once; keep below the DB pool size.",
+    )
+
+    ADMISSION_UPLOAD_CONCURRENCY_PER_WORKSPACE: int = Field(
+        default=4,
+        description="Uploads handled at once for one workspace.",
+    )
+
+    ADMISSION_UPLOAD_BYTES_PER_SECOND: int = Field(
+        default=100 * 1024 * 1024,
+        description="Upload bytes read per second across all workspaces.",
+    )
+
+    ADMISSION_UPLOAD_BYTES_PER_SECOND_PER_WORKSPACE: int = Field(
+        default=25 * 1024 * 1024,
+        description="Upload bytes read per second for one workspace.",
+    )
+
+    ADMISSION_HEAVY_CONCURRENCY: int = Field(
+        default=8,
+        description="Heavy requests (dataset query / export / index, reindexing) handled at once.",
+    )
+
+    ADMISSION_HEAVY_CONCURRENCY_PER_WORKSPACE: int = Field(
+        default=4,
+        description="Heavy requests handled at once for one workspace.",
+    )
+
+    # --- Request coalescing ---
+
+    COALESCING_ENABLED: bool = Field(
+        default=True,
+        description="Let identical concurrent GETs of listing / detail routes share one computation and response.",
+    )
+
+    # --- Background jobs (Postgres-backed queue, see app.services.jobs) ---
+
+    JOBS_MAX_ATTEMPTS: int = Field(
+        default=5,
+        description="Times a job is tried before it is marked dead (per job override on enqueue).",
+    )
+
+    JOBS_VISIBILITY_TIMEOUT_SECONDS: float = Field(
+        default=300.0,
+        description="A claimed job whose worker stops extending its lease for this long is handed to another worker.",
+    )
+
+    JOBS_BACKOFF_BASE_SECONDS: float = Field(
+        default=2.0,
+        description="Delay before the first retry of a failed job; doubles with every further attempt.",
+    )
+
+    JOBS_BACKOFF_MAX_SECONDS: float = Field(
+        default=600.0,
+        description="Longest delay between retries.",
+    )
+
+    JOBS_POLL_INTERVAL_SECONDS: float = Field(
+        default=1.0,
+        description="How often an idle worker looks for due jobs.",
+    )
+
+    JOBS_BATCH_SIZE: int = Field(
+        default=10,
+        description="Jobs a worker claims per query.",
+    )
+
+    JOBS_WORKER_CONCURRENCY: int = Field(
+        default=4,
+        description="Jobs one worker process runs at once (threads).",
+    )
+
     # --- Database configuration (primary source: POSTGRES_* variables) ---
 
     POSTGRES_HOST: str = Field(default="localhost")
@@ -79,6 +260,52 @@ class Settings(BaseSettings):
         description="Default LLM model identifier to use via OpenRouter.",
     )
 
+    OPENROUTER_CONNECT_TIMEOUT: float = Field(
+        default=5.0,
+        description="Seconds allowed to establish a connection to OpenRouter.",
+    )
+
+    OPENROUTER_READ_TIMEOUT: float = Field(
+        default=60.0,
+        description="Seconds allowed between bytes received from OpenRouter.",
+    )
+
+    OPENROUTER_MAX_RETRIES: int = Field(
+        default=3,
+        description="Retries for connection errors, 429 and 5xx responses (jittered backoff).",
+    )
+
+    OPENROUTER_MAX_CONCURRENCY: int = Field(
+        default=16,
+        description="Max in-flight OpenRouter requests per process.",
+    )
+
+    OPENROUTER_MAX_CONNECTIONS: int = Field(
+        default=32,
+        description="Size of the pooled HTTP connection set per process.",
+    )
+
+    RAG_MAX_CONTEXT_CHARS: int = Field(
+        default=12000,
+        description="Character budget for context passages in an answer prompt.",
+    )
+
+    LLM_CACHE_MAX_ENTRIES: int = Field(
+        default=2048,
+        description="Max LLM responses kept in the per-process cache (0 disables it).",
+    )
+
+    LLM_CACHE_TTL_SECONDS: float = Field(
+        default=3600.0,
+        description="Seconds a cached LLM response stays valid.",
+    )
+
+    LLM_CACHE_SEMANTIC_THRESHOLD: float | None = Field(
+        default=None,
+        description="Cosine similarity above which a cached answer to a similar question is reused "
+        "(e.g. 0.95). Unset disables semantic lookups.",
+    )
+
     # --- Storage configuration ---
 
     STORAGE_ROOT: str = Field(
@@ -86,6 +313,102 @@ class Settings(BaseSettings):
         description="Root directory for document and dataset files.",
     )
 
+    DATASET_MAX_MALFORMED_FRACTION: float = Field(
+        default=0.01,
+        description="Reject uploaded CSVs when more than this fraction of rows has the wrong number of fields.",
+    )
+
+    DATASET_ROW_GROUP_SIZE: int = Field(
+        default=65536,
+        description="Rows per row group in the columnar copy of a dataset.",
+    )
+
+    # --- Search / indexing configuration ---
+
+    INDEX_ROOT: str = Field(
+        default="/data/indexes",
+        description="Root directory for per-knowledge-base and per-dataset search indexes.",
+    )
+
+    EMBEDDING_DIM: int = Field(
+        default=384,
+        description="Dimensionality of the document / query embeddings.",
+    )
+
+    DATASET_EMBED_BATCH_SIZE: int = Field(
+        default=256,
+        description="Rows embedded per batch when indexing the text columns of a dataset.",
+    )
+
+    CHUNK_SIZE: int = Field(
+        default=800,
+        description="Target chunk size (characters) when splitting documents for indexing.",
+    )
+
+    CHUNK_OVERLAP: int = Field(
+        default=100,
+        description="Number of characters shared between consecutive chunks.",
+    )
+
+    VECTOR_QUANTIZATION: Literal["float32", "int8", "binary"] = Field(
+        default="float32",
+        description="In-RAM vector format: float32 (exact), int8 (4x smaller) or binary "
+        "(32x smaller, Hamming search). Quantized modes re-rank exactly from disk.",
+    )
+
+    VECTOR_RERANK_FACTOR: int = Field(
+        default=10,
+        description="Quantized modes: candidates re-ranked exactly = top_k * this factor "
+        "(binary needs ~10 or more for good recall).",
+    )
+
+    SEARCH_CANDIDATES: int = Field(
+        default=50,
+        description="Candidates drawn from each retriever (vector / lexical) before fusion.",
+    )
+
+    SEARCH_RRF_K: int = Field(
+        default=60,
+        description="Rank constant k used by reciprocal rank fusion: 1 / (k + rank).",
+    )
+
+    SEARCH_CACHE_MAX_ENTRIES: int = Field(
+        default=1024,
+        description="Max search results kept in the per-process LRU cache (0 disables it).",
+    )
+
+    SEARCH_CACHE_DIR: str | None = Field(
+        default=None,
+        description="Optional directory for a search cache tier shared by all workers.",
+    )
+
+    SEARCH_CACHE_DISK_MAX_ENTRIES: int = Field(
+        default=10000,
+        description="Max entries kept in the on-disk search cache tier.",
+    )
+
+    # --- Near-duplicate detection ---
+
+    DEDUP_NUM_PERM: int = Field(
+        default=128,
+        description="MinHash signature length (must be a multiple of DEDUP_LSH_BANDS).",
+    )
+
+    DEDUP_LSH_BANDS: int = Field(
+        default=16,
+        description="LSH bands; more bands catch lower similarities at the cost of more comparisons.",
+    )
+
+    DEDUP_SHINGLE_SIZE: int = Field(
+        default=5,
+        description="Words per shingle when computing MinHash signatures.",
+    )
+
+    DEDUP_THRESHOLD: float = Field(
+        default=0.8,
+        description="Estimated Jaccard similarity at or above which documents are near-duplicates.",
+    )
+
     # --- Pydantic settings configuration ---
 
     # Pydantic v2-style configuration for BaseSettings
@@ -0,0 +1,36 @@
+"""
+Cross-process advisory file locks.
+
+- file_lock(path) holds an exclusive flock() on `path` (created if
+  missing) for the duration of a with-block. Separate opens of the same
+  file conflict, so it serializes threads of one worker as well as
+  workers on one host, and hosts sharing a filesystem that supports
+  flock (local disks, NFSv4).
+- Locks are released when the block exits or the process dies, so a
+  crashed writer never leaves an index locked.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    Block until the exclusive lock on `path` is held; release it on exit.
+
+    Not re-entrant: acquiring the same path again inside the block deadlocks.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor drops the lock.
+        os.close(fd)
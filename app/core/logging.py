@@ -3,36 +3,256 @@ Logging configuration for the application.
 
 - Exposes a configure_logging(settings) function that sets up global logging.
 - Exposes a get_logger(name) helper for consistent logger creation.
+- Emitting a record never blocks: loggers hand records to a bounded queue
+  (QueueHandler) and a background thread (QueueListener) formats and
+  writes them. When the queue is full the record is dropped and counted
+  (log_records_dropped_total in /metrics) instead of stalling a request.
+- LOG_FORMAT=json writes one JSON object per line. Records logged while
+  handling a request carry its request id, method, path and route
+  template; RequestContextMiddleware sets these and logs one app.access
+  line per request with its status and duration.
+- LOG_LVL sets the level; with DEBUG, LOG_DEBUG_SAMPLE_RATE keeps only a
+  fraction of DEBUG records.
 """
 
+import atexit
+import json
 import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from logging import Logger
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
 
 from app.core.config import Settings
+from app.core.metrics import counter
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)-7s | %(name)s | %(message)s"
+REQUEST_ID_HEADER = "x-request-id"
+
+LOG_RECORDS_DROPPED = counter("log_records_dropped", "Log records dropped because the log queue was full.")
+
+# (request id, ASGI scope) of the request being handled, if any.
+_request_context: ContextVar[Optional[Tuple[str, Dict[str, Any]]]] = ContextVar("request_context", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields.
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+    "request_id",
+    "method",
+    "path",
+    "route",
+    "color_message",  # uvicorn's ANSI-colored duplicate of the message
+}
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Attach the current request's id, method, path and route template to
+    records (in the emitting thread, before they are queued), and sample
+    DEBUG records.
+    """
+
+    def __init__(self, debug_sample_rate: float = 1.0) -> None:
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno == logging.DEBUG and self.debug_sample_rate < 1.0:
+            if random.random() >= self.debug_sample_rate:
+                return False
+        context = _request_context.get()
+        if context is not None:
+            request_id, scope = context
+            record.request_id = request_id
+            record.method = scope.get("method")
+            record.path = scope.get("path")
+            route = scope.get("route")
+            if route is not None:
+                record.route = getattr(route, "path", None)
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops (and counts) records when the queue is full
+    instead of raising, and keeps exception text separate from the message
+    so the JSON formatter can emit it as its own field.
+    """
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that is only valid in this thread (args,
+        # tracebacks) before the record crosses to the listener thread.
+        prepared = logging.makeLogRecord(record.__dict__)
+        prepared.msg = record.getMessage()
+        prepared.args = None
+        if record.exc_info:
+            prepared.exc_text = logging.Formatter().formatException(record.exc_info)
+        prepared.exc_info = None
+        return prepared
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record: timestamp, level, logger, message, request
+    context, any `extra` fields and the exception text.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "method", "path", "route"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def _level(name: str) -> int:
+    level = logging.getLevelName(name.strip().upper())
+    return level if isinstance(level, int) else logging.INFO
 
 
 def configure_logging(settings: Settings) -> None:
     """
     Configure global logging based on application settings.
 
-    - Uses DEBUG or INFO level depending on settings.DEBUG.
-    - Sets a simple log format with timestamp, level, logger name, and message.
-    - Optionally tweaks uvicorn-related loggers for consistency.
+    - Uses the level named by settings.LOG_LVL (INFO if unrecognized).
+    - Routes every record through a non-blocking queue to a writer thread
+      that formats it as text or JSON (settings.LOG_FORMAT) on stderr.
+    - Sends uvicorn's loggers through the same pipeline; uvicorn's own
+      access log is quieted in favour of the app.access lines.
+    - Logs SQL statements when settings.DEBUG is set.
+
+    Calling it again (e.g. a second create_app()) replaces the previous setup.
     """
-    # Decide the base log level from settings.DEBUG
-    log_level = logging.DEBUG if settings.DEBUG else logging.INFO
+    global _listener
+
+    log_level = _level(settings.LOG_LVL)
+
+    stream = logging.StreamHandler(sys.stderr)
+    if settings.LOG_FORMAT == "json":
+        stream.setFormatter(JSONFormatter())
+    else:
+        stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(RequestContextFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(handler.queue, stream, respect_handler_level=False)
+    _listener.start()
 
-    # Configure the root logger
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s | %(levelname)-7s | %(name)s | %(message)s",
-    )
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(log_level)
 
-    # Optional: align uvicorn loggers with our chosen level
+    # Align uvicorn loggers with our level and pipeline.
     for logger_name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
         logger = logging.getLogger(logger_name)
+        logger.handlers.clear()
+        logger.propagate = True
         logger.setLevel(log_level)
+    logging.getLogger("uvicorn.access").setLevel(max(log_level, logging.WARNING))
+
+    # SQL statement logging in debug mode, through the queue (SQLAlchemy's
+    # echo=True would attach its own blocking stdout handler).
+    sql_level = logging.INFO if settings.DEBUG else logging.WARNING
+    logging.getLogger("sqlalchemy.engine").setLevel(max(sql_level, log_level))
+
+
+def shutdown_logging() -> None:
+    """
+    Stop the writer thread after it has written every queued record.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware giving each request an id (the incoming X-Request-ID
+    header, or a new one), echoing it in the response, making it and the
+    route available to every log record emitted while handling the
+    request, and logging an app.access line with status and duration.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.logger = get_logger("app.access")
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = _request_context.set((request_id, scope))
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_id(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            self.logger.info(
+                "%s %s %s %.1f ms",
+                scope["method"],
+                scope["path"],
+                status,
+                duration_ms,
+                extra={"status": status, "duration_ms": duration_ms},
+            )
+            _request_context.reset(token)
 
 
 def get_logger(name: Optional[str] = None) -> Logger:
@@ -42,4 +262,4 @@ def get_logger(name: Optional[str] = None) -> Logger:
     If no name is provided, returns a logger named 'app'.
     Using this helper keeps logger naming consistent across the project.
     """
-    return logging.getLogger(name or "app")
\ No newline at end of file
+    return logging.getLogger(name or "app")
@@ -0,0 +1,381 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+- A small registry of counters, gauges and histograms with labels; render()
+  produces the text served at /metrics (format version 0.0.4), so any
+  Prometheus-compatible scraper can collect it without a client library.
+- Recording is cheap: a labelled series is looked up once per label set
+  and cached, and an update is a lock-free add to a per-thread cell
+  (histograms find their bucket with a bisect). Gauges read from elsewhere (DB pool usage) are
+  callbacks evaluated at scrape time, costing nothing per request.
+  scripts/bench_metrics.py measures the per-operation and per-request cost.
+- MetricsMiddleware records, per route template (e.g.
+  /api/v1/datasets/{dataset_id}/query, never the raw path), request counts
+  and latency histograms, requests in flight and request body bytes
+  (uploads; rate() gives bytes per second).
+- Metrics are per process: with several workers, each is scraped on its own
+  or the scraper sums them.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from threading import get_ident
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar, cast
+
+# Seconds; suits API latencies from ~1 ms to the 30 s request budget.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+SeriesT = TypeVar("SeriesT")
+
+
+class _Metric(Generic[SeriesT]):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], SeriesT] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._unlabelled = self.labels()
+
+    def _new_child(self) -> SeriesT:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> SeriesT:
+        """
+        Return the series for these label values (created on first use, then cached).
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values!r}.")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+        return child
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """
+        (suffix, label text, value) for every series.
+        """
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class _Value:
+    """
+    A counter / gauge series, sharded per thread: each thread adds to its own
+    cell, so updates need no lock (a thread's cell has a single writer) and
+    reads sum the cells.
+    """
+
+    __slots__ = ("shards", "function")
+
+    def __init__(self) -> None:
+        self.shards: Dict[int, List[float]] = {}
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0) -> None:
+        shard = self.shards.get(get_ident())
+        if shard is None:
+            shard = self.shards.setdefault(get_ident(), [0.0])
+        shard[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.shards = {get_ident(): [float(value)]}
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Read the value from `function` at scrape time instead.
+        """
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return math.nan
+        return sum(shard[0] for shard in list(self.shards.values()))
+
+
+class Counter(_Metric["_Value"]):
+    """
+    Monotonic counter; exposed as `<name>_total`.
+    """
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled.inc(amount)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield "_total", _label_text(self.labelnames, values), child.get()
+
+
+class Gauge(_Metric["_Value"]):
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._unlabelled.dec(amount)
+
+    def set(self, value: float) -> None:
+        self._unlabelled.set(value)
+
+    def set_function(self, function: Callable[[], float]) -> "Gauge":
+        self._unlabelled.set_function(function)
+        return self
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield "", _label_text(self.labelnames, values), child.get()
+
+
+class _HistogramValue:
+    """
+    A histogram series, sharded per thread like _Value. A shard holds one
+    count per bucket (the last for values above the largest bound)
+    followed by the sum of the observations.
+    """
+
+    __slots__ = ("bounds", "shards")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.shards: Dict[int, List[float]] = {}
+
+    def observe(self, value: float) -> None:
+        shard = self.shards.get(get_ident())
+        if shard is None:
+            shard = self.shards.setdefault(get_ident(), [0.0] * (len(self.bounds) + 2))
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[float], float]:
+        """
+        Per-bucket counts and the sum, over all threads.
+        """
+        totals = [0.0] * (len(self.bounds) + 2)
+        for shard in list(self.shards.values()):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals[:-1], totals[-1]
+
+
+class Histogram(_Metric["_HistogramValue"]):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled.observe(value)
+
+    def time(self) -> "_Timer":
+        return self._unlabelled.time()
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield "_bucket", _label_text(self.labelnames, values, le), cumulative
+            labels = _label_text(self.labelnames, values)
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
+
+
+class _Timer:
+    """
+    Context manager observing the elapsed seconds into a histogram series.
+    """
+
+    __slots__ = ("series", "start")
+
+    def __init__(self, series: _HistogramValue) -> None:
+        self.series = series
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.series.observe(time.perf_counter() - self.start)
+
+
+MetricT = TypeVar("MetricT", bound=_Metric[Any])
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric[Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: MetricT) -> MetricT:
+        """
+        Add a metric; registering the same name again returns the existing one.
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with another type or labels.")
+                return cast(MetricT, existing)
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# --- Application metrics ---
+
+HTTP_REQUESTS = counter(
+    "http_requests", "HTTP requests handled, by method, route template and status.", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds, by method and route template.", ("method", "route")
+)
+HTTP_IN_FLIGHT = gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+HTTP_REQUEST_BODY_BYTES = counter(
+    "http_request_body_bytes", "Request body bytes received (uploads), by route template.", ("route",)
+)
+STORAGE_OPERATION_DURATION = histogram(
+    "storage_operation_duration_seconds", "Storage backend call latency in seconds, by operation.", ("operation",)
+)
+
+
+UNMATCHED_ROUTE = "unmatched"
+_BODY_METHODS = frozenset(("POST", "PUT", "PATCH"))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the HTTP metrics above.
+
+    The route label is the matched route's path template (set in the scope
+    by the router), so label cardinality stays bounded; requests that match
+    no route share one "unmatched" label.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        body_bytes = 0
+
+        async def counting_receive():
+            nonlocal body_bytes
+            message = await receive()
+            body_bytes += len(message.get("body", b""))
+            return message
+
+        async def status_send(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        HTTP_IN_FLIGHT.inc()
+        try:
+            # Only count bodies where uploads happen; saves a wrapper call elsewhere.
+            counted = counting_receive if method in _BODY_METHODS else receive
+            await self.app(scope, counted, status_send)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            if body_bytes:
+                HTTP_REQUEST_BODY_BYTES.labels(route).inc(body_bytes)
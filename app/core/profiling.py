@@ -0,0 +1,295 @@
+"""
+On-demand profiling of single requests.
+
+- ProfilingMiddleware (installed only when PROFILING_ENABLED is set, so it
+  costs nothing otherwise) profiles a request when it carries a valid
+  signed X-Profile header, or at random for a PROFILING_SAMPLE_RATE
+  fraction of requests. Other requests only pay for the header check.
+- A profiled request gets a statistical sampler: a thread that every
+  PROFILING_INTERVAL_MS records the Python stacks doing that request's
+  work, i.e. the event loop thread while the request's task is running,
+  and threadpool workers running calls made from the request's context
+  (sync endpoints, DB and file work offloaded with run_in_threadpool).
+  Tasks the request spawns itself (e.g. an async streaming body) are not
+  attributed.
+- Stacks are stored in the collapsed format ("root;...;leaf count" lines)
+  that flamegraph.pl, speedscope and inferno read, with a JSON metadata
+  file, under PROFILING_DIR; the profile id is returned in the
+  X-Profile-Id response header and the files are served by the admin
+  endpoints in app/api/v1/profiles.py.
+
+Signing a request (the signature covers method, path and expiry):
+
+    from app.core.profiling import sign_profile_request
+    header = sign_profile_request(secret, "GET", "/api/v1/...", expires=time.time() + 300)
+    # curl -H "X-Profile: $header" ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import sysconfig
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger("app.profiling")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+_session_var: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+def _signature(secret: str, method: str, path: str, expires: int) -> str:
+    message = f"{expires}:{method.upper()}:{path}".encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def sign_profile_request(secret: str, method: str, path: str, expires: float) -> str:
+    """
+    X-Profile header value asking the server to profile this request.
+    """
+    expires = int(expires)
+    return f"{expires}:{_signature(secret, method, path, expires)}"
+
+
+def verify_profile_header(secret: str, method: str, path: str, value: str, now: Optional[float] = None) -> bool:
+    if not secret:
+        return False
+    expires, _, signature = value.partition(":")
+    # Header values are decoded as latin-1: compare bytes, as compare_digest()
+    # rejects non-ASCII str, and only accept ASCII digits ("²".isdigit() is True).
+    if not (expires.isascii() and expires.isdigit()) or int(expires) < (now or time.time()):
+        return False
+    expected = _signature(secret, method, path, int(expires))
+    return hmac.compare_digest(signature.encode("utf-8"), expected.encode("utf-8"))
+
+
+def _worker_run_code():
+    """
+    Code object of anyio's worker thread loop, whose `context` local is the
+    contextvars.Context a threadpool call runs in.
+    """
+    try:
+        from anyio._backends._asyncio import WorkerThread
+
+        return WorkerThread.run.__code__
+    except (ImportError, AttributeError):
+        return None
+
+
+# Path prefixes dropped from frame labels, to keep them short and stable across hosts.
+_PREFIXES = (os.getcwd() + os.sep, sysconfig.get_paths()["stdlib"] + os.sep)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        for prefix in _PREFIXES:
+            if filename.startswith(prefix):
+                filename = filename[len(prefix):]
+                break
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename})"
+
+
+class ProfileSession:
+    """
+    Samples the stacks working on one request until stopped.
+    """
+
+    def __init__(self, interval: float, loop: asyncio.AbstractEventLoop, task: Optional[asyncio.Task[Any]]) -> None:
+        self.id = uuid.uuid4().hex
+        self.interval = interval
+        self.loop = loop
+        self.task = task
+        self.loop_thread = threading.get_ident()
+        self.counts: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id[:8]}", daemon=True)
+        self._worker_code = _worker_run_code()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:  # never let the sampler take the process down
+                logger.debug("Profiler sample failed", exc_info=True)
+
+    def _belongs_to_request(self, thread_id: int, frame) -> bool:
+        if thread_id == self.loop_thread:
+            return self.task is not None and asyncio.current_task(self.loop) is self.task
+        if self._worker_code is None:
+            return False
+        while frame is not None:
+            if frame.f_code is self._worker_code:
+                context = frame.f_locals.get("context")
+                return context is not None and context.get(_session_var) is self
+            frame = frame.f_back
+        return False
+
+    def sample(self) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or not self._belongs_to_request(thread_id, frame):
+                continue
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.counts.items()))
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:  # pruned by another worker meanwhile
+        return 0.0
+
+
+class ProfileStore:
+    """
+    Collapsed-stack files and their metadata under one directory, keeping
+    the most recent `max_profiles`.
+    """
+
+    def __init__(self, directory: Path, max_profiles: int) -> None:
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, profile_id: str, collapsed: str, metadata: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.collapsed").write_text(collapsed, encoding="utf-8")
+        tmp = self.directory / f"{profile_id}.json.tmp"
+        tmp.write_text(json.dumps(metadata), encoding="utf-8")
+        tmp.replace(self.directory / f"{profile_id}.json")
+        self._prune()
+
+    def _prune(self) -> None:
+        entries = sorted(self.directory.glob("*.json"), key=_mtime, reverse=True)
+        for stale in entries[self.max_profiles:]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".collapsed").unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            try:
+                profiles.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue  # pruned or being written by another worker
+        return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+    def read(self, profile_id: str) -> Optional[str]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        try:
+            return (self.directory / f"{profile_id}.collapsed").read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    settings = get_settings()
+    directory = Path(settings.PROFILING_DIR or Path(settings.STORAGE_ROOT) / "profiles")
+    return ProfileStore(directory, settings.PROFILING_MAX_PROFILES)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests selected by a signed X-Profile
+    header or by sampling.
+    """
+
+    def __init__(self, app, secret: str, sample_rate: float, interval_ms: float) -> None:
+        self.app = app
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.secret:
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER:
+                    header = value.decode("latin-1")
+                    if verify_profile_header(self.secret, scope["method"], scope["path"], header):
+                        return "header"
+                    break
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send) -> None:
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(self.interval, asyncio.get_running_loop(), asyncio.current_task())
+        token = _session_var.set(session)
+        status = 500
+
+        async def send_with_id(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", ()), (PROFILE_ID_HEADER, session.id.encode("ascii"))]
+            await send(message)
+
+        start = time.perf_counter()
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = round((time.perf_counter() - start) * 1000, 2)
+            session.stop()
+            _session_var.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            metadata = {
+                "id": session.id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": route,
+                "status": status,
+                "trigger": trigger,
+                "duration_ms": duration_ms,
+                "samples": sum(session.counts.values()),
+                "interval_ms": self.interval * 1000,
+                "created_at": time.time(),
+            }
+            try:
+                await run_in_threadpool(get_profile_store().save, session.id, session.collapsed(), metadata)
+                logger.info("Profiled %s %s as %s (%.1f ms)", scope["method"], scope["path"], session.id, duration_ms)
+            except OSError:
+                logger.exception("Could not store profile %s", session.id)
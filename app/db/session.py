@@ -1,40 +1,116 @@
 """
 Database engine and session management.
 
-- Creates the SQLAlchemy Engine using the DATABASE_URL from settings.
-- Defines a SessionLocal factory for creating Session objects.
+- get_engine() creates the SQLAlchemy Engine from settings on first use,
+  not at import time, so importing the app (or any module that needs
+  get_db) stays cheap. The app's lifespan creates it at startup and
+  disposes of it at shutdown.
+- get_sessionmaker() returns the Session factory bound to that engine.
+- pool_status() reports connection pool usage (for health checks and the
+  db_pool_* gauges, read at scrape time).
 - Provides a get_db() dependency for FastAPI routes to obtain a scoped session.
 """
 
-from typing import Generator
+import threading
+from typing import Dict, Generator, Optional, cast
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import session,sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.core.metrics import gauge
 
-settings = get_settings()
 logger = get_logger("app.db")
 
-# Create the SQLAlchemy Engine.
-# - str(settings.DATABASE_URL) converts AnyUrl to plain string.
-# - echo=settings.DEBUG can be useful when debugging SQL queries.
-engine = create_engine(
-    settings.sqlalchemy_database_url,
-    echo=settings.DEBUG,
-    future=True,  # use SQLAlchemy 2.x style behavior
-)
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker[Session]] = None
+_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    Return the process-wide Engine, creating it on first use.
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                settings = get_settings()
+                # SQL statements are logged in DEBUG mode via the
+                # "sqlalchemy.engine" logger (see configure_logging), not echo=.
+                engine = create_engine(
+                    settings.sqlalchemy_database_url,
+                    future=True,  # use SQLAlchemy 2.x style behavior
+                )
+                # Each Session from this factory is a new Session connected to the engine.
+                _session_factory = sessionmaker(
+                    bind=engine,
+                    autoflush=False,
+                    autocommit=False,
+                    future=True,
+                )
+                _engine = engine
+    return _engine
+
+
+def get_sessionmaker() -> sessionmaker[Session]:
+    """
+    Return the Session factory bound to the process-wide Engine.
+    """
+    get_engine()
+    factory = _session_factory
+    if factory is None:
+        raise RuntimeError("The database engine was disposed.")
+    return factory
+
 
-# Create a configurable Session factory.
-# Each SessionLocal instance will be a new Session connected to the engine.
-SessionLocal = sessionmaker(
-    bind=engine,
-    autoflush=False,
-    autocommit=False,
-    future=True,
+def dispose_engine() -> None:
+    """
+    Close the Engine's pooled connections and forget it (call on shutdown).
+    """
+    global _engine, _session_factory
+    with _lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _session_factory = None
+
+
+def pool_status() -> Dict[str, int]:
+    """
+    Size, capacity (size + max overflow), checked-out and overflow
+    connection counts of the engine's pool; empty if there is no engine yet
+    or the pool has no fixed size (e.g. SQLite's).
+    """
+    engine = _engine
+    if engine is None or not callable(getattr(engine.pool, "size", None)):
+        return {}
+    pool = cast(QueuePool, engine.pool)
+    size = pool.size()
+    return {
+        "size": size,
+        "capacity": size + max(getattr(pool, "_max_overflow", 0), 0),
+        "checked_out": pool.checkedout(),
+        # Negative while the pool itself is not yet full.
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+DB_POOL_SIZE = gauge("db_pool_size", "Connections the DB pool keeps open.").set_function(
+    lambda: pool_status().get("size", 0)
+)
+DB_POOL_CHECKED_OUT = gauge("db_pool_checked_out", "DB connections currently checked out.").set_function(
+    lambda: pool_status().get("checked_out", 0)
 )
+DB_POOL_OVERFLOW = gauge("db_pool_overflow", "DB connections open beyond the pool size.").set_function(
+    lambda: pool_status().get("overflow", 0)
+)
+
 
-def get_db() -> Generator[session, None, None]:
+def get_db() -> Generator[Session, None, None]:
     """
     FastAPI dependency that provides a database session.
 
@@ -51,8 +127,8 @@ def get_db() -> Generator[session, None, None]:
     - Yields it to the route handler.
     - Ensures the Session is closed after the request finishes.
     """
-    db = SessionLocal()
+    db = get_sessionmaker()()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
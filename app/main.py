@@ -2,15 +2,78 @@
 Application entrypoint.
 
 - Defines a create_app() factory that builds and configures the FastAPI app.
-- Exposes 'app' for ASGI servers (e.g. uvicorn app.main:app).
+- Exposes 'app' for ASGI servers (e.g. uvicorn app.main:app). It is built
+  on first access rather than at import, so importing this module (e.g. to
+  call create_app() with other settings) is cheap;
+  `uvicorn --factory app.main:create_app` works as well.
+- Process-wide resources (database engine, storage backend) are created
+  in the app's lifespan, not at import time, and released at shutdown.
+  Heavier subsystems (search indexes, caches, the LLM client) are primed
+  by a background warm-up (app.services.warmup) once the server is up;
+  /ready answers 503 until it has finished.
+- /health and /ready serve the cached results of background dependency
+  probes (app.services.health), so they add no per-call DB load.
+- /metrics serves request, DB pool and storage metrics in the Prometheus
+  text format (app.core.metrics).
+- Uploads and heavy routes are admission-controlled (app.core.admission):
+  over their concurrency or byte-rate limits they queue briefly, then get
+  429 with Retry-After, leaving capacity for everything else.
+- Identical concurrent GETs of listing / detail routes share one
+  computation and response (app.core.coalescing).
+
+scripts/bench_startup.py measures import and startup time against a budget.
 """
 
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.core.config import get_settings, Settings
-from app.core.logging import configure_logging, get_logger
-from app.api.v1 import api_router
+from app.core.logging import RequestContextMiddleware, configure_logging, get_logger
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Create process-wide resources at startup and release them at shutdown.
+    """
+    from app.db.session import dispose_engine, get_engine
+    from app.services.health import HealthMonitor
+    from app.services.storage import get_default_storage_backend
+    from app.services.warmup import WarmupState, run_warmup
+
+    settings = get_settings()
+    app.state.engine = get_engine()
+    app.state.storage = get_default_storage_backend()
+
+    # Warm up in the background so the server starts accepting (and
+    # answering /health) at once; /ready flips when this finishes.
+    app.state.warmup = WarmupState(ready=not settings.WARMUP_ENABLED)
+    tasks = []
+    if settings.WARMUP_ENABLED:
+        tasks.append(asyncio.create_task(run_warmup(app.state.warmup, settings)))
+
+    app.state.health = HealthMonitor.from_settings(settings)
+    tasks.append(asyncio.create_task(app.state.health.run()))
+
+    logger = get_logger("app.startup")
+    logger.info("Application startup complete.", extra={"env": settings.APP_ENV})
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Only close the LLM client if something actually loaded it.
+        llm = sys.modules.get("app.services.llm")
+        if llm is not None:
+            await llm.close_llm_client()
+        dispose_engine()
+
 
 def create_app() -> FastAPI:
     """
@@ -19,9 +82,13 @@ def create_app() -> FastAPI:
     Steps:
     - Load settings using get_settings()
     - Configure logging with configure_logging(settings)
-    - Create the FastAPI() instance with basic metadata
+    - Create the FastAPI() instance with basic metadata and the lifespan
+    - Add the GET coalescing middleware (if COALESCING_ENABLED), the
+      admission control middleware (if ADMISSION_ENABLED), the
+      metrics middleware (if METRICS_ENABLED), the request
+      profiling middleware (if PROFILING_ENABLED) and the request
+      context / access log middleware
     - Register routes
-    - Register startup event handler
     - Return the app
     """
     # Load configuration (reads env variables / .env)
@@ -35,37 +102,53 @@ def create_app() -> FastAPI:
         title=settings.APP_NAME,
         debug=settings.DEBUG,
         version="0.1.0",
-        root_path=settings.ROOT_PATH, 
+        root_path=settings.ROOT_PATH,
+        lifespan=lifespan,
     )
 
-    # Register all routes/endpoints for the app
-    register_routes(app)
+    if settings.COALESCING_ENABLED:
+        from app.core.coalescing import CoalescingMiddleware
 
-    # Example of a startup event handler
-    @app.on_event("startup")
-    async def on_startup() -> None:
-        """
-        Startup hook for the application.
+        app.add_middleware(CoalescingMiddleware)
+    if settings.ADMISSION_ENABLED:
+        from app.core.admission import AdmissionMiddleware
 
-        Later, you can:
-        - Test DB connectivity.
-        - Warm up vector store connections.
-        - Log startup information.
-        """
-        logger = get_logger("app.startup")
-        logger.info("Application startup complete.", extra={"env": settings.APP_ENV})
+        app.add_middleware(AdmissionMiddleware, settings=settings)
+    if settings.METRICS_ENABLED:
+        from app.core.metrics import MetricsMiddleware
+
+        app.add_middleware(MetricsMiddleware)
+    if settings.PROFILING_ENABLED:
+        from app.core.profiling import ProfilingMiddleware
+
+        app.add_middleware(
+            ProfilingMiddleware,
+            secret=settings.PROFILING_SECRET,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            interval_ms=settings.PROFILING_INTERVAL_MS,
+        )
+    # Added last so it is outermost: everything below logs with the request id.
+    app.add_middleware(RequestContextMiddleware)
+
+    # Register all routes/endpoints for the app
+    register_routes(app, settings)
 
     return app
 
 
-def register_routes(app: FastAPI) -> None:
+def register_routes(app: FastAPI, settings: Settings) -> None:
     """
     Attach all routes to the application.
 
-    For Phase 1:
-    - Implement a simple /health endpoint that returns {"status": "ok"}.
-    - Later, include versioned routers (e.g. /api/v1).
+    - /health: cached dependency probe results; 503 while a critical
+      probe (database, storage) is failing.
+    - /ready: 503 until the startup warm-up is done and the critical
+      probes pass.
+    - /metrics: the metrics registry in the Prometheus text format.
+    - The versioned routers under /api/v1, imported here rather than at
+      module import so they are only loaded when an app is built.
     """
+    from app.api.v1 import api_router
 
     logger = get_logger("app.routes")
 
@@ -74,14 +157,49 @@ def register_routes(app: FastAPI) -> None:
         """
         Health check endpoint.
 
-        For now, just returns a static JSON payload.
-        Later, you can check DB/vector-store connectivity here.
+        Returns the latest background probe results (no probing per call).
         """
         logger.debug("Health check called.")
-        return JSONResponse({"status": "ok"})
+        monitor = getattr(app.state, "health", None)
+        report = monitor.report() if monitor is not None else {"status": "starting", "checks": {}}
+        return JSONResponse(report, status_code=503 if report["status"] == "failing" else 200)
+
+    @app.get("/ready", tags=["system"], response_class=JSONResponse)
+    async def ready() -> JSONResponse:
+        """
+        Readiness check: 200 once the startup warm-up has finished and the
+        critical dependency probes pass, 503 before (with the warm-up steps
+        done so far and their timings).
+        """
+        state = getattr(app.state, "warmup", None)
+        monitor = getattr(app.state, "health", None)
+        if state is None or monitor is None:
+            return JSONResponse({"status": "starting", "steps": {}}, status_code=503)
+        body = state.to_dict()
+        if state.ready and not monitor.is_ready():
+            body["status"] = "dependencies_unavailable"
+        body["checks"] = monitor.report()["checks"]
+        return JSONResponse(body, status_code=200 if body["status"] == "ready" else 503)
+
+    if settings.METRICS_ENABLED:
+
+        @app.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+        async def metrics() -> PlainTextResponse:
+            """
+            Metrics in the Prometheus text exposition format.
+            """
+            from app.core.metrics import CONTENT_TYPE, REGISTRY
+
+            return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
 
     # Include versioned API routes under /api/v1
     app.include_router(api_router, prefix="/api/v1")
 
-# Global app instance for ASGI servers
-app = create_app()
\ No newline at end of file
+
+def __getattr__(name: str):
+    # Global app instance for ASGI servers, built on first access.
+    if name == "app":
+        instance = create_app()
+        globals()["app"] = instance
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,4 +2,5 @@ from app.models.workspace import Workspace
 from app.models.knowledge_base import KnowledgeBase
 from app.models.collection import Collection
 from app.models.document import Document
-from app.models.dataset import Dataset
\ No newline at end of file
+from app.models.dataset import Dataset, DatasetSegment, DatasetVersion
+from app.models.job import Job
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, JSON, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -31,6 +31,19 @@ class Dataset(Base):
     size_bytes = Column(Integer, nullable=False)
     storage_path = Column(Text, nullable=False)
 
+    # Filled in at upload by the streaming CSV profiler
+    row_count = Column(Integer, nullable=True)
+    profile = Column(JSON, nullable=True)
+
+    # Storage path of the columnar (memory-mappable) copy, if converted
+    columnar_path = Column(Text, nullable=True)
+
+    # Text columns marked for the row-level semantic index (None: not indexed)
+    indexed_columns = Column(JSON, nullable=True)
+
+    # Latest DatasetVersion.version (None for datasets uploaded before versioning)
+    current_version = Column(Integer, nullable=True)
+
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -38,3 +51,90 @@ class Dataset(Base):
     )
 
     workspace = relationship("Workspace", back_populates="datasets")
+    segments = relationship(
+        "DatasetSegment",
+        back_populates="dataset",
+        cascade="all, delete-orphan",
+        order_by="DatasetSegment.sequence",
+    )
+    versions = relationship(
+        "DatasetVersion",
+        back_populates="dataset",
+        cascade="all, delete-orphan",
+        order_by="DatasetVersion.version",
+    )
+
+
+class DatasetSegment(Base):
+    """
+    One immutable CSV file of a dataset: the original upload (sequence 0)
+    or a batch of appended rows.
+    """
+
+    __tablename__ = "dataset_segments"
+    __table_args__ = (UniqueConstraint("dataset_id", "sequence"),)
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    dataset_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("datasets.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    sequence = Column(Integer, nullable=False)
+    storage_path = Column(Text, nullable=False)
+    columnar_path = Column(Text, nullable=True)
+    delimiter = Column(String(8), nullable=True)
+    row_count = Column(Integer, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    dataset = relationship("Dataset", back_populates="segments")
+
+
+class DatasetVersion(Base):
+    """
+    Immutable snapshot of a dataset: an ordered list of segments plus the
+    profile of exactly those rows.
+    """
+
+    __tablename__ = "dataset_versions"
+    __table_args__ = (UniqueConstraint("dataset_id", "version"),)
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    dataset_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("datasets.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    version = Column(Integer, nullable=False)
+    # DatasetSegment ids (as strings), in row order
+    segment_ids = Column(JSON, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    profile = Column(JSON, nullable=True)
+    # Storage path of the mergeable profile state (CSVProfile.state())
+    profile_state_path = Column(Text, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    dataset = relationship("Dataset", back_populates="versions")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column,String,Text, DateTime,ForeignKey, Integer,func
+from sqlalchemy import Column,String,Text, DateTime,ForeignKey, Integer,Float,func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -27,6 +27,17 @@ class Document(Base):
     storage_path = Column(Text, nullable=False)
     status = Column(String(50), nullable=False, default="ready")
 
+    # sha256 of the stored file, used by incremental re-indexing
+    content_hash = Column(String(64), nullable=True)
+
+    # most similar earlier document if this one is a near-duplicate (MinHash/LSH)
+    duplicate_of_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("documents.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    duplicate_similarity = Column(Float, nullable=True)
+
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -0,0 +1,55 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, JSON, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from app.db.base import Base
+
+
+class Job(Base):
+    """
+    A unit of background work, claimed by workers with
+    SELECT ... FOR UPDATE SKIP LOCKED (see app.services.jobs).
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+    )
+
+    # Handler name, e.g. "reindex_collection"
+    kind = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+
+    # queued -> running -> done, or back to queued (retry), or dead
+    status = Column(String(20), nullable=False, default="queued")
+
+    # Higher runs first; among equal priorities, earliest run_at first
+    priority = Column(Integer, nullable=False, default=0)
+
+    # Claims so far (incremented on every claim; also fences stale workers)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+
+    # Not claimable before this time (delayed jobs, retry backoff)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+
+    # Lease of the claiming worker; an expired lease makes the job claimable again
+    locked_by = Column(String(255), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "priority", "run_at"),
+    )
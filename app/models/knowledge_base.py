@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, func
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -23,6 +23,10 @@ class KnowledgeBase(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
 
+    # Bumped whenever a document in any of the KB's collections is ingested
+    # or deleted; search caches key on it so stale results are never served.
+    index_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
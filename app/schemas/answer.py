@@ -0,0 +1,32 @@
+from pydantic import BaseModel, Field
+
+from app.schemas.search import SearchFilterFields
+
+
+class AnswerRequest(SearchFilterFields):
+    """
+    Schema for a question answered from a knowledge base (RAG).
+
+    The answer is streamed back as Server-Sent Events:
+    - "sources": the context passages used, sent before the first token
+    - "token":   {"content": "..."} for each streamed delta
+    - "timings": per-stage timings in milliseconds
+    - "error":   if the LLM call fails mid-way
+    """
+
+    question: str = Field(..., min_length=1)
+    top_k: int = Field(default=6, ge=1, le=30)
+    model: str | None = None
+    temperature: float | None = Field(default=None, ge=0.0, le=2.0)
+    max_tokens: int | None = Field(default=None, ge=1)
+
+
+class AnswerCacheStats(BaseModel):
+    """
+    LLM response cache counters for one knowledge base.
+    """
+
+    exact_hits: int
+    semantic_hits: int
+    misses: int
+    hit_rate: float
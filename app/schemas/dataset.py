@@ -1,7 +1,8 @@
 from datetime import datetime
+from typing import Any, Dict, List, Literal
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class DatasetBase(BaseModel):
@@ -28,6 +29,160 @@ class DatasetRead(DatasetBase):
     filename: str
     mime_type: str | None
     size_bytes: int
+    row_count: int | None = None
+    current_version: int | None = None
+    indexed_columns: List[str] | None = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class DatasetVersionRead(BaseModel):
+    """
+    One immutable version of a dataset: the rows of its first
+    segment_count segments.
+    """
+
+    version: int
+    row_count: int
+    segment_count: int
+    created_at: datetime
+
+
+class ColumnProfile(BaseModel):
+    """
+    Statistics for one dataset column.
+
+    type is one of integer / float / boolean / datetime / string / empty.
+    distinct_estimate comes from a HyperLogLog sketch and quantiles
+    (numeric columns only) from a KLL sketch, so both are approximate.
+    """
+
+    name: str
+    type: str
+    null_count: int
+    non_null_count: int
+    distinct_estimate: int
+    min: Any = None
+    max: Any = None
+    mean: float | None = None
+    quantiles: Dict[str, float] | None = None
+
+
+class DatasetProfile(BaseModel):
+    """
+    Profile of one dataset version, computed at upload and extended
+    incrementally on each append.
+    """
+
+    delimiter: str
+    row_count: int
+    malformed_rows: int
+    columns: List[ColumnProfile]
+
+
+class DatasetRows(BaseModel):
+    """
+    Raw CSV rows of a dataset (preview or random sample).
+
+    row_numbers are 0-based positions among the data rows, i.e. the row
+    positions used by the profile and by queries.
+    """
+
+    columns: List[str]
+    rows: List[List[str]]
+    row_numbers: List[int]
+
+
+class QueryPredicate(BaseModel):
+    """
+    One filter condition; all predicates of a query are combined with AND.
+
+    value is ignored for is_null / not_null and must be a list for in / not_in.
+    Datetime values are ISO 8601 strings.
+    """
+
+    column: str
+    op: Literal["=", "!=", "<", "<=", ">", ">=", "in", "not_in", "is_null", "not_null"]
+    value: Any = None
+
+
+class QueryAggregate(BaseModel):
+    """
+    Aggregate over each group. count without a column counts rows;
+    every other function ignores nulls of its column.
+    """
+
+    fn: Literal["count", "sum", "mean", "min", "max"]
+    column: str | None = None
+    alias: str | None = Field(default=None, alias="as")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class QueryOrder(BaseModel):
+    column: str
+    desc: bool = False
+
+
+class DatasetQuery(BaseModel):
+    """
+    Small JSON query language over a dataset's columnar copy.
+
+    Without group_by / aggregates the result is the selected columns of the
+    matching rows (all columns if select is omitted). With them, it is one
+    row per group: the group_by columns followed by the aggregates.
+    order_by may refer to output columns (including aggregate aliases).
+    """
+
+    select: List[str] | None = None
+    where: List[QueryPredicate] = Field(default_factory=list)
+    group_by: List[str] = Field(default_factory=list)
+    aggregates: List[QueryAggregate] = Field(default_factory=list)
+    order_by: List[QueryOrder] = Field(default_factory=list)
+    limit: int | None = Field(default=None, ge=0)
+    page_size: int = Field(default=1000, ge=1, le=10000)
+
+
+class DatasetIndexRequest(BaseModel):
+    """
+    Text columns whose rows are embedded into the dataset's semantic index.
+    """
+
+    columns: List[str] = Field(..., min_length=1)
+
+
+class DatasetIndexRead(BaseModel):
+    columns: List[str]
+    # Rows covered by the index, i.e. the row count of the current version
+    row_count: int
+    # Rows read while building / updating it in this request
+    rows_indexed: int
+
+
+class DatasetSearchRequest(BaseModel):
+    """
+    Semantic query over the indexed text columns of a dataset.
+    """
+
+    query: str = Field(..., min_length=1)
+    top_k: int = Field(default=10, ge=1, le=100)
+
+
+class DatasetSearchHit(BaseModel):
+    """
+    One matching row. offset is the byte offset of the row in the CSV
+    file of its segment (sequence 0 is the original upload).
+    """
+
+    row_number: int
+    segment: int
+    offset: int
+    score: float
+    row: List[str]
+
+
+class DatasetSearchResponse(BaseModel):
+    query: str
+    columns: List[str]
+    results: List[DatasetSearchHit]
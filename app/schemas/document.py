@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -14,6 +15,17 @@ class DocumentRead(BaseModel):
     mime_type: str | None
     size_bytes: int
     status: str
+    duplicate_of_id: UUID | None = None
+    duplicate_similarity: float | None = None
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class DuplicateCluster(BaseModel):
+    """
+    A group of near-duplicate documents, oldest first.
+    """
+
+    size: int
+    documents: List[DocumentRead]
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class ReindexReportRead(BaseModel):
+    """
+    Schema for the result of an incremental re-index run.
+
+    documents_skipped counts unchanged documents that were not re-chunked;
+    chunks_reused counts chunks of changed documents whose embedding was reused;
+    documents_duplicate counts re-indexed documents flagged as near-duplicates.
+    """
+
+    documents_total: int
+    documents_indexed: int
+    documents_skipped: int
+    documents_removed: int
+    documents_missing: int
+    documents_duplicate: int
+    chunks_embedded: int
+    chunks_reused: int
+    bytes_read: int
+    elapsed_ms: float
@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Dict
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class JobCreate(BaseModel):
+    """
+    Schema for enqueuing a background job.
+
+    kind names a registered handler (e.g. "reindex_collection") and
+    payload its arguments; higher priority jobs run first, delay_seconds
+    postpones the first attempt.
+    """
+
+    kind: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    priority: int = 0
+    delay_seconds: float = Field(default=0.0, ge=0)
+    max_attempts: int | None = Field(default=None, ge=1)
+
+
+class JobRead(BaseModel):
+    """
+    Schema for reading a job's state.
+
+    status is queued, running, done or dead; attempts counts the claims so
+    far, last_error holds the error of the latest failed attempt and
+    result the handler's return value once done.
+    """
+
+    id: UUID
+    kind: str
+    payload: Dict[str, Any]
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: str | None = None
+    result: Dict[str, Any] | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
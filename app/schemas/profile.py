@@ -0,0 +1,23 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class ProfileRead(BaseModel):
+    """
+    Schema for the metadata of a stored request profile.
+
+    samples counts the stacks recorded (one per thread per sampling tick);
+    the collapsed stacks themselves are served as text.
+    """
+
+    id: str
+    method: str
+    path: str
+    route: str | None = None
+    status: int
+    trigger: Literal["header", "sampled"]
+    duration_ms: float
+    samples: int
+    interval_ms: float
+    created_at: float
@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import List
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class SearchFilterFields(BaseModel):
+    """
+    Optional metadata filters shared by search and answer requests.
+
+    All filters are combined with AND.
+    """
+
+    collection_ids: List[UUID] | None = None
+    mime_types: List[str] | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+
+class SearchRequest(SearchFilterFields):
+    """
+    Schema for a hybrid (vector + lexical) knowledge-base query.
+    """
+
+    query: str = Field(..., min_length=1)
+    top_k: int = Field(default=10, ge=1, le=100)
+
+
+class SearchHit(BaseModel):
+    """
+    One matching chunk, with its fused score and per-retriever ranks.
+    """
+
+    document_id: UUID
+    collection_id: UUID
+    filename: str
+    mime_type: str | None
+    chunk_index: int
+    text: str
+    score: float
+    vector_rank: int | None
+    lexical_rank: int | None
+
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchHit]
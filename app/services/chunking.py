@@ -0,0 +1,102 @@
+"""
+Text extraction, chunking and tokenization for knowledge-base documents.
+
+- extract_text() turns uploaded bytes into plain text for text-like formats.
+- chunk_text() splits text into overlapping, roughly fixed-size chunks.
+- tokenize() is the single tokenizer shared by lexical search and embeddings.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+
+# MIME types (besides text/*) whose payload is plain text we can index.
+TEXT_MIME_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/x-yaml",
+    "application/yaml",
+    "application/csv",
+    "application/x-ndjson",
+    "application/javascript",
+}
+
+TEXT_EXTENSIONS = (
+    ".txt", ".md", ".markdown", ".rst", ".csv", ".tsv", ".json", ".jsonl",
+    ".xml", ".html", ".htm", ".yaml", ".yml", ".log", ".py",
+)
+
+
+def is_text_like(mime_type: Optional[str], filename: str) -> bool:
+    """
+    Return True if a document with this MIME type / filename can be indexed as text.
+    """
+    mime = (mime_type or "").lower().split(";")[0].strip()
+    if mime.startswith("text/") or mime in TEXT_MIME_TYPES:
+        return True
+    return filename.lower().endswith(TEXT_EXTENSIONS)
+
+
+def extract_text(data: bytes, mime_type: Optional[str], filename: str) -> Optional[str]:
+    """
+    Extract plain text from an uploaded document.
+
+    Returns None for formats we cannot read yet (PDF, images, office files...),
+    so callers can store the document without indexing it.
+    """
+    if not is_text_like(mime_type, filename):
+        return None
+
+    text = data.decode("utf-8", errors="replace")
+
+    mime = (mime_type or "").lower()
+    if "html" in mime or filename.lower().endswith((".html", ".htm")):
+        text = _TAG_RE.sub(" ", text)
+
+    return text
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """
+    Split text into chunks of about chunk_size characters.
+
+    Chunks break on whitespace, and consecutive chunks share roughly
+    `overlap` characters so that sentences cut at a boundary stay findable.
+    """
+    words = _WS_RE.sub(" ", text).strip().split(" ")
+    if not words or words == [""]:
+        return []
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(words):
+        length = 0
+        end = start
+        while end < len(words) and (length == 0 or length + len(words[end]) + 1 <= chunk_size):
+            length += len(words[end]) + 1
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+
+        # Step back far enough to keep `overlap` characters of context.
+        back = end
+        kept = 0
+        while back > start + 1 and kept < overlap:
+            back -= 1
+            kept += len(words[back]) + 1
+        start = back if back > start else end
+
+    return chunks
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokenizer used for both BM25 postings and hashed embeddings.
+    """
+    return _TOKEN_RE.findall(text.lower())
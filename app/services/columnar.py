@@ -0,0 +1,421 @@
+"""
+Columnar, memory-mappable copies of CSV datasets.
+
+- convert_csv() re-reads a profiled CSV once and writes one typed file per
+  column, using the profile's inferred types and row count to preallocate
+  them. Rows are written in row groups of DATASET_ROW_GROUP_SIZE, each
+  with per-column min / max / null-count statistics in manifest.json.
+- ColumnarDataset opens that directory and hands out zero-copy memmapped
+  column slices, so readers touch only the columns and row groups they need.
+
+Column storage by inferred type:
+- integer -> int64, float -> float64 (NaN for nulls), boolean -> bool,
+  datetime -> datetime64[us] (UTC, NaT for nulls)
+- string  -> int32 dictionary codes (-1 for nulls) plus a dictionary when
+  the profile's distinct estimate is small, otherwise UTF-8 bytes plus
+  int64 offsets
+- columns containing nulls also get a boolean validity file
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, cast
+
+import numpy as np
+
+from app.services.csv_profile import NULL_TOKENS, CSVProfile, open_csv_text
+
+FORMAT_VERSION = 1
+TRUE_TOKENS = frozenset({"true", "yes", "t", "y"})
+
+# String columns whose distinct estimate is at most this are dictionary-encoded.
+DICTIONARY_MAX_DISTINCT = 4096
+
+_NUMPY_DTYPES = {
+    "integer": np.int64,
+    "float": np.float64,
+    "boolean": np.bool_,
+    "datetime": np.dtype("datetime64[us]"),
+    "dict": np.int32,
+}
+
+
+def datetime_micros(value: str) -> int:
+    """
+    Microseconds since the epoch for an ISO 8601 string (naive values are UTC).
+    """
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    delta = parsed - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _json_scalar(value: Any) -> Any:
+    if isinstance(value, np.datetime64):
+        return str(np.datetime_as_string(value, unit="us"))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class _ColumnWriter:
+    """
+    Writes one column into preallocated memmaps, one row group at a time.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        index: int,
+        name: str,
+        kind: str,
+        rows: int,
+        has_nulls: bool,
+        dictionary: bool,
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.file = f"c{index}"
+        self.storage = "dict" if dictionary else ("utf8" if kind == "string" else kind)
+        self.directory = directory
+        self.has_nulls = has_nulls
+
+        self._values: Optional[np.memmap] = None
+        self._valid: Optional[np.memmap] = None
+        self._dictionary: Dict[str, int] = {}
+        self._blob: Optional[BinaryIO] = None
+        self._offsets: Optional[np.memmap] = None
+        self._blob_size = 0
+
+        if self.storage == "utf8":
+            self._offsets = np.lib.format.open_memmap(
+                directory / f"{self.file}.offsets.npy", mode="w+", dtype=np.int64, shape=(rows + 1,)
+            )
+            self._offsets[0] = 0
+            self._blob = (directory / f"{self.file}.data.bin").open("wb")
+        else:
+            self._values = np.lib.format.open_memmap(
+                directory / f"{self.file}.npy", mode="w+", dtype=_NUMPY_DTYPES[self.storage], shape=(rows,)
+            )
+        if has_nulls:
+            self._valid = np.lib.format.open_memmap(
+                directory / f"{self.file}.valid.npy", mode="w+", dtype=np.bool_, shape=(rows,)
+            )
+
+    def write(self, start: int, raw: Sequence[str]) -> Dict[str, Any]:
+        """
+        Write values for rows [start, start + len(raw)) and return their statistics.
+        """
+        n = len(raw)
+        stripped = [v.strip() for v in raw]
+        valid = np.fromiter((v.lower() not in NULL_TOKENS for v in stripped), dtype=np.bool_, count=n)
+        present = [v for v, ok in zip(stripped, valid) if ok]
+        end = start + n
+        if self._valid is not None:
+            self._valid[start:end] = valid
+
+        stats: Dict[str, Any] = {"null_count": int(n - len(present)), "min": None, "max": None}
+        if self.storage == "utf8":
+            # Both are opened in __init__ for utf8 columns.
+            offsets, blob = cast(np.ndarray, self._offsets), cast(BinaryIO, self._blob)
+            encoded = [v.encode("utf-8") if ok else b"" for v, ok in zip(stripped, valid)]
+            lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=n)
+            offsets[start + 1:end + 1] = self._blob_size + np.cumsum(lengths)
+            blob.write(b"".join(encoded))
+            self._blob_size += int(lengths.sum())
+            if present:
+                stats["min"], stats["max"] = min(present), max(present)
+            return stats
+
+        target = cast(np.ndarray, self._values)  # opened in __init__ for every other storage
+        if self.storage == "dict":
+            codes = np.full(n, -1, dtype=np.int32)
+            codes[valid] = [self._dictionary.setdefault(v, len(self._dictionary)) for v in present]
+            target[start:end] = codes
+            if present:
+                stats["min"], stats["max"] = min(present), max(present)
+            return stats
+
+        if self.storage == "integer":
+            block = np.zeros(n, dtype=np.int64)
+            block[valid] = np.asarray(present, dtype=np.int64)
+        elif self.storage == "float":
+            block = np.full(n, np.nan, dtype=np.float64)
+            block[valid] = np.asarray(present, dtype=np.float64)
+        elif self.storage == "boolean":
+            block = np.zeros(n, dtype=np.bool_)
+            block[valid] = [v.lower() in TRUE_TOKENS for v in present]
+        else:  # datetime
+            block = np.full(n, np.datetime64("NaT"), dtype="datetime64[us]")
+            block[valid] = np.asarray([datetime_micros(v) for v in present], dtype=np.int64).view(
+                "datetime64[us]"
+            )
+        target[start:end] = block
+
+        values = block[valid]
+        if self.storage == "float":
+            values = values[~np.isnan(values)]
+        if values.size:
+            stats["min"], stats["max"] = _json_scalar(values.min()), _json_scalar(values.max())
+        return stats
+
+    def close(self) -> Dict[str, Any]:
+        for array in (self._values, self._valid, self._offsets):
+            if array is not None:
+                array.flush()
+        if self._blob is not None:
+            self._blob.close()
+        if self.storage == "dict":
+            (self.directory / f"{self.file}.dict.json").write_text(
+                json.dumps(list(self._dictionary)), encoding="utf-8"
+            )
+        return {
+            "name": self.name,
+            "type": self.kind,
+            "storage": self.storage,
+            "file": self.file,
+            "has_nulls": self.has_nulls,
+        }
+
+
+def convert_csv(
+    stream: BinaryIO,
+    profile: CSVProfile,
+    directory: Path,
+    row_group_size: int = 65536,
+    types: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Write the columnar form of a profiled CSV into `directory` and return its manifest.
+
+    The stream is read once; memory use is bounded by one row group. The
+    directory is written under a temporary name and swapped in at the end.
+    `types` overrides the profile's column types (used for appended
+    segments, which are stored with the dataset-level types).
+    """
+    tmp = directory.with_name(directory.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    width = len(profile.columns)
+    writers = []
+    for i, column in enumerate(profile.columns):
+        kind = (types or {}).get(column.name, column.type)
+        kind = "string" if kind == "empty" else kind
+        dictionary = kind == "string" and column.distinct.estimate() <= DICTIONARY_MAX_DISTINCT
+        writers.append(
+            _ColumnWriter(tmp, i, column.name, kind, profile.row_count, column.null_count > 0, dictionary)
+        )
+
+    row_groups: List[Dict[str, Any]] = []
+
+    def flush(start: int, batch: List[List[str]]) -> None:
+        columns = list(zip(*batch))
+        row_groups.append(
+            {
+                "start": start,
+                "count": len(batch),
+                "stats": [writer.write(start, values) for writer, values in zip(writers, columns)],
+            }
+        )
+
+    text = open_csv_text(stream)
+    try:
+        reader = csv.reader(text, delimiter=profile.delimiter)
+        next(reader, None)  # header
+        written = 0
+        batch: List[List[str]] = []
+        for row in reader:
+            # Same row selection as profile_csv: blank and malformed rows are skipped.
+            if not row or len(row) != width:
+                continue
+            batch.append(row)
+            if len(batch) >= row_group_size:
+                flush(written, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            flush(written, batch)
+            written += len(batch)
+    finally:
+        text.detach()
+
+    if written != profile.row_count:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise ValueError(f"CSV changed while converting: expected {profile.row_count} rows, read {written}")
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "row_count": written,
+        "row_group_size": row_group_size,
+        "columns": [writer.close() for writer in writers],
+        "row_groups": row_groups,
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+
+    shutil.rmtree(directory, ignore_errors=True)
+    tmp.replace(directory)
+    return manifest
+
+
+@dataclass
+class RowGroup:
+    start: int
+    count: int
+    # column name -> {"min", "max", "null_count"}
+    stats: Dict[str, Dict[str, Any]]
+
+    @property
+    def stop(self) -> int:
+        return self.start + self.count
+
+
+class ColumnarDataset:
+    """
+    Read-only view over a converted dataset directory.
+
+    Arrays returned by column() / valid() are memory-mapped: slicing them
+    reads only the touched pages.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        manifest = json.loads((directory / "manifest.json").read_text(encoding="utf-8"))
+        self.row_count: int = manifest["row_count"]
+        self.columns: Dict[str, Dict[str, Any]] = {c["name"]: c for c in manifest["columns"]}
+        names = [c["name"] for c in manifest["columns"]]
+        self.row_groups = [
+            RowGroup(g["start"], g["count"], dict(zip(names, g["stats"]))) for g in manifest["row_groups"]
+        ]
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._dictionaries: Dict[str, np.ndarray] = {}
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def _load(self, filename: str) -> np.ndarray:
+        array = self._arrays.get(filename)
+        if array is None:
+            array = np.load(self.directory / filename, mmap_mode="r")
+            self._arrays[filename] = array
+        return array
+
+    def _meta(self, name: str) -> Dict[str, Any]:
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise KeyError(f"Unknown column {name!r}") from None
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        The stored array: typed values, dictionary codes, or (utf8) offsets.
+        """
+        meta = self._meta(name)
+        suffix = ".offsets.npy" if meta["storage"] == "utf8" else ".npy"
+        return self._load(meta["file"] + suffix)
+
+    def codes(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Dictionary codes (-1 for nulls) of a dict column for rows [start, stop).
+        """
+        stop = self.row_count if stop is None else stop
+        return self.column(name)[start:stop]
+
+    def codes_at(self, name: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Dictionary codes at arbitrary row positions.
+        """
+        return np.asarray(self.column(name)[np.asarray(rows, dtype=np.int64)])
+
+    def valid(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Boolean validity for rows [start, stop); all True for columns without nulls.
+        """
+        meta = self._meta(name)
+        stop = self.row_count if stop is None else stop
+        if not meta["has_nulls"]:
+            return np.ones(stop - start, dtype=bool)
+        return self._load(meta["file"] + ".valid.npy")[start:stop]
+
+    def dictionary(self, name: str) -> np.ndarray:
+        """
+        Distinct values of a dictionary-encoded string column, indexed by code.
+        """
+        values = self._dictionaries.get(name)
+        if values is None:
+            meta = self._meta(name)
+            path = self.directory / f"{meta['file']}.dict.json"
+            values = np.asarray(json.loads(path.read_text(encoding="utf-8")), dtype=object)
+            self._dictionaries[name] = values
+        return values
+
+    def values(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """
+        Decoded values for rows [start, stop): numeric / bool / datetime64
+        arrays (zero-copy) or object arrays of str (None for nulls).
+        """
+        meta = self._meta(name)
+        stop = self.row_count if stop is None else stop
+        if meta["storage"] == "dict":
+            codes = self.column(name)[start:stop]
+            decoded = np.empty(codes.size, dtype=object)
+            present = codes >= 0
+            decoded[present] = self.dictionary(name)[codes[present]]
+            return decoded
+        if meta["storage"] == "utf8":
+            offsets = np.asarray(self.column(name)[start:stop + 1])
+            with (self.directory / f"{meta['file']}.data.bin").open("rb") as f:
+                f.seek(int(offsets[0]))
+                blob = f.read(int(offsets[-1] - offsets[0]))
+            bounds = (offsets - offsets[0]).tolist()
+            valid = self.valid(name, start, stop)
+            decoded = np.empty(stop - start, dtype=object)
+            for i in range(stop - start):
+                if valid[i]:
+                    decoded[i] = blob[bounds[i]:bounds[i + 1]].decode("utf-8")
+            return decoded
+        return self.column(name)[start:stop]
+
+    def take(self, name: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Decoded values at arbitrary row positions (same types as values()).
+        """
+        meta = self._meta(name)
+        rows = np.asarray(rows, dtype=np.int64)
+        if meta["storage"] == "dict":
+            codes = np.asarray(self.column(name)[rows])
+            decoded = np.empty(codes.size, dtype=object)
+            present = codes >= 0
+            decoded[present] = self.dictionary(name)[codes[present]]
+            return decoded
+        if meta["storage"] == "utf8":
+            offsets = self.column(name)
+            starts = np.asarray(offsets[rows])
+            ends = np.asarray(offsets[rows + 1])
+            decoded = np.empty(rows.size, dtype=object)
+            if rows.size:
+                with (self.directory / f"{meta['file']}.data.bin").open("rb") as f:
+                    for i, (begin, end) in enumerate(zip(starts.tolist(), ends.tolist())):
+                        f.seek(begin)
+                        decoded[i] = f.read(end - begin).decode("utf-8")
+                if meta["has_nulls"]:
+                    decoded[~np.asarray(self._load(meta["file"] + ".valid.npy")[rows])] = None
+            return decoded
+        return np.asarray(self.column(name)[rows])
+
+    def valid_at(self, name: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Validity at arbitrary row positions.
+        """
+        meta = self._meta(name)
+        if not meta["has_nulls"]:
+            return np.ones(len(rows), dtype=bool)
+        return np.asarray(self._load(meta["file"] + ".valid.npy")[np.asarray(rows, dtype=np.int64)])
@@ -0,0 +1,378 @@
+"""
+Single-pass streaming CSV profiler.
+
+- profile_csv() reads a CSV from a binary stream in constant memory,
+  detects the delimiter, and computes per-column statistics: inferred
+  type, null count, min / max, mean, approximate distinct count
+  (HyperLogLog) and approximate quantiles (KLL sketch).
+- Rows are processed in batches, so numeric parsing and sketch updates
+  run vectorized over a column's values.
+- Files that cannot be profiled (not UTF-8, no header, duplicate column
+  names, too many rows with the wrong number of fields) raise
+  CSVProfileError so uploads can be rejected up front.
+- CSVProfile.state() keeps the mergeable sketches next to the summary, so
+  statistics can later be extended without rescanning the file:
+  CSVProfile.from_state(old).merge(profile_of_new_rows).
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.services.sketches import HyperLogLog, QuantileSketch
+
+# Values treated as missing (compared after stripping whitespace).
+NULL_TOKENS = frozenset({"", "na", "n/a", "nan", "null", "none", "-"})
+BOOLEAN_TOKENS = frozenset({"true", "false", "yes", "no", "t", "f", "y", "n"})
+CANDIDATE_DELIMITERS = ",;\t|"
+QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+_SNIFF_BYTES = 64 * 1024
+_BATCH_ROWS = 4096
+
+
+class CSVProfileError(ValueError):
+    """
+    The file cannot be read as a well-formed CSV.
+    """
+
+
+def _to_timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass
+class ColumnStats:
+    """
+    Running statistics for one column.
+
+    `kinds` holds the types every non-null value seen so far could still
+    be; the narrowest survivor is the inferred type.
+    """
+
+    name: str
+    kinds: Set[str] = field(default_factory=lambda: {"integer", "float", "boolean", "datetime"})
+    null_count: int = 0
+    count: int = 0
+    num_min: Optional[float] = None
+    num_max: Optional[float] = None
+    num_sum: float = 0.0
+    # (timestamp, original text)
+    dt_min: Optional[Tuple[float, str]] = None
+    dt_max: Optional[Tuple[float, str]] = None
+    str_min: Optional[str] = None
+    str_max: Optional[str] = None
+    distinct: HyperLogLog = field(default_factory=HyperLogLog)
+    quantiles: QuantileSketch = field(default_factory=lambda: QuantileSketch(seed=0))
+
+    @property
+    def type(self) -> str:
+        if not self.count:
+            return "empty"
+        for kind in ("integer", "float", "boolean", "datetime"):
+            if kind in self.kinds:
+                return kind
+        return "string"
+
+    def update(self, values: Sequence[str]) -> None:
+        present = [v.strip() for v in values]
+        present = [v for v in present if v.lower() not in NULL_TOKENS]
+        self.null_count += len(values) - len(present)
+        if not present:
+            return
+        self.count += len(present)
+
+        distinct = set(present)
+        self.distinct.update(distinct)
+        low, high = min(distinct), max(distinct)
+        self.str_min = low if self.str_min is None else min(self.str_min, low)
+        self.str_max = high if self.str_max is None else max(self.str_max, high)
+
+        if self.kinds & {"integer", "float"} and self._update_numeric(present):
+            # A numeric column is never reported as boolean or datetime.
+            self.kinds -= {"boolean", "datetime"}
+            return
+        self.kinds -= {"integer", "float"}
+
+        if "boolean" in self.kinds and not all(v.lower() in BOOLEAN_TOKENS for v in distinct):
+            self.kinds.discard("boolean")
+        if "datetime" in self.kinds:
+            self._update_datetime(distinct)
+
+    def _update_numeric(self, present: List[str]) -> bool:
+        array = None
+        if "integer" in self.kinds:
+            try:
+                array = np.asarray(present, dtype=np.int64).astype(np.float64)
+            except (ValueError, OverflowError):
+                self.kinds.discard("integer")
+        if array is None:
+            try:
+                array = np.asarray(present, dtype=np.float64)
+            except ValueError:
+                return False
+
+        finite = array[np.isfinite(array)]
+        if finite.size:
+            low, high = float(finite.min()), float(finite.max())
+            self.num_min = low if self.num_min is None else min(self.num_min, low)
+            self.num_max = high if self.num_max is None else max(self.num_max, high)
+            self.num_sum += float(finite.sum())
+            self.quantiles.update(finite.tolist())
+        return True
+
+    def _update_datetime(self, distinct: Set[str]) -> None:
+        parsed = []
+        for value in distinct:
+            try:
+                parsed.append((_to_timestamp(datetime.fromisoformat(value)), value))
+            except ValueError:
+                self.kinds.discard("datetime")
+                return
+        low, high = min(parsed), max(parsed)
+        self.dt_min = low if self.dt_min is None else min(self.dt_min, low)
+        self.dt_max = high if self.dt_max is None else max(self.dt_max, high)
+
+    def summary(self) -> Dict[str, Any]:
+        kind = self.type
+        result: Dict[str, Any] = {
+            "name": self.name,
+            "type": kind,
+            "null_count": self.null_count,
+            "non_null_count": self.count,
+            "distinct_estimate": min(self.distinct.estimate(), self.count),
+            "min": None,
+            "max": None,
+            "mean": None,
+            "quantiles": None,
+        }
+        if kind in ("integer", "float"):
+            cast = int if kind == "integer" else float
+            if self.num_min is not None and self.num_max is not None:
+                result["min"], result["max"] = cast(self.num_min), cast(self.num_max)
+                result["mean"] = self.num_sum / self.quantiles.count
+                values = self.quantiles.quantiles(QUANTILES)
+                result["quantiles"] = {f"p{round(q * 100):02d}": v for q, v in zip(QUANTILES, values)}
+        elif kind == "datetime" and self.dt_min is not None and self.dt_max is not None:
+            result["min"], result["max"] = self.dt_min[1], self.dt_max[1]
+        elif kind in ("string", "boolean"):
+            result["min"], result["max"] = self.str_min, self.str_max
+        return result
+
+    def merge(self, other: "ColumnStats") -> None:
+        """
+        Fold in the statistics of the same column over other rows.
+        """
+        self.kinds &= other.kinds
+        self.null_count += other.null_count
+        self.count += other.count
+        self.num_sum += other.num_sum
+        for attr, pick in (
+            ("num_min", min), ("num_max", max),
+            ("dt_min", min), ("dt_max", max),
+            ("str_min", min), ("str_max", max),
+        ):
+            mine, theirs = getattr(self, attr), getattr(other, attr)
+            if theirs is not None:
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+        self.distinct.merge(other.distinct)
+        self.quantiles.merge(other.quantiles)
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ColumnStats":
+        return cls(
+            name=state["name"],
+            kinds=set(state["kinds"]),
+            null_count=state["null_count"],
+            count=state["count"],
+            num_min=state["num_min"],
+            num_max=state["num_max"],
+            num_sum=state["num_sum"],
+            dt_min=tuple(state["dt_min"]) if state["dt_min"] else None,
+            dt_max=tuple(state["dt_max"]) if state["dt_max"] else None,
+            str_min=state["str_min"],
+            str_max=state["str_max"],
+            distinct=HyperLogLog.from_state(state["distinct"]),
+            quantiles=QuantileSketch.from_state(state["quantiles"]),
+        )
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kinds": sorted(self.kinds),
+            "null_count": self.null_count,
+            "count": self.count,
+            "num_min": self.num_min,
+            "num_max": self.num_max,
+            "num_sum": self.num_sum,
+            "dt_min": self.dt_min,
+            "dt_max": self.dt_max,
+            "str_min": self.str_min,
+            "str_max": self.str_max,
+            "distinct": self.distinct.to_state(),
+            "quantiles": self.quantiles.to_state(),
+        }
+
+
+@dataclass
+class CSVProfile:
+    """
+    Profile of a whole CSV file.
+    """
+
+    delimiter: str
+    columns: List[ColumnStats]
+    row_count: int = 0
+    malformed_rows: int = 0
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        JSON-ready profile served to clients.
+        """
+        return {
+            "delimiter": self.delimiter,
+            "row_count": self.row_count,
+            "malformed_rows": self.malformed_rows,
+            "columns": [c.summary() for c in self.columns],
+        }
+
+    def merge(self, other: "CSVProfile") -> None:
+        """
+        Extend this profile with the profile of more rows of the same columns.
+        """
+        if other.column_names != self.column_names:
+            raise CSVProfileError("Cannot merge profiles with different columns.")
+        self.row_count += other.row_count
+        self.malformed_rows += other.malformed_rows
+        for mine, theirs in zip(self.columns, other.columns):
+            mine.merge(theirs)
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "CSVProfile":
+        return cls(
+            delimiter=state["delimiter"],
+            columns=[ColumnStats.from_state(c) for c in state["columns"]],
+            row_count=state["row_count"],
+            malformed_rows=state["malformed_rows"],
+        )
+
+    def state(self) -> Dict[str, Any]:
+        """
+        JSON-ready summary plus the mergeable sketch state of every column.
+        """
+        return {
+            "delimiter": self.delimiter,
+            "row_count": self.row_count,
+            "malformed_rows": self.malformed_rows,
+            "columns": [c.state() for c in self.columns],
+        }
+
+
+def detect_delimiter(sample: str) -> str:
+    """
+    Guess the delimiter from the start of the file, defaulting to a comma.
+    """
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CANDIDATE_DELIMITERS).delimiter
+    except csv.Error:
+        return ","
+
+
+def _header_names(header: Sequence[str]) -> List[str]:
+    names = [name.strip() or f"column_{i + 1}" for i, name in enumerate(header)]
+    seen = set()
+    for name in names:
+        if name in seen:
+            raise CSVProfileError(f"Duplicate column name {name!r} in CSV header.")
+        seen.add(name)
+    return names
+
+
+def open_csv_text(stream: BinaryIO) -> io.TextIOWrapper:
+    """
+    Wrap a binary stream for the csv module (UTF-8, optional BOM).
+    """
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def sniff_delimiter(stream: BinaryIO) -> str:
+    """
+    Detect the delimiter from the first bytes of a seekable stream, then rewind it.
+    """
+    head = stream.read(_SNIFF_BYTES)
+    stream.seek(0)
+    sample = head.decode("utf-8", errors="ignore")
+    if len(head) == _SNIFF_BYTES and "\n" in sample:
+        # Drop the (probably truncated) last line.
+        sample = sample[: sample.rfind("\n")]
+    return detect_delimiter(sample)
+
+
+def profile_csv(stream: BinaryIO, max_malformed_fraction: float = 0.01) -> CSVProfile:
+    """
+    Profile a CSV from a seekable binary stream in one pass.
+
+    Rows whose field count differs from the header are counted as
+    malformed and left out of the statistics; more than
+    `max_malformed_fraction` of them (usually a wrong delimiter or broken
+    quoting) raises CSVProfileError.
+    """
+    delimiter = sniff_delimiter(stream)
+    text = open_csv_text(stream)
+    try:
+        reader = csv.reader(text, delimiter=delimiter)
+        try:
+            header = next(reader)
+        except StopIteration:
+            raise CSVProfileError("CSV file is empty.") from None
+
+        names = _header_names(header)
+        profile = CSVProfile(delimiter=delimiter, columns=[ColumnStats(name) for name in names])
+        width = len(names)
+
+        batch: List[List[str]] = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                profile.malformed_rows += 1
+                continue
+            batch.append(row)
+            if len(batch) >= _BATCH_ROWS:
+                _update_batch(profile, batch)
+                batch = []
+        if batch:
+            _update_batch(profile, batch)
+    except UnicodeDecodeError as exc:
+        raise CSVProfileError("CSV file is not valid UTF-8 text.") from exc
+    except csv.Error as exc:
+        raise CSVProfileError(f"Malformed CSV: {exc}") from exc
+    finally:
+        # Do not close the caller's stream along with the wrapper.
+        text.detach()
+
+    total = profile.row_count + profile.malformed_rows
+    if total and profile.malformed_rows > max_malformed_fraction * total:
+        raise CSVProfileError(
+            f"{profile.malformed_rows} of {total} rows do not have {width} fields "
+            f"(detected delimiter {delimiter!r})."
+        )
+    return profile
+
+
+def _update_batch(profile: CSVProfile, batch: List[List[str]]) -> None:
+    profile.row_count += len(batch)
+    for column, values in zip(profile.columns, zip(*batch)):
+        column.update(values)
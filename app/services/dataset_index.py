@@ -0,0 +1,340 @@
+"""
+Row-level semantic index over the text columns of a dataset.
+
+- iter_row_offsets() walks a CSV file once and yields every data row with
+  the byte offset where it starts, using the same row selection as the
+  profiler (blank and malformed rows are skipped).
+- DatasetRowIndex holds one vector per row (the marked text columns,
+  joined) in a VectorStore, plus the row's global row number, segment and
+  byte offset, so a hit is read back with one seek (read_row_at()).
+- sync_index() streams the segments that are not indexed yet through the
+  embedder in fixed-size batches; memory use is bounded by one batch. It
+  runs under edit_dataset_index(), which holds a cross-process file lock
+  from reloading the latest generation to saving the next one.
+- Indexes live under {INDEX_ROOT}/datasets/{dataset_id}/ as a full
+  snapshot plus append-only deltas (the rows of the segments indexed by
+  each save; see generational_index.py). They are loaded lazily by
+  get_dataset_index(); a worker catches up when another worker has
+  written a newer generation to disk.
+"""
+
+from __future__ import annotations
+
+import csv
+from contextlib import AbstractContextManager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.csv_profile import sniff_delimiter
+from app.services.dataset_rows import RowSource
+from app.services.embeddings import HashingEmbedder
+from app.services.generational_index import GenerationalIndex, IndexRegistry
+from app.services.vector_store import VectorStore
+
+_ROW_DTYPE = np.dtype([("row", np.int64), ("segment", np.int32), ("offset", np.int64)])
+
+
+class _OffsetLines:
+    """
+    Decoded lines of a binary stream; `offset` is the byte offset of the next line.
+    """
+
+    def __init__(self, stream: BinaryIO, offset: int = 0) -> None:
+        self.stream = stream
+        self.offset = offset
+
+    def __iter__(self) -> "_OffsetLines":
+        return self
+
+    def __next__(self) -> str:
+        line = self.stream.readline()
+        if not line:
+            raise StopIteration
+        start = self.offset
+        self.offset += len(line)
+        return line.decode("utf-8-sig" if start == 0 else "utf-8")
+
+
+def iter_row_offsets(stream: BinaryIO, delimiter: str) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Yield (byte offset, fields) for each data row of a CSV file, in order.
+
+    The first yielded item is the header with offset -1.
+    """
+    lines = _OffsetLines(stream)
+    # csv.reader pulls exactly the lines of one record per call, so the
+    # offset before the call is where the record starts.
+    reader = csv.reader(lines, delimiter=delimiter)
+    header = next(reader, None) or []
+    yield -1, header
+    while True:
+        offset = lines.offset
+        row = next(reader, None)
+        if row is None:
+            return
+        if row and len(row) == len(header):
+            yield offset, row
+
+
+def read_row_at(stream: BinaryIO, offset: int, delimiter: str) -> List[str]:
+    """
+    Parse the single CSV record starting at `offset`.
+    """
+    stream.seek(offset)
+    return next(csv.reader(_OffsetLines(stream, offset), delimiter=delimiter), [])
+
+
+def row_text(row: Sequence[str], positions: Sequence[int]) -> str:
+    """
+    Text embedded for a row: its non-empty indexed fields, joined.
+    """
+    return "\n".join(value for value in (row[i].strip() for i in positions) if value)
+
+
+class DatasetRowIndex(GenerationalIndex):
+    """
+    Vector index over the rows of one dataset.
+
+    Rows are added segment by segment in order, so `row_count` (the rows
+    covered so far) is also the first row number of the next segment, and
+    a version is searched by restricting hits to row numbers below its
+    row count.
+    """
+
+    def __init__(
+        self,
+        dataset_id: str,
+        directory: Path,
+        dim: int,
+        quantization: str = "float32",
+        rerank_factor: int = 10,
+    ) -> None:
+        super().__init__(directory, dim, quantization=quantization, rerank_factor=rerank_factor)
+        self.dataset_id = dataset_id
+        self.label = f"Row index of dataset {dataset_id}"
+        self.columns: List[str] = []
+        self.segments: List[int] = []
+        self.row_count = 0
+        self._rows = np.zeros(0, dtype=_ROW_DTYPE)
+        # Segments on disk; reset() forces a snapshot (_full_save_due).
+        self._saved_segments = 0
+
+    # --- Mutation ---
+
+    def reset(self, columns: Sequence[str]) -> None:
+        """
+        Drop every row and start over with another set of indexed columns.
+        """
+        with self.lock:
+            self.columns = list(columns)
+            self.segments = []
+            self.row_count = 0
+            self.vectors = VectorStore(self.dim, quantization=self.quantization, rerank_factor=self.rerank_factor)
+            self._rows = np.zeros(0, dtype=_ROW_DTYPE)
+            self._saved_rows = 0
+            self._full_save_due = True
+
+    def add(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        """
+        Append vectors with their (row, segment, offset) records.
+        """
+        with self.lock:
+            ids = self.vectors.add(vectors)
+            if ids.size:
+                end = int(ids[-1]) + 1
+                if end > self._rows.shape[0]:
+                    grown = np.zeros(max(end, self._rows.shape[0] * 2, 64), dtype=_ROW_DTYPE)
+                    grown[: ids[0]] = self._rows[: ids[0]]
+                    self._rows = grown
+                self._rows[ids] = rows
+
+    def index_segment(
+        self,
+        sequence: int,
+        source: RowSource,
+        embedder: HashingEmbedder,
+        batch_size: int = 256,
+    ) -> int:
+        """
+        Embed the indexed columns of one segment's rows, in batches, and
+        return the number of data rows it has.
+        """
+        with self.lock, source.open() as stream:
+            first_row = self.row_count
+            rows = iter_row_offsets(stream, source.delimiter or sniff_delimiter(stream))
+            _, header = next(rows)
+            positions = [header.index(name) for name in self.columns]
+
+            count = 0
+            texts: List[str] = []
+            records: List[Tuple[int, int, int]] = []
+            for offset, row in rows:
+                text = row_text(row, positions)
+                if text:
+                    texts.append(text)
+                    records.append((first_row + count, sequence, offset))
+                count += 1
+                if len(texts) >= batch_size:
+                    self.add(embedder.embed(texts), np.array(records, dtype=_ROW_DTYPE))
+                    texts, records = [], []
+            if texts:
+                self.add(embedder.embed(texts), np.array(records, dtype=_ROW_DTYPE))
+
+            self.segments.append(sequence)
+            self.row_count += count
+            return count
+
+    # --- Querying ---
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        max_row: Optional[int] = None,
+    ) -> List[Tuple[int, int, int, float]]:
+        """
+        Return (row number, segment, offset, score) of the k best rows,
+        optionally only among row numbers below `max_row`.
+        """
+        with self.lock:
+            allowed = None
+            if max_row is not None and max_row < self.row_count:
+                allowed = self._rows["row"][: len(self.vectors)] < max_row
+            ids, scores = self.vectors.search(query, k, allowed=allowed)
+            found = self._rows[ids]
+            return [
+                (int(r["row"]), int(r["segment"]), int(r["offset"]), float(score))
+                for r, score in zip(found, scores)
+            ]
+
+    # --- Persistence ---
+
+    def has_changes(self) -> bool:
+        """
+        True if columns or segments changed since the last save or load.
+        """
+        return self._full_save_due or len(self.segments) != self._saved_segments
+
+    def _manifest_fields(self) -> Dict[str, Any]:
+        return {
+            "dataset_id": self.dataset_id,
+            "columns": self.columns,
+            "segments": self.segments,
+            "row_count": self.row_count,
+        }
+
+    def _adopt(self, manifest: Dict[str, Any]) -> None:
+        super()._adopt(manifest)
+        self.columns = list(manifest["columns"])
+        self.segments = list(manifest["segments"])
+        self.row_count = manifest["row_count"]
+        self._saved_segments = len(self.segments)
+
+    def _write_snapshot(self, gen_dir: Path) -> None:
+        self.vectors.save(gen_dir)
+        np.save(gen_dir / "rows.npy", self._rows[: len(self.vectors)])
+
+    def _read_snapshot(self, gen_dir: Path, manifest: Dict[str, Any]) -> None:
+        self.vectors = VectorStore.load(
+            gen_dir, self.dim, quantization=self.quantization, rerank_factor=self.rerank_factor
+        )
+        self._rows = np.load(gen_dir / "rows.npy")
+
+    def _write_delta(self, delta_dir: Path) -> None:
+        self.vectors.save_delta(delta_dir, self._saved_rows)
+        np.save(delta_dir / "rows.npy", self._rows[self._saved_rows: len(self.vectors)])
+
+    def _apply_delta(self, delta_dir: Path) -> None:
+        self.add(
+            np.load(delta_dir / "vectors.npy"),
+            np.load(delta_dir / "rows.npy"),
+        )
+
+    def _empty_copy(self) -> "DatasetRowIndex":
+        return DatasetRowIndex(
+            self.dataset_id,
+            self.directory,
+            self.dim,
+            quantization=self.quantization,
+            rerank_factor=self.rerank_factor,
+        )
+
+    @classmethod
+    def load(
+        cls,
+        dataset_id: str,
+        directory: Path,
+        dim: int,
+        quantization: str = "float32",
+        rerank_factor: int = 10,
+    ) -> "DatasetRowIndex":
+        index = cls(dataset_id, directory, dim, quantization=quantization, rerank_factor=rerank_factor)
+        index._read()
+        return index
+
+
+def sync_index(
+    dataset_id: UUID | str,
+    columns: Sequence[str],
+    segments: Sequence[Tuple[int, RowSource]],
+    embedder: HashingEmbedder,
+    batch_size: int = 256,
+) -> Tuple[int, int]:
+    """
+    Bring a dataset's row index up to date with `segments` ((sequence,
+    source) in row order) and save it if anything changed. Only segments
+    not indexed yet are read; the index is rebuilt when the columns changed
+    or its segments and `segments` disagree on their common prefix. Returns
+    (rows read, rows covered).
+
+    Runs under the index's write lock, so a second worker syncing the same
+    dataset waits and then finds nothing left to do; a late sync of an
+    older version leaves an index that already covers more untouched.
+    """
+    sequences = [sequence for sequence, _ in segments]
+    with edit_dataset_index(dataset_id) as index:
+        common = min(len(index.segments), len(sequences))
+        if index.columns != list(columns) or index.segments[:common] != sequences[:common]:
+            index.reset(columns)
+        read = 0
+        # A failure part-way drops this copy (edit_dataset_index()), so a
+        # partly indexed segment never shifts row numbers on disk.
+        for sequence, source in segments[len(index.segments):]:
+            read += index.index_segment(sequence, source, embedder, batch_size)
+        return read, index.row_count
+
+
+def _load(key: str, directory: Path) -> DatasetRowIndex:
+    settings = get_settings()
+    return DatasetRowIndex.load(
+        key,
+        directory,
+        settings.EMBEDDING_DIM,
+        quantization=settings.VECTOR_QUANTIZATION,
+        rerank_factor=settings.VECTOR_RERANK_FACTOR,
+    )
+
+
+_registry: IndexRegistry[DatasetRowIndex] = IndexRegistry("datasets", _load)
+
+
+def get_dataset_index(dataset_id: UUID | str) -> DatasetRowIndex:
+    """
+    Return the row index of a dataset, loading it from disk on first use
+    and catching up if another worker has saved a newer generation.
+    """
+    return _registry.get(str(dataset_id))
+
+
+def edit_dataset_index(dataset_id: UUID | str) -> AbstractContextManager[DatasetRowIndex]:
+    """
+    Yield a dataset's row index for changes while holding its
+    cross-process write lock. The index is first brought up to the latest
+    generation on disk and, if anything changed, saved on exit; if the
+    block or the save fails, this worker's copy is dropped instead.
+    """
+    return _registry.edit(str(dataset_id))
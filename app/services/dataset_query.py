@@ -0,0 +1,534 @@
+"""
+Vectorized queries over a dataset's columnar copy.
+
+- Query describes projection, AND-ed predicates, group-by with
+  count / sum / mean / min / max, ordering and a limit.
+- QueryPlan validates a Query against a ColumnarDataset, then executes it
+  row group by row group: groups whose min / max / null-count statistics
+  rule out a predicate are skipped without being read, and predicates are
+  evaluated as NumPy masks over memory-mapped column slices.
+- Dictionary-encoded string columns are filtered by evaluating the
+  predicate once per distinct value and indexing the result with the codes.
+- rows() yields output rows in batches, so plain filter / projection
+  queries stream without materializing the result.
+"""
+
+from __future__ import annotations
+
+import operator
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.columnar import ColumnarDataset, RowGroup, datetime_micros
+
+_COMPARISONS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+_NUMERIC = ("integer", "float", "boolean")
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+
+class QueryError(ValueError):
+    """
+    The query does not fit the dataset (unknown column, wrong value type, ...).
+    """
+
+
+@dataclass
+class Predicate:
+    column: str
+    op: str
+    value: Any = None
+
+
+@dataclass
+class Aggregate:
+    fn: str
+    column: Optional[str] = None
+    alias: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        if self.alias:
+            return self.alias
+        return f"{self.fn}_{self.column}" if self.column else self.fn
+
+
+@dataclass
+class Order:
+    column: str
+    desc: bool = False
+
+
+@dataclass
+class Query:
+    select: Optional[List[str]] = None
+    where: List[Predicate] = field(default_factory=list)
+    group_by: List[str] = field(default_factory=list)
+    aggregates: List[Aggregate] = field(default_factory=list)
+    order_by: List[Order] = field(default_factory=list)
+    limit: Optional[int] = None
+
+
+@dataclass
+class QueryStats:
+    row_groups_total: int = 0
+    row_groups_scanned: int = 0
+    rows_scanned: int = 0
+    rows_matched: int = 0
+
+
+def to_python(values: np.ndarray, valid: Optional[np.ndarray] = None) -> List[Any]:
+    """
+    Convert an array of column values to JSON-ready Python values (None for nulls).
+    """
+    if values.dtype.kind == "M":
+        out = np.datetime_as_string(values).astype(object)
+        out[np.isnat(values)] = None
+    elif values.dtype.kind == "f":
+        out = values.astype(object)
+        out[np.isnan(values)] = None
+    else:
+        out = values.astype(object)
+    if valid is not None:
+        out[~valid] = None
+    return out.tolist()
+
+
+def _python_scalar(value: Any) -> Any:
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else str(np.datetime_as_string(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def _not_none(values: np.ndarray) -> np.ndarray:
+    # Elementwise "is not None" of an object array.
+    return values != None  # noqa: E711
+
+
+def _exact_sums(values: np.ndarray, gid: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Per-group sums of int64 values, exact at any magnitude.
+
+    float64 weights lose precision above 2**53 and int64 accumulators wrap
+    silently, so int64 is used only when no sum can leave its range;
+    otherwise the values are summed as Python ints.
+    """
+    if values.size and max(-int(values.min()), int(values.max())) * values.size > _INT64_MAX:
+        sums = np.zeros(n_groups, dtype=object)
+        np.add.at(sums, gid, values.astype(object))
+        return sums
+    sums = np.zeros(n_groups, dtype=np.int64)
+    np.add.at(sums, gid, values)
+    return sums
+
+
+def _ranks(values: np.ndarray, valid: np.ndarray, desc: bool) -> np.ndarray:
+    """
+    Integer sort keys for any comparable values; nulls always sort last.
+    """
+    ranks = np.empty(values.size, dtype=np.int64)
+    if valid.any():
+        uniques, inverse = np.unique(values[valid], return_inverse=True)
+        ranks[valid] = (uniques.size - 1 - inverse) if desc else inverse
+        ranks[~valid] = uniques.size
+    else:
+        ranks[:] = 0
+    return ranks
+
+
+class QueryPlan:
+    """
+    A validated query bound to one dataset.
+    """
+
+    def __init__(self, dataset: ColumnarDataset, query: Query) -> None:
+        self.dataset = dataset
+        self.query = query
+        self.stats = QueryStats(row_groups_total=len(dataset.row_groups))
+        self._literals = [self._coerce_predicate(p) for p in query.where]
+
+        self.grouped = bool(query.group_by or query.aggregates)
+        if self.grouped:
+            if query.select:
+                raise QueryError("select cannot be combined with group_by / aggregates.")
+            for name in query.group_by:
+                self._meta(name)
+            for agg in query.aggregates:
+                self._check_aggregate(agg)
+            self.columns = list(query.group_by) + [agg.name for agg in query.aggregates]
+            if len(set(self.columns)) != len(self.columns):
+                raise QueryError("Output column names must be unique (use 'as' to rename aggregates).")
+        else:
+            self.columns = list(query.select) if query.select else dataset.column_names
+            for name in self.columns:
+                self._meta(name)
+
+        for order in query.order_by:
+            if order.column not in self.columns:
+                raise QueryError(f"Cannot order by {order.column!r}: not an output column.")
+
+    # --- Validation ---
+
+    def _meta(self, name: str) -> Dict[str, Any]:
+        meta = self.dataset.columns.get(name)
+        if meta is None:
+            raise QueryError(f"Unknown column {name!r}.")
+        return meta
+
+    def _coerce(self, meta: Dict[str, Any], value: Any) -> Any:
+        kind = meta["type"]
+        if kind in ("integer", "float"):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise QueryError(f"Column {meta['name']!r} is numeric; got {value!r}.")
+            return value
+        if kind == "boolean":
+            if not isinstance(value, bool):
+                raise QueryError(f"Column {meta['name']!r} is boolean; got {value!r}.")
+            return value
+        if kind == "datetime":
+            try:
+                return np.datetime64(datetime_micros(str(value)), "us")
+            except ValueError:
+                raise QueryError(f"Column {meta['name']!r} is a datetime; got {value!r}.") from None
+        if not isinstance(value, str):
+            raise QueryError(f"Column {meta['name']!r} is a string; got {value!r}.")
+        return value
+
+    def _coerce_predicate(self, predicate: Predicate) -> Any:
+        meta = self._meta(predicate.column)
+        if predicate.op in ("is_null", "not_null"):
+            return None
+        if predicate.op in ("in", "not_in"):
+            if not isinstance(predicate.value, list):
+                raise QueryError(f"Operator {predicate.op!r} needs a list value.")
+            return [self._coerce(meta, v) for v in predicate.value]
+        if predicate.value is None:
+            raise QueryError(f"Operator {predicate.op!r} needs a value (use is_null / not_null for nulls).")
+        return self._coerce(meta, predicate.value)
+
+    def _check_aggregate(self, agg: Aggregate) -> None:
+        if agg.column is None:
+            if agg.fn != "count":
+                raise QueryError(f"Aggregate {agg.fn!r} needs a column.")
+            return
+        kind = self._meta(agg.column)["type"]
+        if agg.fn in ("sum", "mean") and kind not in _NUMERIC:
+            raise QueryError(f"Cannot {agg.fn} column {agg.column!r} of type {kind}.")
+
+    # --- Row-group pruning ---
+
+    def _stat_value(self, meta: Dict[str, Any], value: Any) -> Any:
+        return np.datetime64(value, "us") if meta["type"] == "datetime" else value
+
+    def _may_match(self, group: RowGroup, predicate: Predicate, literal: Any) -> bool:
+        stats = group.stats[predicate.column]
+        if predicate.op == "is_null":
+            return stats["null_count"] > 0
+        if predicate.op == "not_null":
+            return stats["null_count"] < group.count
+        if stats["min"] is None:
+            # Only nulls in this group, and comparisons never match nulls.
+            return False
+        meta = self.dataset.columns[predicate.column]
+        low, high = self._stat_value(meta, stats["min"]), self._stat_value(meta, stats["max"])
+        op = predicate.op
+        if op == "=":
+            return bool(low <= literal <= high)
+        if op == "!=":
+            return not (low == high == literal)
+        if op == "<":
+            return bool(low < literal)
+        if op == "<=":
+            return bool(low <= literal)
+        if op == ">":
+            return bool(high > literal)
+        if op == ">=":
+            return bool(high >= literal)
+        if op == "in":
+            return any(low <= v <= high for v in literal)
+        return not (low == high and low in literal)  # not_in
+
+    # --- Evaluation ---
+
+    @staticmethod
+    def _compare(values: np.ndarray, op: str, literal: Any) -> np.ndarray:
+        if op in ("in", "not_in"):
+            candidates = np.asarray(literal, dtype=object if values.dtype == object else None)
+            found = np.isin(values, candidates)
+            return found if op == "in" else ~found
+        return np.asarray(_COMPARISONS[op](values, literal), dtype=bool)
+
+    def _mask(self, group: RowGroup, predicate: Predicate, literal: Any) -> np.ndarray:
+        name = predicate.column
+        valid = self.dataset.valid(name, group.start, group.stop)
+        if predicate.op == "is_null":
+            return ~valid
+        if predicate.op == "not_null":
+            return valid.copy()
+
+        storage = self.dataset.columns[name]["storage"]
+        if storage == "dict":
+            dictionary = self.dataset.dictionary(name)
+            if dictionary.size == 0:
+                return np.zeros(group.count, dtype=bool)
+            matches = self._compare(dictionary, predicate.op, literal)
+            codes = self.dataset.codes(name, group.start, group.stop)
+            return valid & matches[codes]
+        values = self.dataset.values(name, group.start, group.stop)
+        if storage == "utf8":
+            values = np.where(valid, values, "")
+        return valid & self._compare(values, predicate.op, literal)
+
+    def _matches(self) -> Iterator[Tuple[RowGroup, np.ndarray]]:
+        """
+        Yield (row group, local indices of matching rows) for non-empty matches.
+        """
+        for group in self.dataset.row_groups:
+            if not all(self._may_match(group, p, v) for p, v in zip(self.query.where, self._literals)):
+                continue
+            self.stats.row_groups_scanned += 1
+            self.stats.rows_scanned += group.count
+            mask = np.ones(group.count, dtype=bool)
+            for predicate, literal in zip(self.query.where, self._literals):
+                mask &= self._mask(group, predicate, literal)
+                if not mask.any():
+                    break
+            local = np.flatnonzero(mask)
+            self.stats.rows_matched += local.size
+            if local.size:
+                yield group, local
+
+    def _take(self, name: str, rows: np.ndarray) -> List[Any]:
+        values = self.dataset.take(name, rows)
+        valid = None
+        if self.dataset.columns[name]["has_nulls"] and values.dtype != object:
+            valid = self.dataset.valid_at(name, rows)
+        return to_python(values, valid)
+
+    def rows(self, batch_rows: int = 1000) -> Iterator[List[List[Any]]]:
+        """
+        Yield the result as batches of rows (lists of JSON-ready values).
+        """
+        if self.grouped:
+            yield from self._batched(self._grouped_rows(), batch_rows)
+        elif self.query.order_by:
+            yield from self._ordered_rows(batch_rows)
+        else:
+            yield from self._scan_rows()
+
+    @staticmethod
+    def _batched(rows: List[List[Any]], batch_rows: int) -> Iterator[List[List[Any]]]:
+        for start in range(0, len(rows), batch_rows):
+            yield rows[start:start + batch_rows]
+
+    def _scan_rows(self) -> Iterator[List[List[Any]]]:
+        remaining = self.query.limit
+        if remaining == 0:
+            return
+        for group, local in self._matches():
+            if remaining is not None:
+                local = local[:remaining]
+            rows = group.start + local
+            columns = [self._take(name, rows) for name in self.columns]
+            yield [list(row) for row in zip(*columns)]
+            if remaining is not None:
+                remaining -= local.size
+                if remaining <= 0:
+                    return
+
+    def _ordered_rows(self, batch_rows: int) -> Iterator[List[List[Any]]]:
+        positions: List[np.ndarray] = []
+        keys: Dict[str, List[np.ndarray]] = {o.column: [] for o in self.query.order_by}
+        valids: Dict[str, List[np.ndarray]] = {o.column: [] for o in self.query.order_by}
+        for group, local in self._matches():
+            rows = group.start + local
+            positions.append(rows)
+            for name in keys:
+                keys[name].append(self.dataset.take(name, rows))
+                valids[name].append(self.dataset.valid_at(name, rows))
+        if not positions:
+            return
+
+        rows = np.concatenate(positions)
+        sort_keys = []
+        for order in self.query.order_by:
+            values = np.concatenate(keys[order.column])
+            valid = np.concatenate(valids[order.column])
+            if values.dtype == object:
+                valid &= _not_none(values)
+            sort_keys.append(_ranks(values, valid, order.desc))
+        # lexsort treats the last key as primary; stable, so ties keep file order.
+        order_index = np.lexsort(sort_keys[::-1])
+        if self.query.limit is not None:
+            order_index = order_index[: self.query.limit]
+        rows = rows[order_index]
+
+        for start in range(0, rows.size, batch_rows):
+            chunk = rows[start:start + batch_rows]
+            columns = [self._take(name, chunk) for name in self.columns]
+            yield [list(row) for row in zip(*columns)]
+
+    # --- Group-by ---
+
+    def _key_codes(self, name: str, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Integer codes (-1 for null) for a group-by column, plus the values they decode to.
+        """
+        if self.dataset.columns[name]["storage"] == "dict":
+            return self.dataset.codes_at(name, rows), self.dataset.dictionary(name)
+        values = self.dataset.take(name, rows)
+        valid = self.dataset.valid_at(name, rows)
+        if values.dtype == object:
+            valid &= _not_none(values)
+        elif values.dtype.kind == "f":
+            valid &= ~np.isnan(values)
+        codes = np.full(rows.size, -1, dtype=np.int64)
+        uniques = values[:0]
+        if valid.any():
+            uniques, inverse = np.unique(values[valid], return_inverse=True)
+            codes[valid] = inverse
+        return codes, uniques
+
+    def _aggregate_input(self, name: str, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        values = self.dataset.take(name, rows)
+        valid = self.dataset.valid_at(name, rows)
+        if values.dtype == object:
+            valid &= _not_none(values)
+        elif values.dtype.kind == "f":
+            valid &= ~np.isnan(values)
+        return values, valid
+
+    def _grouped_rows(self) -> List[List[Any]]:
+        aggregates = self.query.aggregates
+        # key tuple -> per-aggregate accumulators
+        partials: Dict[Tuple[Any, ...], List[Any]] = {}
+
+        def fresh() -> List[Any]:
+            return [[0, 0, None, None] for _ in aggregates]  # count, sum, min, max
+
+        for group, local in self._matches():
+            rows = group.start + local
+            if self.query.group_by:
+                codes, decoders = zip(*(self._key_codes(name, rows) for name in self.query.group_by))
+                stacked = np.stack(codes, axis=1)
+                keys, gid = np.unique(stacked, axis=0, return_inverse=True)
+                gid = gid.reshape(-1)
+                key_tuples = [
+                    tuple(None if c < 0 else _python_scalar(decoder[c]) for c, decoder in zip(key, decoders))
+                    for key in keys.tolist()
+                ]
+            else:
+                gid = np.zeros(rows.size, dtype=np.int64)
+                key_tuples = [()]
+            n_groups = len(key_tuples)
+
+            group_results = [fresh() for _ in range(n_groups)]
+            for a, agg in enumerate(aggregates):
+                if agg.column is None:
+                    counts = np.bincount(gid, minlength=n_groups)
+                    for g in range(n_groups):
+                        group_results[g][a][0] = int(counts[g])
+                    continue
+                values, valid = self._aggregate_input(agg.column, rows)
+                gv = gid[valid]
+                counts = np.bincount(gv, minlength=n_groups)
+                sums = None
+                if agg.fn in ("sum", "mean"):
+                    if self.dataset.columns[agg.column]["type"] in ("integer", "boolean"):
+                        sums = _exact_sums(values[valid].astype(np.int64), gv, n_groups)
+                    else:
+                        sums = np.bincount(gv, weights=values[valid].astype(np.float64), minlength=n_groups)
+                # (distinct values, per-group index of the lowest, of the highest)
+                extremes = None
+                if agg.fn in ("min", "max") and gv.size:
+                    uniques, inverse = np.unique(values[valid], return_inverse=True)
+                    lows = np.full(n_groups, uniques.size, dtype=np.int64)
+                    highs = np.full(n_groups, -1, dtype=np.int64)
+                    np.minimum.at(lows, gv, inverse)
+                    np.maximum.at(highs, gv, inverse)
+                    extremes = (uniques, lows, highs)
+                for g in range(n_groups):
+                    acc = group_results[g][a]
+                    acc[0] = int(counts[g])
+                    if sums is not None:
+                        acc[1] = _python_scalar(sums[g])  # int for integer columns, float otherwise
+                    if extremes is not None and counts[g]:
+                        uniques, lows, highs = extremes
+                        acc[2] = uniques[lows[g]]
+                        acc[3] = uniques[highs[g]]
+
+            for key, result in zip(key_tuples, group_results):
+                merged = partials.get(key)
+                if merged is None:
+                    partials[key] = result
+                    continue
+                for acc, new in zip(merged, result):
+                    acc[0] += new[0]
+                    acc[1] += new[1]
+                    if new[2] is not None:
+                        acc[2] = new[2] if acc[2] is None else min(acc[2], new[2])
+                        acc[3] = new[3] if acc[3] is None else max(acc[3], new[3])
+
+        if not partials and not self.query.group_by:
+            partials[()] = fresh()
+
+        output = []
+        for key, accumulators in partials.items():
+            row = list(key)
+            for agg, (count, total, low, high) in zip(aggregates, accumulators):
+                if agg.fn == "count":
+                    row.append(count)
+                elif agg.fn == "sum":
+                    row.append(total if count else None)
+                elif agg.fn == "mean":
+                    row.append(total / count if count else None)
+                elif agg.fn == "min":
+                    row.append(_python_scalar(low) if low is not None else None)
+                else:
+                    row.append(_python_scalar(high) if high is not None else None)
+            output.append(row)
+
+        self._sort_output(output)
+        if self.query.limit is not None:
+            output = output[: self.query.limit]
+        return output
+
+    def _sort_output(self, rows: List[List[Any]]) -> None:
+        # Stable sorts from the least to the most significant key; nulls last either way.
+        for order in reversed(self.query.order_by):
+            i = self.columns.index(order.column)
+            if order.desc:
+                rows.sort(key=lambda r: (r[i] is not None, 0 if r[i] is None else r[i]), reverse=True)
+            else:
+                rows.sort(key=lambda r: (r[i] is None, 0 if r[i] is None else r[i]))
+
+
+def page_lines(plan: QueryPlan, page_size: int) -> Iterator[Dict[str, Any]]:
+    """
+    Regroup a plan's row batches into pages of exactly page_size rows (the
+    last may be shorter): a header, the pages, then execution statistics.
+    """
+    yield {"columns": plan.columns}
+    pending: List[List[Any]] = []
+    page = 0
+    for batch in plan.rows(batch_rows=page_size):
+        pending.extend(batch)
+        while len(pending) >= page_size:
+            yield {"page": page, "rows": pending[:page_size]}
+            pending = pending[page_size:]
+            page += 1
+    if pending:
+        yield {"page": page, "rows": pending}
+    yield {"stats": vars(plan.stats)}
@@ -0,0 +1,150 @@
+"""
+Constant-memory row access to stored CSV datasets.
+
+- preview_rows() returns the header and the first N rows, reading only as
+  much of the file as those rows need.
+- sample_rows() draws a uniform random sample of K rows in one pass with
+  reservoir sampling (Algorithm L), holding only the K chosen rows.
+
+Both read through FileStorageBackend.open() and skip blank and malformed
+rows exactly as the profiler does, so row numbers match the profile's
+row_count and the columnar copy. A dataset made of several segments is read
+as one sequence of RowSources: row numbers continue across segments and
+the header comes from the first one.
+"""
+
+from __future__ import annotations
+
+import csv
+import math
+import random
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, ContextManager, Generator, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.csv_profile import open_csv_text, sniff_delimiter
+
+
+@dataclass
+class RowsResult:
+    columns: List[str]
+    rows: List[List[str]] = field(default_factory=list)
+    # 0-based positions of the rows among the data rows of the file
+    row_numbers: List[int] = field(default_factory=list)
+
+
+@dataclass
+class RowSource:
+    # Opens the CSV file of one segment (e.g. lambda: storage.open(path))
+    open: Callable[[], ContextManager[BinaryIO]]
+    # Delimiter detected at upload, or None to sniff it again
+    delimiter: Optional[str] = None
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, delimiter: Optional[str] = None) -> "RowSource":
+        return cls(lambda: nullcontext(stream), delimiter)
+
+
+def _unit(rng: random.Random) -> float:
+    # random() may return exactly 0.0, which has no logarithm.
+    return rng.random() or 1e-300
+
+
+def _data_rows(reader: Iterator[List[str]], width: int) -> Iterator[List[str]]:
+    for row in reader:
+        if row and len(row) == width:
+            yield row
+
+
+def _open_reader(stream: BinaryIO, delimiter: Optional[str]):
+    if delimiter is None:
+        delimiter = sniff_delimiter(stream)
+    text = open_csv_text(stream)
+    reader = csv.reader(text, delimiter=delimiter)
+    header = next(reader, None) or []
+    return text, reader, header
+
+
+def _source_rows(sources: Sequence[RowSource], header: List[str]) -> Generator[List[str], None, None]:
+    """
+    Data rows of all sources in order; fills `header` from the first source
+    before yielding anything.
+    """
+    for i, source in enumerate(sources):
+        with source.open() as stream:
+            text, reader, columns = _open_reader(stream, source.delimiter)
+            try:
+                if i == 0:
+                    header.extend(columns)
+                yield from _data_rows(reader, len(columns))
+            finally:
+                text.detach()
+
+
+def preview_rows(sources: Sequence[RowSource], limit: int) -> RowsResult:
+    """
+    Header plus the first `limit` data rows.
+    """
+    header: List[str] = []
+    rows = _source_rows(sources, header)
+    try:
+        result = RowsResult(columns=header)
+        for number, row in enumerate(rows):
+            if number >= limit:
+                break
+            result.rows.append(row)
+            result.row_numbers.append(number)
+        return result
+    finally:
+        rows.close()
+
+
+def sample_rows(
+    sources: Sequence[RowSource],
+    size: int,
+    seed: Optional[int] = None,
+) -> RowsResult:
+    """
+    Uniform random sample of `size` data rows (all rows if there are fewer),
+    returned in file order.
+
+    Algorithm L draws the gap to the next replacement directly, so the
+    random number generator is called O(k log(n / k)) times, not once per row.
+    """
+    rng = random.Random(seed)
+    header: List[str] = []
+    source_rows = _source_rows(sources, header)
+    try:
+        reservoir: List[Tuple[int, List[str]]] = []
+        rows = enumerate(source_rows)
+        if size <= 0:
+            next(rows, None)
+            return RowsResult(columns=header)
+
+        for number, row in rows:
+            reservoir.append((number, row))
+            if len(reservoir) == size:
+                break
+
+        w = math.exp(math.log(_unit(rng)) / size)
+        next_index = size - 1
+        while True:
+            next_index += int(math.log(_unit(rng)) / math.log(1 - w)) + 1
+            item = None
+            for number, row in rows:
+                if number == next_index:
+                    item = (number, row)
+                    break
+            if item is None:
+                break
+            reservoir[rng.randrange(size)] = item
+            w *= math.exp(math.log(_unit(rng)) / size)
+
+        reservoir.sort(key=lambda entry: entry[0])
+        return RowsResult(
+            columns=header,
+            rows=[row for _, row in reservoir],
+            row_numbers=[number for number, _ in reservoir],
+        )
+    finally:
+        source_rows.close()
@@ -0,0 +1,295 @@
+"""
+Appendable datasets: segments and versions.
+
+- A dataset is an ordered list of immutable segments (CSV files, each with
+  its own columnar copy). Appending rows adds a segment; nothing already
+  written is rewritten.
+- A version is an immutable list of segment ids plus the profile of those
+  rows. extend_profile() builds the next version's profile from the
+  previous version's sketch state and the new segment's profile only.
+- SegmentedDataset presents the columnar copies of a version's segments as
+  one dataset with the same read interface as ColumnarDataset, so
+  QueryPlan runs over any version unchanged.
+- resolve_version() / load_version() find a version's profile and segments
+  and open its columnar copies, for the API routes and background jobs alike.
+
+Schema rule for appends: the header must match, and every column must
+keep its type, except that a column may be widened from integer to float,
+and columns with no values yet (type "empty") take the appended type.
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.dataset import Dataset, DatasetSegment
+from app.services.columnar import ColumnarDataset, RowGroup
+from app.services.csv_profile import CSVProfile, CSVProfileError
+from app.services.storage import get_default_storage_backend
+
+_NULL_FILL = {
+    "integer": (np.int64, 0),
+    "float": (np.float64, np.nan),
+    "boolean": (np.bool_, False),
+    "datetime": (np.dtype("datetime64[us]"), np.datetime64("NaT")),
+}
+
+
+class VersionNotFoundError(LookupError):
+    """
+    The requested version of a dataset does not exist.
+    """
+
+
+class ColumnarCopyMissingError(Exception):
+    """
+    A segment of the version has no columnar copy (uploaded before conversion was enabled).
+    """
+
+
+def extend_profile(base_state: Dict[str, Any], appended: CSVProfile) -> CSVProfile:
+    """
+    Profile of the base rows followed by the appended rows.
+
+    Raises CSVProfileError when the appended rows do not fit the schema.
+    """
+    base = CSVProfile.from_state(base_state)
+    if appended.column_names != base.column_names:
+        raise CSVProfileError(
+            f"Header does not match the dataset: expected {base.column_names}, got {appended.column_names}."
+        )
+    before = {column.name: column.type for column in base.columns}
+    base.merge(appended)
+    for column in base.columns:
+        old, new = before[column.name], column.type
+        if old == new or old == "empty" or (old, new) == ("integer", "float"):
+            continue
+        raise CSVProfileError(
+            f"Column {column.name!r} is {old}; the appended rows would make it {new}."
+        )
+    return base
+
+
+def column_types(profile: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Column name -> type from a profile summary (empty dict if there is none).
+    """
+    return {column["name"]: column["type"] for column in (profile or {}).get("columns", [])}
+
+
+class SegmentedDataset:
+    """
+    Read-only view over the columnar copies of several segments, in order.
+
+    Row positions, row groups and dictionary codes are global. Values of a
+    segment stored with a narrower type than the version's (integer in a
+    float column, or an all-null segment) are converted on read.
+    """
+
+    def __init__(self, parts: Sequence[ColumnarDataset], types: Optional[Dict[str, str]] = None) -> None:
+        if not parts:
+            raise ValueError("A dataset has at least one segment")
+        self.parts = list(parts)
+        self.offsets = np.cumsum([0] + [part.row_count for part in self.parts])
+        self.row_count = int(self.offsets[-1])
+
+        types = types or {}
+        self.columns: Dict[str, Dict[str, Any]] = {}
+        for name, meta in self.parts[0].columns.items():
+            kind = types.get(name, meta["type"])
+            kind = "string" if kind == "empty" else kind
+            if kind == "string":
+                dictionary = all(part.columns[name]["storage"] == "dict" for part in self.parts)
+                storage = "dict" if dictionary else "utf8"
+            else:
+                storage = kind
+            self.columns[name] = {
+                "name": name,
+                "type": kind,
+                "storage": storage,
+                "has_nulls": any(part.columns[name]["has_nulls"] for part in self.parts),
+            }
+
+        self.row_groups = [
+            RowGroup(int(offset) + group.start, group.count, group.stats)
+            for part, offset in zip(self.parts, self.offsets)
+            for group in part.row_groups
+        ]
+        self._dictionaries: Dict[str, Tuple[np.ndarray, List[np.ndarray]]] = {}
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    def _meta(self, name: str) -> Dict[str, Any]:
+        try:
+            return self.columns[name]
+        except KeyError:
+            raise KeyError(f"Unknown column {name!r}") from None
+
+    def _spans(self, start: int, stop: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        (part index, local start, local stop) covering global rows [start, stop).
+        """
+        first = int(np.searchsorted(self.offsets, start, side="right")) - 1
+        for i in range(max(first, 0), len(self.parts)):
+            begin, end = int(self.offsets[i]), int(self.offsets[i + 1])
+            if begin >= stop:
+                break
+            if end > start:
+                yield i, max(start, begin) - begin, min(stop, end) - begin
+
+    def _gather(self, rows: np.ndarray, read, dtype) -> np.ndarray:
+        """
+        read(part index, local rows) for each part touched by `rows`, reassembled in order.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        owner = np.searchsorted(self.offsets, rows, side="right") - 1
+        out = np.empty(rows.size, dtype=dtype)
+        for i in np.unique(owner).tolist():
+            mask = owner == i
+            out[mask] = read(i, rows[mask] - self.offsets[i])
+        return out
+
+    def _dtype(self, name: str):
+        meta = self._meta(name)
+        if meta["storage"] in ("dict", "utf8") or meta["type"] == "string":
+            return object
+        return _NULL_FILL[meta["type"]][0]
+
+    def _convert(self, name: str, i: int, values: np.ndarray, valid) -> np.ndarray:
+        target = self._meta(name)["type"]
+        stored = self.parts[i].columns[name]["type"]
+        if target == "string" or stored == target:
+            return values
+        dtype, fill = _NULL_FILL[target]
+        if stored == "string":
+            # Segment written while the column had no values: all null.
+            return np.full(len(values), fill, dtype=dtype)
+        # integer widened to float
+        converted = values.astype(dtype)
+        converted[~valid()] = fill
+        return converted
+
+    def valid(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        self._meta(name)
+        stop = self.row_count if stop is None else stop
+        pieces = [self.parts[i].valid(name, a, b) for i, a, b in self._spans(start, stop)]
+        return pieces[0] if len(pieces) == 1 else np.concatenate(pieces or [np.ones(0, dtype=bool)])
+
+    def valid_at(self, name: str, rows: np.ndarray) -> np.ndarray:
+        self._meta(name)
+        return self._gather(rows, lambda i, local: self.parts[i].valid_at(name, local), bool)
+
+    def values(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        self._meta(name)
+        stop = self.row_count if stop is None else stop
+        pieces = [
+            self._convert(
+                name, i, self.parts[i].values(name, a, b), lambda i=i, a=a, b=b: self.parts[i].valid(name, a, b)
+            )
+            for i, a, b in self._spans(start, stop)
+        ]
+        if len(pieces) == 1:
+            return pieces[0]
+        return np.concatenate(pieces) if pieces else np.empty(0, dtype=self._dtype(name))
+
+    def take(self, name: str, rows: np.ndarray) -> np.ndarray:
+        def read(i: int, local: np.ndarray) -> np.ndarray:
+            values = self.parts[i].take(name, local)
+            return self._convert(name, i, values, lambda: self.parts[i].valid_at(name, local))
+
+        return self._gather(rows, read, self._dtype(name))
+
+    def _global_dictionary(self, name: str) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """
+        Union of the segments' dictionaries, plus per-segment code remaps
+        (with a trailing -1 so null codes stay -1).
+        """
+        cached = self._dictionaries.get(name)
+        if cached is None:
+            index: Dict[str, int] = {}
+            remaps = []
+            for part in self.parts:
+                local = [index.setdefault(value, len(index)) for value in part.dictionary(name).tolist()]
+                remaps.append(np.asarray(local + [-1], dtype=np.int32))
+            cached = (np.asarray(list(index), dtype=object), remaps)
+            self._dictionaries[name] = cached
+        return cached
+
+    def dictionary(self, name: str) -> np.ndarray:
+        return self._global_dictionary(name)[0]
+
+    def codes(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        stop = self.row_count if stop is None else stop
+        if len(self.parts) == 1:
+            return self.parts[0].codes(name, start, stop)
+        remaps = self._global_dictionary(name)[1]
+        pieces = [remaps[i][self.parts[i].codes(name, a, b)] for i, a, b in self._spans(start, stop)]
+        return np.concatenate(pieces) if pieces else np.empty(0, dtype=np.int32)
+
+    def codes_at(self, name: str, rows: np.ndarray) -> np.ndarray:
+        if len(self.parts) == 1:
+            return self.parts[0].codes_at(name, rows)
+        remaps = self._global_dictionary(name)[1]
+        return self._gather(rows, lambda i, local: remaps[i][self.parts[i].codes_at(name, local)], np.int32)
+
+
+def initial_segment(dataset: Dataset) -> DatasetSegment:
+    """
+    Segment 0 of a dataset uploaded before appends existed (not persisted).
+    """
+    return DatasetSegment(
+        id=uuid.uuid4(),
+        dataset_id=dataset.id,
+        sequence=0,
+        storage_path=dataset.storage_path,
+        columnar_path=dataset.columnar_path,
+        delimiter=(dataset.profile or {}).get("delimiter"),
+        row_count=dataset.row_count or 0,
+        size_bytes=dataset.size_bytes,
+    )
+
+
+def resolve_version(
+    dataset: Dataset, version: Optional[int]
+) -> Tuple[Optional[Dict[str, Any]], List[DatasetSegment]]:
+    """
+    (profile, segments) of a dataset version; version=None means the
+    current one. Datasets uploaded before versioning have a single implicit
+    version 1.
+
+    Raises VersionNotFoundError if there is no such version.
+    """
+    if not dataset.versions:
+        if version not in (None, 1):
+            raise VersionNotFoundError("Dataset version not found.")
+        return dataset.profile, [initial_segment(dataset)]
+
+    number = dataset.current_version if version is None else version
+    found = next((v for v in dataset.versions if v.version == number), None)
+    if found is None:
+        raise VersionNotFoundError("Dataset version not found.")
+    by_id = {str(segment.id): segment for segment in dataset.segments}
+    return found.profile, [by_id[segment_id] for segment_id in found.segment_ids]
+
+
+def load_version(dataset: Dataset, version: Optional[int] = None) -> SegmentedDataset:
+    """
+    Open the columnar copies of a dataset version as one dataset.
+
+    Raises VersionNotFoundError or ColumnarCopyMissingError.
+    """
+    profile, segments = resolve_version(dataset, version)
+    if any(segment.columnar_path is None for segment in segments):
+        raise ColumnarCopyMissingError(
+            "Dataset has no columnar copy (uploaded before conversion was enabled); re-upload it."
+        )
+    storage = get_default_storage_backend()
+    if not storage.supports_local_paths:
+        raise ColumnarCopyMissingError("The storage backend cannot memory-map columnar dataset copies.")
+    parts = [ColumnarDataset(storage.local_path(segment.columnar_path)) for segment in segments]
+    return SegmentedDataset(parts, column_types(profile))
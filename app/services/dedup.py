@@ -0,0 +1,191 @@
+"""
+Near-duplicate detection with MinHash and locality-sensitive hashing.
+
+- MinHasher turns a document's text into a fixed-size signature whose
+  per-position agreement with another signature estimates the Jaccard
+  similarity of their word-shingle sets.
+- LSHIndex buckets signatures band by band, so only documents sharing at
+  least one band are compared; candidates are then verified against the
+  similarity threshold.
+- One LSHIndex lives inside each knowledge base's index (see kb_index.py)
+  and is persisted with it.
+"""
+
+from __future__ import annotations
+
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.chunking import tokenize
+
+# Universal hashing h(x) = (a * x + b) mod p over 32-bit shingle hashes.
+# With a, b < 2**32 the product fits in uint64 without overflow.
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+# Shingles hashed per block, bounding the (num_perm x block) temporary.
+_SHINGLE_BLOCK = 4096
+
+
+class MinHasher:
+    """
+    MinHash signatures over lowercased word shingles.
+
+    Tokenizing before shingling makes signatures insensitive to whitespace,
+    punctuation and case, which is what differs between re-exports of the
+    same report.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        tokens = tokenize(text)
+        if not tokens:
+            return np.zeros(0, dtype=np.uint64)
+        size = min(self.shingle_size, len(tokens))
+        shingles = {
+            zlib.crc32(" ".join(tokens[i:i + size]).encode("utf-8"))
+            for i in range(len(tokens) - size + 1)
+        }
+        return np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Return the (num_perm,) uint64 signature, or None for text without words.
+        """
+        hashes = self._shingle_hashes(text)
+        if hashes.size == 0:
+            return None
+        signature = np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, hashes.size, _SHINGLE_BLOCK):
+            block = hashes[None, start:start + _SHINGLE_BLOCK]
+            permuted = (self._a * block + self._b) % _MERSENNE_PRIME
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    Estimated Jaccard similarity of the shingle sets behind two signatures.
+    """
+    return float(np.count_nonzero(a == b)) / a.size
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures, keyed by document id.
+
+    With b bands of r rows, two documents with similarity s become
+    candidates with probability 1 - (1 - s**r)**b; the curve's midpoint
+    (1/b)**(1/r) should sit below the verification threshold.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16) -> None:
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.signatures: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, document_id: str) -> bool:
+        return document_id in self.signatures
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        r = self.rows_per_band
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def add(self, document_id: str, signature: np.ndarray) -> None:
+        self.remove(document_id)
+        self.signatures[document_id] = signature
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(key, set()).add(document_id)
+
+    def remove(self, document_id: str) -> bool:
+        signature = self.signatures.pop(document_id, None)
+        if signature is None:
+            return False
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            members = buckets.get(key)
+            if members is not None:
+                members.discard(document_id)
+                if not members:
+                    del buckets[key]
+        return True
+
+    def candidates(self, signature: np.ndarray) -> Set[str]:
+        found: Set[str] = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            found |= buckets.get(key, set())
+        return found
+
+    def query(
+        self,
+        signature: np.ndarray,
+        threshold: float,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Documents whose estimated similarity is >= threshold, best first.
+        """
+        matches = []
+        for document_id in self.candidates(signature):
+            if document_id == exclude:
+                continue
+            similarity = estimate_similarity(signature, self.signatures[document_id])
+            if similarity >= threshold:
+                matches.append((document_id, similarity))
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches
+
+    def clusters(self, document_ids: Iterable[str], threshold: float) -> List[List[str]]:
+        """
+        Group the given documents into near-duplicate clusters (size >= 2).
+
+        Pairs are only considered when both documents are in `document_ids`;
+        clusters are the connected components of the verified pairs.
+        """
+        members = [d for d in document_ids if d in self.signatures]
+        wanted = set(members)
+        parent = {d: d for d in members}
+
+        def find(d: str) -> str:
+            while parent[d] != d:
+                parent[d] = parent[parent[d]]
+                d = parent[d]
+            return d
+
+        for document_id in members:
+            for other, _ in self.query(self.signatures[document_id], threshold, exclude=document_id):
+                if other in wanted:
+                    root_a, root_b = find(document_id), find(other)
+                    if root_a != root_b:
+                        parent[root_b] = root_a
+
+        groups: Dict[str, List[str]] = {}
+        for document_id in members:
+            groups.setdefault(find(document_id), []).append(document_id)
+        return [group for group in groups.values() if len(group) > 1]
+
+
+@lru_cache
+def get_minhasher() -> MinHasher:
+    """
+    Return the process-wide MinHasher configured by settings.
+
+    The seed is fixed so every worker produces identical signatures.
+    """
+    settings = get_settings()
+    return MinHasher(num_perm=settings.DEDUP_NUM_PERM, shingle_size=settings.DEDUP_SHINGLE_SIZE)
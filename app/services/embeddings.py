@@ -0,0 +1,76 @@
+"""
+Text embeddings.
+
+- HashingEmbedder maps text to dense, L2-normalized vectors using feature
+  hashing over word tokens and character trigrams. It needs no model
+  download and is deterministic across processes, so every worker produces
+  the same vectors for the same text.
+- get_embedder() returns the process-wide embedder configured by settings.
+"""
+
+from __future__ import annotations
+
+import math
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.chunking import tokenize
+
+
+class HashingEmbedder:
+    """
+    Feature-hashing embedder.
+
+    Each word token (and, with lower weight, each character trigram) is hashed
+    into one of `dim` buckets with a hash-derived sign. Term frequencies are
+    log-scaled before the vector is normalized, so cosine similarity behaves
+    like a smoothed lexical overlap that tolerates small spelling variations.
+    """
+
+    def __init__(self, dim: int, trigram_weight: float = 0.5) -> None:
+        self.dim = dim
+        self.trigram_weight = trigram_weight
+
+    def _features(self, text: str) -> Dict[str, float]:
+        features: Dict[str, float] = defaultdict(float)
+        for token in tokenize(text):
+            features[token] += 1.0
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                features["3:" + padded[i:i + 3]] += self.trigram_weight
+        return features
+
+    def embed_one(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if (h >> 31) & 1 else -1.0
+            scaled = 1.0 + math.log(weight) if weight >= 1.0 else weight
+            vec[h % self.dim] += sign * scaled
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            vec /= norm
+        return vec
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embed a batch of texts into a (n, dim) float32 matrix.
+        """
+        rows: List[np.ndarray] = [self.embed_one(text) for text in texts]
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.vstack(rows)
+
+
+@lru_cache
+def get_embedder() -> HashingEmbedder:
+    """
+    Return the process-wide embedder (constructed once per process).
+    """
+    settings = get_settings()
+    return HashingEmbedder(dim=settings.EMBEDDING_DIM)
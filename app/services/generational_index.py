@@ -0,0 +1,355 @@
+"""
+Generational on-disk persistence shared by the search indexes.
+
+- GenerationalIndex stores an index as a full snapshot gen-{B}/ plus
+  append-only deltas delta-{g}/ (only what changed in each save), tied
+  together by manifest.json: {"generation", "base", "deltas", "dim", ...}.
+  Subclasses decide what a snapshot and a delta hold; save() decides which
+  one to write, swaps the manifest atomically and removes generations no
+  reader can still be loading.
+- refreshed() catches a copy up with another worker's saves, replaying new
+  deltas in place when it can.
+- IndexRegistry keeps one loaded copy of each index per process. get()
+  loads and refreshes under a per-key lock (the registry-wide lock only
+  guards the lookup), and edit() holds a cross-process file lock from
+  reloading the latest generation to saving the next one, so concurrent
+  writers never overwrite each other.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Self, Sequence, TypeVar
+
+from app.core.config import get_settings
+from app.core.file_lock import file_lock
+from app.services.vector_store import VectorStore
+
+# Fold the deltas into a new full snapshot once they hold more rows than this
+# fraction of the snapshot (so each row is rewritten O(1) times on average),
+# or once there are this many of them (bounding load time).
+DELTA_ROWS_FRACTION = 0.5
+MAX_DELTA_SEGMENTS = 32
+
+
+class GenerationalIndex:
+    """
+    Base class of an index persisted as a snapshot plus deltas.
+
+    Subclasses implement has_changes(), the snapshot / delta readers and
+    writers, and _empty_copy(); they extend _manifest_fields(), _adopt()
+    and _needs_snapshot() when they keep more state in the manifest or
+    have more reasons to rewrite everything.
+    """
+
+    # Used in error messages, e.g. "Index of knowledge base <id>".
+    label = "Index"
+
+    def __init__(self, directory: Path, dim: int, quantization: str = "float32", rerank_factor: int = 10) -> None:
+        self.directory = directory
+        self.dim = dim
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.vectors = VectorStore(dim, quantization=quantization, rerank_factor=rerank_factor)
+        self.lock = threading.RLock()
+        # Generation of the manifest this copy reflects: the full snapshot
+        # gen-{base_generation}/ plus delta-{g}/ for each g in `deltas`.
+        self.generation = 0
+        self.base_generation = 0
+        self.deltas: List[int] = []
+        self._manifest_mtime_ns = 0
+        # Vectors in the snapshot / on disk; set _full_save_due when row ids
+        # changed so the next save must rewrite everything.
+        self._base_rows = 0
+        self._saved_rows = 0
+        self._full_save_due = False
+
+    # --- Subclass hooks ---
+
+    def has_changes(self) -> bool:
+        """
+        True if anything changed since the last save or load.
+        """
+        raise NotImplementedError
+
+    def _write_snapshot(self, gen_dir: Path) -> None:
+        raise NotImplementedError
+
+    def _read_snapshot(self, gen_dir: Path, manifest: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _write_delta(self, delta_dir: Path) -> None:
+        raise NotImplementedError
+
+    def _apply_delta(self, delta_dir: Path) -> None:
+        raise NotImplementedError
+
+    def _empty_copy(self) -> Self:
+        """
+        A new, empty index with the same key, directory and settings.
+        """
+        raise NotImplementedError
+
+    def _manifest_fields(self) -> Dict[str, Any]:
+        return {}
+
+    def _adopt(self, manifest: Dict[str, Any]) -> None:
+        """
+        Take over the state recorded in `manifest` once its generation is loaded.
+        """
+        self.generation = manifest["generation"]
+        self._saved_rows = len(self.vectors)
+
+    # --- Persistence ---
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        """
+        The manifest currently on disk, or None if the index was never saved.
+        """
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def generation_dirs(self) -> List[Path]:
+        """
+        Directories holding the generation this copy reflects, in load order.
+        """
+        if not self.base_generation:
+            return []
+        return [self.directory / name for name in _generation_dirs(self.base_generation, self.deltas)]
+
+    def _needs_snapshot(self) -> bool:
+        if not self.base_generation or self._full_save_due or len(self.deltas) >= MAX_DELTA_SEGMENTS:
+            return True
+        return len(self.vectors) - self._base_rows > DELTA_ROWS_FRACTION * self._base_rows
+
+    def save(self) -> None:
+        """
+        Write the changes since the last save as a new generation and
+        atomically point the manifest at it.
+
+        Usually that is a delta; once the deltas grow large (or row ids
+        changed) a full snapshot is written instead. The generation number
+        comes from the manifest on disk, so the caller must hold the write
+        lock from reload to save, as IndexRegistry.edit() does. The previous
+        generation's files are kept so a concurrent reader in another
+        worker never has them removed mid-load.
+        """
+        with self.lock:
+            previous = self.read_manifest()
+            on_disk = previous["generation"] if previous else 0
+            if on_disk != self.generation:
+                raise RuntimeError(
+                    f"{self.label} reflects generation {self.generation}, but generation "
+                    f"{on_disk} is on disk; change it under the registry's edit()."
+                )
+
+            generation = on_disk + 1
+            snapshot = self._needs_snapshot()
+            target = self.directory / (f"gen-{generation}" if snapshot else f"delta-{generation}")
+            shutil.rmtree(target, ignore_errors=True)  # left over by a failed save
+            target.mkdir(parents=True)
+            if snapshot:
+                self._write_snapshot(target)
+                self.base_generation, self.deltas = generation, []
+                self._base_rows = len(self.vectors)
+                self._full_save_due = False
+            else:
+                self._write_delta(target)
+                self.deltas.append(generation)
+
+            manifest = {
+                "dim": self.dim,
+                "generation": generation,
+                "base": self.base_generation,
+                "deltas": self.deltas,
+                **self._manifest_fields(),
+            }
+            tmp = self.manifest_path.with_name("manifest.json.tmp")
+            tmp.write_text(json.dumps(manifest), encoding="utf-8")
+            tmp.replace(self.manifest_path)
+            self._manifest_mtime_ns = self.manifest_path.stat().st_mtime_ns
+            self._adopt(manifest)
+
+            keep = set(_generation_dirs(self.base_generation, self.deltas)) | set(_manifest_dirs(previous))
+            for old in [*self.directory.glob("gen-*"), *self.directory.glob("delta-*")]:
+                if old.name not in keep:
+                    shutil.rmtree(old, ignore_errors=True)
+
+    def _read(self) -> None:
+        """
+        Load the generation on disk into this (empty) copy.
+        """
+        try:
+            mtime_ns = self.manifest_path.stat().st_mtime_ns
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        self.generation = manifest["generation"]
+        self._manifest_mtime_ns = mtime_ns
+        if manifest["dim"] != self.dim:
+            # Embedding dimension changed: the stored vectors are unusable
+            # (the next save writes a fresh snapshot).
+            return
+
+        self.base_generation = manifest["base"]
+        self._read_snapshot(self.directory / f"gen-{self.base_generation}", manifest)
+        self._base_rows = len(self.vectors)
+        for generation in manifest["deltas"]:
+            self._apply_delta(self.directory / f"delta-{generation}")
+            self.deltas.append(generation)
+        self._adopt(manifest)
+
+    def is_stale(self) -> bool:
+        """
+        True if another process has written a newer manifest than the one loaded.
+        """
+        try:
+            return self.manifest_path.stat().st_mtime_ns != self._manifest_mtime_ns
+        except FileNotFoundError:
+            return False
+
+    def refreshed(self) -> Self:
+        """
+        Bring this copy up to the generation on disk. When only deltas were
+        appended since it was loaded they are replayed in place; otherwise
+        (new snapshot, unsaved local changes) a fresh copy is loaded.
+        """
+        with self.lock:
+            try:
+                mtime_ns = self.manifest_path.stat().st_mtime_ns
+                manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                mtime_ns, manifest = 0, None
+            if (manifest["generation"] if manifest else 0) == self.generation:
+                self._manifest_mtime_ns = mtime_ns
+                return self
+            if (
+                manifest is not None
+                and not self.has_changes()
+                and manifest["dim"] == self.dim
+                and manifest["base"] == self.base_generation
+                and manifest["deltas"][: len(self.deltas)] == self.deltas
+            ):
+                try:
+                    for generation in manifest["deltas"][len(self.deltas):]:
+                        self._apply_delta(self.directory / f"delta-{generation}")
+                        self.deltas.append(generation)
+                except OSError:
+                    pass  # removed by a newer save: fall through to a full load
+                else:
+                    self._adopt(manifest)
+                    self._manifest_mtime_ns = mtime_ns
+                    return self
+
+        fresh = self._empty_copy()
+        fresh._read()
+        return fresh
+
+
+def _generation_dirs(base: int, deltas: Sequence[int]) -> List[str]:
+    return [f"gen-{base}"] + [f"delta-{generation}" for generation in deltas]
+
+
+def _manifest_dirs(manifest: Optional[Dict[str, Any]]) -> List[str]:
+    if manifest is None:
+        return []
+    return _generation_dirs(manifest["base"], manifest["deltas"])
+
+
+IndexT = TypeVar("IndexT", bound=GenerationalIndex)
+
+
+class IndexRegistry(Generic[IndexT]):
+    """
+    The loaded copy of each index of one kind in this process, by key.
+
+    Indexes live under {INDEX_ROOT}/{subdir}/{key}/; `loader(key,
+    directory)` loads one from there with the current settings.
+    """
+
+    def __init__(self, subdir: str, loader: Callable[[str, Path], IndexT]) -> None:
+        self.subdir = subdir
+        self.loader = loader
+        self._indexes: Dict[str, IndexT] = {}
+        # Serializes loading and refreshing of one key's index.
+        self._load_locks: Dict[str, threading.Lock] = {}
+        # Guards the two dicts only; never held while an index is read from disk.
+        self._lock = threading.Lock()
+
+    def directory(self, key: str) -> Path:
+        return Path(get_settings().INDEX_ROOT) / self.subdir / key
+
+    @staticmethod
+    def _is_current(index: IndexT, exact: bool) -> bool:
+        if index.is_stale():
+            return False
+        if exact:
+            manifest = index.read_manifest()
+            return (manifest["generation"] if manifest else 0) == index.generation
+        return True
+
+    def get(self, key: str, exact: bool = False) -> IndexT:
+        """
+        The registry copy of an index, loaded on first use and brought up
+        to date with the disk. With `exact` the generation is compared by
+        reading the manifest rather than its mtime, which can miss two
+        saves within the filesystem's timestamp granularity.
+
+        Loading happens under a per-key lock, so a cold or stale index
+        never holds up readers of other indexes.
+        """
+        with self._lock:
+            index = self._indexes.get(key)
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        if index is not None and self._is_current(index, exact):
+            return index
+
+        with load_lock:
+            with self._lock:
+                index = self._indexes.get(key)
+            if index is None:
+                index = self.loader(key, self.directory(key))
+            elif not self._is_current(index, exact):
+                index = index.refreshed()
+            with self._lock:
+                self._indexes[key] = index
+            return index
+
+    def discard(self, key: str, index: IndexT) -> None:
+        """
+        Drop `index` from the registry if it is still the copy held for `key`.
+        """
+        with self._lock:
+            if self._indexes.get(key) is index:
+                del self._indexes[key]
+
+    @contextmanager
+    def edit(self, key: str) -> Iterator[IndexT]:
+        """
+        Yield an index for changes while holding its cross-process write
+        lock. The index is first brought up to the latest generation on
+        disk and, if anything changed, saved on exit.
+
+        If the block or the save fails, this worker's copy is dropped, so
+        the next reader loads what is on disk rather than half-applied
+        changes.
+        """
+        with file_lock(self.directory(key) / "write.lock"):
+            index = self.get(key, exact=True)
+            try:
+                yield index
+                if index.has_changes():
+                    index.save()
+            except BaseException:
+                self.discard(key, index)
+                raise
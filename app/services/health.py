@@ -0,0 +1,193 @@
+"""
+Deep health checks with cached probe results.
+
+- HealthMonitor probes the dependencies a worker needs on a background
+  interval (HEALTH_PROBE_INTERVAL_SECONDS):
+    - database: a `SELECT 1` round trip through the pool
+    - db_pool:  checked-out connections against the pool's capacity
+    - storage:  writing, reading back and deleting a small file through
+                the storage backend
+- /health and /ready only read the latest cached results, so probing them
+  (however often a load balancer does) adds no load on the database or disk.
+- A result older than HEALTH_STALE_AFTER_INTERVALS intervals counts as
+  failing: a probe that hangs (e.g. on a dead DB host) must not leave a
+  stale "ok" behind.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.logging import get_logger
+
+logger = get_logger("app.health")
+
+# Probes whose failure makes the worker unable to serve requests.
+CRITICAL_PROBES = ("database", "storage")
+
+
+class ProbeFailed(RuntimeError):
+    """
+    A probe ran but found a problem; carries the measurements it took.
+    """
+
+    def __init__(self, message: str, detail: Dict[str, Any]) -> None:
+        super().__init__(message)
+        self.detail = detail
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    ms: float
+    checked_at: float
+    detail: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def probe_database() -> Dict[str, Any]:
+    from sqlalchemy import text
+
+    from app.db.session import get_engine
+
+    with get_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return {}
+
+
+def probe_pool(saturation_threshold: float) -> Dict[str, Any]:
+    """
+    Report pool usage; raises when checked-out connections reach the
+    threshold fraction of the pool's capacity (size + max overflow).
+    """
+    from app.db.session import get_engine, pool_status
+
+    get_engine()
+    status = pool_status()
+    if not status:
+        # Pools without a fixed size (e.g. SQLite's) cannot saturate.
+        return {}
+    capacity, checked_out = status["capacity"], status["checked_out"]
+    saturation = checked_out / capacity if capacity else 0.0
+    detail = {**status, "saturation": round(saturation, 3)}
+    if saturation >= saturation_threshold:
+        raise ProbeFailed(f"Connection pool {saturation:.0%} saturated ({checked_out}/{capacity}).", detail)
+    return detail
+
+
+def probe_storage() -> Dict[str, Any]:
+    from app.services.storage import get_default_storage_backend
+
+    storage = get_default_storage_backend()
+    path = f".health/probe-{os.getpid()}"
+    payload = str(time.time()).encode("ascii")
+    storage.save(path, payload)
+    try:
+        with storage.open(path) as f:
+            if f.read() != payload:
+                raise RuntimeError("Storage read back different bytes than written.")
+    finally:
+        storage.delete(path)
+    return {}
+
+
+class HealthMonitor:
+    """
+    Runs the probes every `interval` seconds and keeps the latest result of each.
+    """
+
+    def __init__(self, interval: float, saturation_threshold: float, stale_after_intervals: float = 3.0) -> None:
+        self.interval = interval
+        self.stale_after = interval * stale_after_intervals
+        self.probes: Dict[str, Callable[[], Dict[str, Any]]] = {
+            "database": probe_database,
+            "db_pool": lambda: probe_pool(saturation_threshold),
+            "storage": probe_storage,
+        }
+        self.results: Dict[str, ProbeResult] = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "HealthMonitor":
+        return cls(
+            interval=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+            saturation_threshold=settings.HEALTH_POOL_SATURATION_THRESHOLD,
+            stale_after_intervals=settings.HEALTH_STALE_AFTER_INTERVALS,
+        )
+
+    async def _probe(self, name: str, probe: Callable[[], Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        detail, error = None, None
+        try:
+            detail = await run_in_threadpool(probe)
+        except ProbeFailed as exc:
+            detail, error = exc.detail, str(exc)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        result = ProbeResult(
+            ok=error is None,
+            ms=round((time.perf_counter() - start) * 1000, 1),
+            checked_at=time.time(),
+            detail=detail or None,
+            error=error,
+        )
+
+        previous = self.results.get(name)
+        if not result.ok and (previous is None or previous.ok):
+            logger.warning("Health probe %s failing: %s", name, result.error)
+        elif result.ok and previous is not None and not previous.ok:
+            logger.info("Health probe %s recovered", name)
+        self.results[name] = result
+
+    async def probe_once(self) -> None:
+        """
+        Run every probe concurrently (each in the threadpool) and store the results.
+        """
+        await asyncio.gather(*(self._probe(name, probe) for name, probe in self.probes.items()))
+
+    async def run(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+    def _fresh(self, result: ProbeResult, now: float) -> bool:
+        return now - result.checked_at <= self.stale_after
+
+    def is_ready(self) -> bool:
+        """
+        True when every critical probe has a fresh passing result.
+        """
+        now = time.time()
+        for name in CRITICAL_PROBES:
+            result = self.results.get(name)
+            if result is None or not result.ok or not self._fresh(result, now):
+                return False
+        return True
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Cached results plus an overall status: "ok", "degraded" (a
+        non-critical probe failing), "failing" (a critical probe failing or
+        stale) or "starting" (no results yet).
+        """
+        now = time.time()
+        checks = {}
+        status = "ok" if self.results else "starting"
+        for name, result in self.results.items():
+            check = {key: value for key, value in asdict(result).items() if value is not None}
+            check["age_s"] = round(now - result.checked_at, 1)
+            healthy = result.ok and self._fresh(result, now)
+            if not self._fresh(result, now):
+                check["stale"] = True
+            if not healthy:
+                if name in CRITICAL_PROBES:
+                    status = "failing"
+                elif status == "ok":
+                    status = "degraded"
+            checks[name] = check
+        return {"status": status, "checks": checks}
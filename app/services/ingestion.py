@@ -0,0 +1,299 @@
+"""
+Document ingestion into knowledge-base indexes.
+
+- index_document() extracts text, chunks and embeds it, and adds the chunks
+  to the owning knowledge base's index. Near-duplicates of documents already
+  in the knowledge base are flagged and can optionally be left unindexed.
+- reindex_documents() brings an index in line with the database: it skips
+  documents whose content hash is unchanged, re-embeds only new chunks of
+  changed documents and drops documents that no longer exist.
+- remove_document_from_index() drops a document's vectors and postings.
+- bump_index_version() invalidates cached search results for a knowledge base.
+- Embedding runs without the index's cross-process write lock; only the
+  final insert and save happen under edit_kb_index().
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.models.document import Document
+from app.models.knowledge_base import KnowledgeBase
+from app.services.chunking import chunk_text, extract_text
+from app.services.dedup import get_minhasher
+from app.services.embeddings import get_embedder
+from app.services.kb_index import KnowledgeBaseIndex, edit_kb_index, get_kb_index
+from app.services.storage import get_default_storage_backend
+
+logger = get_logger("app.ingestion")
+
+# Re-indexing saves its changes in batches of about this many chunks (one
+# index delta each), bounding the vectors held in memory before a save.
+REINDEX_BATCH_CHUNKS = 2048
+
+
+@dataclass
+class ReindexReport:
+    """
+    Work done (and avoided) by a re-index run.
+    """
+
+    documents_total: int = 0
+    documents_indexed: int = 0
+    documents_skipped: int = 0
+    documents_removed: int = 0
+    documents_missing: int = 0
+    documents_duplicate: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
+    bytes_read: int = 0
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class IndexOutcome:
+    """
+    Result of indexing one document.
+    """
+
+    chunk_count: int = 0
+    # Most similar existing document at or above DEDUP_THRESHOLD, if any.
+    duplicate_of: Optional[str] = None
+    similarity: Optional[float] = None
+    skipped_duplicate: bool = False
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _prepare(
+    index: KnowledgeBaseIndex,
+    document: Document,
+    data: bytes,
+    report: ReindexReport,
+    skip_duplicates: bool = False,
+) -> Tuple[IndexOutcome, Dict[str, Any]]:
+    """
+    Chunk and embed a document, embedding only chunks whose hash is not
+    already present in `index`. Returns the outcome and the arguments of
+    the index.add_document() call that stores it; no lock is held while
+    embedding.
+
+    With `skip_duplicates`, a near-duplicate is recorded (hash and MinHash
+    signature) but none of its chunks are indexed.
+    """
+    settings = get_settings()
+    outcome = IndexOutcome()
+
+    text = extract_text(data, document.mime_type, document.filename)
+    signature = get_minhasher().signature(text) if text else None
+    if signature is not None:
+        matches = index.near_duplicates(signature, settings.DEDUP_THRESHOLD, exclude=str(document.id))
+        if matches:
+            outcome.duplicate_of, outcome.similarity = matches[0]
+            outcome.skipped_duplicate = skip_duplicates
+            report.documents_duplicate += 1
+            logger.info(
+                "Document %s is a near-duplicate of %s (similarity %.2f)%s",
+                document.id,
+                outcome.duplicate_of,
+                outcome.similarity,
+                "; not indexing it" if skip_duplicates else "",
+            )
+
+    if text is None:
+        logger.info("Not indexing text of %s: unsupported type %s", document.id, document.mime_type)
+        chunks = []
+    elif outcome.skipped_duplicate:
+        chunks = []
+    else:
+        chunks = chunk_text(text, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP)
+
+    hashes = [chunk_hash(chunk) for chunk in chunks]
+    known = index.vectors_by_chunk_hash(hashes) if chunks else {}
+    missing = [i for i, h in enumerate(hashes) if h not in known]
+
+    vectors = np.zeros((len(chunks), index.dim), dtype=np.float32)
+    if missing:
+        vectors[missing] = get_embedder().embed([chunks[i] for i in missing])
+    for i, h in enumerate(hashes):
+        if h in known:
+            vectors[i] = known[h]
+
+    entry = dict(
+        document_id=str(document.id),
+        collection_id=str(document.collection_id),
+        filename=document.filename,
+        mime_type=document.mime_type,
+        created_at=document.created_at,
+        chunks=chunks,
+        vectors=vectors,
+        chunk_hashes=hashes,
+        content_hash=document.content_hash,
+        signature=signature,
+    )
+
+    report.chunks_embedded += len(missing)
+    report.chunks_reused += len(chunks) - len(missing)
+    outcome.chunk_count = len(chunks)
+    return outcome, entry
+
+
+def apply_outcome(document: Document, outcome: IndexOutcome) -> None:
+    """
+    Record an indexing outcome on the document row (caller commits).
+    """
+    document.duplicate_of_id = UUID(outcome.duplicate_of) if outcome.duplicate_of else None
+    document.duplicate_similarity = outcome.similarity
+    if outcome.skipped_duplicate:
+        document.status = "duplicate"
+    else:
+        document.status = "indexed" if outcome.chunk_count else "ready"
+
+
+def index_document(
+    document: Document,
+    knowledge_base_id: UUID,
+    data: bytes,
+    skip_duplicates: bool = False,
+) -> IndexOutcome:
+    """
+    Index a stored document. The outcome's chunk_count is 0 if the format
+    cannot be read as text yet or the document was skipped as a duplicate.
+    """
+    outcome, entry = _prepare(
+        get_kb_index(knowledge_base_id), document, data, ReindexReport(), skip_duplicates=skip_duplicates
+    )
+    with edit_kb_index(knowledge_base_id) as index:
+        index.add_document(**entry)
+    return outcome
+
+
+def reindex_documents(
+    db: Session,
+    knowledge_base_id: UUID,
+    documents: Sequence[Document],
+    collection_ids: Optional[Iterable[UUID]] = None,
+) -> ReindexReport:
+    """
+    Re-index `documents` of a knowledge base incrementally.
+
+    Documents whose stored content hash matches the index are skipped
+    without reading their file. Documents previously skipped as
+    near-duplicates stay unindexed unless they no longer match anything. Indexed documents that are no longer in the
+    database are removed; with `collection_ids`, removal is limited to those
+    collections. Commits the session (content hashes, statuses, version bump).
+    """
+    started = time.perf_counter()
+    report = ReindexReport(documents_total=len(documents))
+    index = get_kb_index(knowledge_base_id)
+    storage = get_default_storage_backend()
+
+    # Changes not saved yet: add_document() arguments and ids of documents to remove.
+    pending: List[Dict[str, Any]] = []
+    pending_chunks = 0
+    missing: List[str] = []
+
+    def apply_pending(latest: KnowledgeBaseIndex) -> None:
+        nonlocal pending_chunks
+        for document_id in missing:
+            latest.remove_document(document_id)
+        for prepared in pending:
+            latest.add_document(**prepared)
+        pending.clear()
+        missing.clear()
+        pending_chunks = 0
+
+    for document in documents:
+        entry = index.documents.get(str(document.id))
+        if entry is not None and document.content_hash and entry.content_hash == document.content_hash:
+            report.documents_skipped += 1
+            continue
+
+        try:
+            with storage.open(document.storage_path) as f:
+                data = f.read()
+        except FileNotFoundError:
+            logger.warning("Stored file for document %s is missing", document.id)
+            missing.append(str(document.id))
+            document.status = "missing"
+            report.documents_missing += 1
+            continue
+
+        report.bytes_read += len(data)
+        document.content_hash = content_hash(data)
+        if entry is not None and entry.content_hash == document.content_hash:
+            report.documents_skipped += 1
+            continue
+
+        outcome, prepared = _prepare(
+            index, document, data, report, skip_duplicates=document.status == "duplicate"
+        )
+        apply_outcome(document, outcome)
+        report.documents_indexed += 1
+        pending.append(prepared)
+        pending_chunks += outcome.chunk_count
+        if pending_chunks >= REINDEX_BATCH_CHUNKS:
+            with edit_kb_index(knowledge_base_id) as latest:
+                apply_pending(latest)
+
+    present = {str(document.id) for document in documents}
+    scope = {str(c) for c in collection_ids} if collection_ids is not None else None
+    with edit_kb_index(knowledge_base_id) as latest:
+        apply_pending(latest)
+        stale = [
+            doc_id
+            for doc_id, entry in latest.documents.items()
+            if doc_id not in present and (scope is None or entry.collection_id in scope)
+        ]
+        for doc_id in stale:
+            latest.remove_document(doc_id)
+    report.documents_removed = len(stale)
+
+    if report.documents_indexed or report.documents_removed or report.documents_missing:
+        bump_index_version(db, knowledge_base_id)
+
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    report.elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+    logger.info("Re-indexed KB %s: %s", knowledge_base_id, report)
+    return report
+
+
+def remove_document_from_index(knowledge_base_id: UUID, document_id: UUID) -> bool:
+    """
+    Remove a document from its knowledge base index. Returns False if it was not indexed.
+    """
+    with edit_kb_index(knowledge_base_id) as index:
+        return index.remove_document(str(document_id))
+
+
+def bump_index_version(db: Session, knowledge_base_id: UUID) -> None:
+    """
+    Atomically increment the knowledge base's index version (caller commits).
+
+    Must run after the index itself has been updated, so a reader that sees
+    the new version also sees the new index contents.
+    """
+    db.query(KnowledgeBase).filter(KnowledgeBase.id == knowledge_base_id).update(
+        {KnowledgeBase.index_version: KnowledgeBase.index_version + 1},
+        synchronize_session=False,
+    )
@@ -0,0 +1,140 @@
+"""
+Built-in background job handlers (see app.services.jobs).
+
+- index_document {document_id, skip_duplicates?}: index a stored document
+  into its knowledge base again, e.g. one whose upload ended "failed".
+- reindex_knowledge_base {knowledge_base_id} / reindex_collection
+  {collection_id}: incremental re-index, as the reindex endpoints.
+- delete_document {document_id}: drop a document's index entries, stored
+  file and row, as the delete endpoint. Already deleted is success.
+- export_dataset {dataset_id, format?, columns?, compression?}: write the
+  current version of a dataset to storage under exports/; the result has
+  the storage path and size.
+
+Handlers are idempotent, since a job can run again after a worker dies
+between doing the work and recording it.
+"""
+
+from __future__ import annotations
+
+import uuid
+from dataclasses import asdict
+from typing import Any, Dict, Iterator
+
+from sqlalchemy.orm import Session
+
+from app.models.collection import Collection
+from app.models.dataset import Dataset
+from app.models.document import Document
+from app.models.knowledge_base import KnowledgeBase
+from app.services.dataset_export import ExportError, export_chunks, export_filename
+from app.services.dataset_versions import ColumnarCopyMissingError, VersionNotFoundError, load_version
+from app.services.ingestion import (
+    apply_outcome,
+    bump_index_version,
+    index_document,
+    reindex_documents,
+    remove_document_from_index,
+)
+from app.services.jobs import PermanentJobError, job_handler
+from app.services.storage import get_default_storage_backend
+
+
+def _uuid(payload: Dict[str, Any], key: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(str(payload[key]))
+    except (KeyError, ValueError):
+        raise PermanentJobError(f"Payload needs a valid {key!r}.") from None
+
+
+def _commit(db: Session) -> None:
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+@job_handler("index_document")
+def run_index_document(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    document = db.query(Document).filter(Document.id == _uuid(payload, "document_id")).first()
+    if document is None:
+        raise PermanentJobError("Document not found.")
+    collection = db.query(Collection).filter(Collection.id == document.collection_id).one()
+
+    try:
+        with get_default_storage_backend().open(document.storage_path) as f:
+            data = f.read()
+    except FileNotFoundError:
+        raise PermanentJobError("Stored file of the document is missing.") from None
+
+    outcome = index_document(document, collection.knowledge_base_id, data, bool(payload.get("skip_duplicates")))
+    apply_outcome(document, outcome)
+    bump_index_version(db, collection.knowledge_base_id)
+    _commit(db)
+    return {"status": document.status, "chunks": outcome.chunk_count}
+
+
+@job_handler("reindex_knowledge_base")
+def run_reindex_knowledge_base(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    knowledge_base_id = _uuid(payload, "knowledge_base_id")
+    if db.query(KnowledgeBase).filter(KnowledgeBase.id == knowledge_base_id).first() is None:
+        raise PermanentJobError("Knowledge base not found.")
+    documents = (
+        db.query(Document)
+        .join(Collection, Document.collection_id == Collection.id)
+        .filter(Collection.knowledge_base_id == knowledge_base_id)
+        .all()
+    )
+    return asdict(reindex_documents(db, knowledge_base_id, documents))
+
+
+@job_handler("reindex_collection")
+def run_reindex_collection(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    collection = db.query(Collection).filter(Collection.id == _uuid(payload, "collection_id")).first()
+    if collection is None:
+        raise PermanentJobError("Collection not found.")
+    documents = db.query(Document).filter(Document.collection_id == collection.id).all()
+    report = reindex_documents(db, collection.knowledge_base_id, documents, collection_ids=[collection.id])
+    return asdict(report)
+
+
+@job_handler("delete_document")
+def run_delete_document(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    document = db.query(Document).filter(Document.id == _uuid(payload, "document_id")).first()
+    if document is None:
+        return {"deleted": False}
+    collection = db.query(Collection).filter(Collection.id == document.collection_id).one()
+
+    remove_document_from_index(collection.knowledge_base_id, document.id)
+    get_default_storage_backend().delete(document.storage_path)
+    db.delete(document)
+    bump_index_version(db, collection.knowledge_base_id)
+    _commit(db)
+    return {"deleted": True}
+
+
+@job_handler("export_dataset")
+def run_export_dataset(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
+    dataset = db.query(Dataset).filter(Dataset.id == _uuid(payload, "dataset_id")).first()
+    if dataset is None:
+        raise PermanentJobError("Dataset not found.")
+    fmt = payload.get("format", "csv")
+    compression = payload.get("compression", "none")
+    try:
+        chunks = export_chunks(load_version(dataset), fmt, payload.get("columns"), compression)
+    except (VersionNotFoundError, ColumnarCopyMissingError, ExportError) as exc:
+        raise PermanentJobError(str(exc)) from exc
+
+    filename = export_filename(dataset.filename.rsplit(".", 1)[0] or "dataset", fmt, compression)
+    relative_path = f"exports/{dataset.id}/{uuid.uuid4().hex}/{filename}"
+    size = 0
+
+    def counted() -> Iterator[bytes]:
+        nonlocal size
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+
+    storage_path = get_default_storage_backend().save_stream(relative_path, counted())
+    return {"storage_path": storage_path, "filename": filename, "size_bytes": size, "version": dataset.current_version}
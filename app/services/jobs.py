@@ -0,0 +1,414 @@
+"""
+Durable background job queue on the application database.
+
+- Jobs are rows of the jobs table (app.models.job): enqueue() inserts
+  them in the caller's transaction, so a job is only visible once the work
+  that created it has committed, and survives restarts like any other row.
+- Workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, highest
+  priority first, several per query (batch dequeue): concurrent workers
+  never wait on or receive each other's rows, and no broker is needed.
+  The claim marks the job running with a lease (locked_until); a worker
+  extends the leases of the jobs it is running, and a job whose lease
+  expires (worker killed) becomes claimable again: the visibility timeout.
+- Each claim increments attempts. A failed job is retried after an
+  exponential backoff with jitter until max_attempts, then marked dead
+  with its last error; PermanentJobError marks it dead at once. Completing
+  or failing a job is fenced on (id, attempts), so a worker whose lease
+  ran out cannot overwrite the outcome of the worker that took over.
+- Handlers are registered per job kind with @job_handler (the built-in
+  ones are in app.services.job_handlers) and run by Worker, the loop
+  behind scripts/worker.py.
+
+On SQLite (development) FOR UPDATE is not available; claims stay correct
+because the claiming UPDATE re-checks that the job is still claimable.
+scripts/bench_jobs.py measures enqueue and processing throughput.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, cast
+
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.models.job import Job
+
+logger = get_logger("app.jobs")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+DEAD = "dead"
+
+# kind -> handler(db, payload) returning an optional JSON-able result
+Handler = Callable[[Session, Dict[str, Any]], Optional[Dict[str, Any]]]
+HANDLERS: Dict[str, Handler] = {}
+
+
+class PermanentJobError(Exception):
+    """
+    Raised by a handler when retrying cannot help (e.g. the target row is gone).
+    """
+
+
+def job_handler(kind: str) -> Callable[[Handler], Handler]:
+    """
+    Register the decorated function as the handler of `kind` jobs.
+    """
+
+    def register(function: Handler) -> Handler:
+        HANDLERS[kind] = function
+        return function
+
+    return register
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    priority: int = 0,
+    delay_seconds: float = 0.0,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Add a job to the session (the caller commits).
+    """
+    job = Job(
+        id=uuid.uuid4(),
+        kind=kind,
+        payload=payload or {},
+        status=QUEUED,
+        priority=priority,
+        attempts=0,
+        max_attempts=max_attempts or get_settings().JOBS_MAX_ATTEMPTS,
+        run_at=_utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_many(
+    db: Session,
+    kind: str,
+    payloads: Iterable[Dict[str, Any]],
+    *,
+    priority: int = 0,
+    max_attempts: Optional[int] = None,
+) -> int:
+    """
+    Insert many jobs of one kind with a single multi-row INSERT (the
+    caller commits). Returns the number of jobs.
+    """
+    now = _utcnow()
+    attempts = max_attempts or get_settings().JOBS_MAX_ATTEMPTS
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "kind": kind,
+            "payload": payload,
+            "status": QUEUED,
+            "priority": priority,
+            "attempts": 0,
+            "max_attempts": attempts,
+            "run_at": now,
+        }
+        for payload in payloads
+    ]
+    if rows:
+        db.execute(insert(Job), rows)
+    return len(rows)
+
+
+def _claimable(now: datetime):
+    return and_(
+        Job.attempts < Job.max_attempts,
+        or_(
+            and_(Job.status == QUEUED, Job.run_at <= now),
+            and_(Job.status == RUNNING, Job.locked_until < now),  # lease expired
+        ),
+    )
+
+
+def claim(
+    db: Session,
+    worker_id: str,
+    limit: int,
+    visibility_timeout: float,
+    kinds: Optional[Sequence[str]] = None,
+) -> List[Job]:
+    """
+    Claim up to `limit` due jobs for `worker_id` and commit. The returned
+    jobs are detached snapshots (attempts is this claim's fencing token).
+    """
+    now = _utcnow()
+    candidates = (
+        select(Job.id)
+        .where(_claimable(now))
+        .order_by(Job.priority.desc(), Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if kinds:
+        candidates = candidates.where(Job.kind.in_(list(kinds)))
+    try:
+        ids = list(db.execute(candidates).scalars())
+        if not ids:
+            db.commit()
+            return []
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id.in_(ids), _claimable(now))
+            .values(
+                status=RUNNING,
+                attempts=Job.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + timedelta(seconds=visibility_timeout),
+            )
+            .returning(Job)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        for job in claimed:
+            db.expunge(job)  # before commit, which would expire them
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return sorted(claimed, key=lambda job: (-job.priority, job.run_at))
+
+
+def _owned(job: Job):
+    # Fencing: only the claim that is still current may settle the job.
+    return and_(Job.id == job.id, Job.status == RUNNING, Job.attempts == job.attempts)
+
+
+def _settle(db: Session, job: Job, **values) -> bool:
+    try:
+        result = db.execute(
+            update(Job).where(_owned(job)).values(**values).execution_options(synchronize_session=False)
+        )
+        changed = cast(CursorResult[Any], result).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if not changed:
+        logger.warning("Job %s (attempt %s) was taken over by another worker; outcome dropped", job.id, job.attempts)
+    return bool(changed)
+
+
+def complete(db: Session, job: Job, result: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Mark a claimed job done. False if this worker no longer owns it.
+    """
+    return _settle(
+        db, job, status=DONE, result=result, finished_at=_utcnow(), locked_by=None, locked_until=None
+    )
+
+
+def backoff_seconds(attempt: int, base: float, cap: float) -> float:
+    """
+    Delay before retrying after failed attempt number `attempt` (1-based):
+    exponential, capped, with jitter so failed batches don't retry in lockstep.
+    """
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def fail(db: Session, job: Job, error: str, permanent: bool = False) -> str:
+    """
+    Record a failed attempt: requeue with backoff, or mark dead when the
+    attempts are used up or the error is permanent. Returns the new status.
+    """
+    settings = get_settings()
+    if permanent or job.attempts >= job.max_attempts:
+        status, values = DEAD, {"finished_at": _utcnow()}
+    else:
+        delay = backoff_seconds(job.attempts, settings.JOBS_BACKOFF_BASE_SECONDS, settings.JOBS_BACKOFF_MAX_SECONDS)
+        status, values = QUEUED, {"run_at": _utcnow() + timedelta(seconds=delay)}
+    _settle(db, job, status=status, last_error=error[-4000:], locked_by=None, locked_until=None, **values)
+    return status
+
+
+def extend(db: Session, jobs: Sequence[Job], visibility_timeout: float) -> None:
+    """
+    Renew the leases of jobs this worker is still running.
+    """
+    if not jobs:
+        return
+    try:
+        for job in jobs:
+            db.execute(
+                update(Job)
+                .where(_owned(job))
+                .values(locked_until=_utcnow() + timedelta(seconds=visibility_timeout))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def reap(db: Session) -> int:
+    """
+    Mark dead the running jobs whose lease expired on their last attempt
+    (their worker died; nobody may claim them again). Returns the count.
+    """
+    now = _utcnow()
+    try:
+        result = db.execute(
+            update(Job)
+            .where(Job.status == RUNNING, Job.locked_until < now, Job.attempts >= Job.max_attempts)
+            .values(status=DEAD, finished_at=now, last_error="Lease expired on the last attempt.")
+            .execution_options(synchronize_session=False)
+        )
+        count = cast(CursorResult[Any], result).rowcount
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return count
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+@dataclass
+class WorkerStats:
+    claimed: int = 0
+    done: int = 0
+    retried: int = 0
+    dead: int = 0
+    lost: int = 0  # finished after another worker took the job over
+    by_kind: Dict[str, int] = field(default_factory=dict)
+
+
+class Worker:
+    """
+    Claims jobs in batches and runs their handlers on a thread pool.
+
+    - At most `concurrency` jobs run at once; the loop claims only as many
+      as there are free threads, so claimed jobs never sit waiting.
+    - Leases of running jobs are extended every third of the visibility
+      timeout; expired last-attempt jobs are reaped now and then.
+    - run() returns when `stop` is set (after the running jobs finish) or,
+      with drain=True, once no job is due and none is running.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        visibility_timeout: Optional[float] = None,
+        kinds: Optional[Sequence[str]] = None,
+    ) -> None:
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = concurrency or settings.JOBS_WORKER_CONCURRENCY
+        self.batch_size = batch_size or settings.JOBS_BATCH_SIZE
+        self.poll_interval = settings.JOBS_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        self.visibility_timeout = visibility_timeout or settings.JOBS_VISIBILITY_TIMEOUT_SECONDS
+        self.kinds = list(kinds) if kinds else None
+        self.stats = WorkerStats()
+        self._running: Dict[Future[None], Job] = {}
+        self._lock = threading.Lock()
+
+    def _execute(self, job: Job) -> None:
+        handler = HANDLERS.get(job.kind)
+        with self.session_factory() as db:
+            try:
+                if handler is None:
+                    raise PermanentJobError(f"No handler registered for job kind {job.kind!r}.")
+                result = handler(db, dict(job.payload or {}))
+            except Exception as exc:
+                db.rollback()
+                permanent = isinstance(exc, PermanentJobError)
+                error = str(exc) if permanent else traceback.format_exc()
+                status = fail(db, job, error, permanent=permanent)
+                logger.warning(
+                    "Job %s (%s) failed on attempt %s/%s -> %s: %s",
+                    job.id, job.kind, job.attempts, job.max_attempts, status, exc,
+                )
+                with self._lock:
+                    if status == DEAD:
+                        self.stats.dead += 1
+                    else:
+                        self.stats.retried += 1
+                return
+            settled = complete(db, job, result)
+        with self._lock:
+            if settled:
+                self.stats.done += 1
+                self.stats.by_kind[job.kind] = self.stats.by_kind.get(job.kind, 0) + 1
+            else:
+                self.stats.lost += 1
+
+    def _housekeeping(self) -> None:
+        with self._lock:
+            running = list(self._running.values())
+        with self.session_factory() as db:
+            extend(db, running, self.visibility_timeout)
+            reaped = reap(db)
+        if reaped:
+            logger.warning("Marked %s abandoned job(s) dead", reaped)
+
+    def run(self, stop: Optional[threading.Event] = None, drain: bool = False) -> WorkerStats:
+        stop = stop or threading.Event()
+        logger.info("Worker %s started (concurrency %s, batch %s)", self.worker_id, self.concurrency, self.batch_size)
+        last_housekeeping = time.monotonic()
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix="job") as pool:
+            while not stop.is_set():
+                with self._lock:
+                    self._running = {f: j for f, j in self._running.items() if not f.done()}
+                    free = self.concurrency - len(self._running)
+                jobs: List[Job] = []
+                if free > 0:
+                    with self.session_factory() as db:
+                        jobs = claim(db, self.worker_id, min(free, self.batch_size), self.visibility_timeout, self.kinds)
+                    self.stats.claimed += len(jobs)
+                    for job in jobs:
+                        future = pool.submit(self._execute, job)
+                        with self._lock:
+                            self._running[future] = job
+
+                if time.monotonic() - last_housekeeping > self.visibility_timeout / 3:
+                    self._housekeeping()
+                    last_housekeeping = time.monotonic()
+
+                if jobs and len(jobs) == min(free, self.batch_size):
+                    continue  # more may be due: claim again as threads free up
+                with self._lock:
+                    busy = list(self._running)
+                if drain and not jobs and not busy:
+                    break
+                if busy and (free <= 0 or drain):
+                    # Wake as soon as a thread frees up rather than sleeping a full interval.
+                    wait(busy, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                else:
+                    stop.wait(self.poll_interval)
+        logger.info("Worker %s stopped: %s", self.worker_id, self.stats)
+        return self.stats
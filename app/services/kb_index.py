@@ -0,0 +1,472 @@
+"""
+Per-knowledge-base search index.
+
+- KnowledgeBaseIndex combines a VectorStore and a LexicalIndex over the
+  chunks of every indexed document in a knowledge base, plus the document
+  metadata (collection, MIME type, upload time) used for filtering.
+- It also holds the knowledge base's MinHash LSH index, used to flag
+  near-duplicate documents at ingest.
+- Indexes live under {INDEX_ROOT}/knowledge_bases/{kb_id}/ as a full
+  snapshot plus append-only deltas (only the rows and document changes of
+  each save). They are loaded lazily by get_kb_index(); a worker catches
+  up when another worker has written a newer generation to disk.
+- edit_kb_index() is the only way to change an index: it holds a
+  cross-process file lock from reloading the latest generation to saving
+  the next one, so concurrent writers never overwrite each other. The
+  persistence scheme itself lives in generational_index.py.
+"""
+
+from __future__ import annotations
+
+import json
+from contextlib import AbstractContextManager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.chunking import tokenize
+from app.services.dedup import LSHIndex
+from app.services.generational_index import GenerationalIndex, IndexRegistry
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_store import VectorStore
+
+# Compact tombstoned rows on save once they exceed this fraction of the index.
+COMPACT_DEAD_FRACTION = 0.25
+
+
+@dataclass
+class IndexedDocument:
+    """
+    Metadata kept for every document present in the index.
+    """
+
+    document_id: str
+    collection_id: str
+    filename: str
+    mime_type: Optional[str]
+    created_at: float  # unix timestamp (UTC)
+    rows: List[int] = field(default_factory=list)
+    # sha256 of the stored file; lets re-indexing skip unchanged documents.
+    content_hash: Optional[str] = None
+
+
+@dataclass
+class SearchFilters:
+    """
+    Restrictions applied while generating search candidates.
+
+    mime_types entries may end with "/*" to match a whole family (e.g. "text/*").
+    """
+
+    collection_ids: Optional[Sequence[str]] = None
+    mime_types: Optional[Sequence[str]] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def is_empty(self) -> bool:
+        return not (
+            self.collection_ids
+            or self.mime_types
+            or self.created_after
+            or self.created_before
+        )
+
+
+def to_timestamp(value: datetime) -> float:
+    """
+    Convert a datetime to a UTC unix timestamp; naive values are treated as UTC.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _mime_matches(mime_type: Optional[str], patterns: Sequence[str]) -> bool:
+    mime = (mime_type or "").lower()
+    for pattern in patterns:
+        pattern = pattern.lower()
+        if pattern.endswith("/*"):
+            if mime.startswith(pattern[:-1]):
+                return True
+        elif mime == pattern:
+            return True
+    return False
+
+
+class KnowledgeBaseIndex(GenerationalIndex):
+    """
+    Chunk-level hybrid (vector + BM25) index for one knowledge base.
+
+    All public methods take the instance lock; numpy releases the GIL during
+    scoring, so concurrent searches on different indexes still overlap.
+    """
+
+    def __init__(
+        self,
+        kb_id: str,
+        directory: Path,
+        dim: int,
+        quantization: str = "float32",
+        rerank_factor: int = 10,
+        num_perm: int = 128,
+        lsh_bands: int = 16,
+    ) -> None:
+        super().__init__(directory, dim, quantization=quantization, rerank_factor=rerank_factor)
+        self.kb_id = kb_id
+        self.label = f"Index of knowledge base {kb_id}"
+        self.num_perm = num_perm
+        self.lsh_bands = lsh_bands
+        self.lexical = LexicalIndex()
+        self.minhash = LSHIndex(num_perm=num_perm, bands=lsh_bands)
+        self.documents: Dict[str, IndexedDocument] = {}
+        self.row_doc: List[str] = []
+        self.row_chunk: List[int] = []
+        self.row_text: List[str] = []
+        self.row_hash: List[str] = []
+        # chunk hash -> an alive row holding it; built lazily, dropped on compaction
+        self._row_by_hash: Optional[Dict[str, int]] = None
+        # Document changes not saved yet.
+        self._ops: List[Dict[str, Any]] = []
+
+    # --- Mutation ---
+
+    def add_document(
+        self,
+        document_id: str,
+        collection_id: str,
+        filename: str,
+        mime_type: Optional[str],
+        created_at: datetime,
+        chunks: Sequence[str],
+        vectors: np.ndarray,
+        chunk_hashes: Sequence[str],
+        content_hash: Optional[str] = None,
+        signature: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Index the chunks of a document, replacing any previous version of it.
+
+        A document with no chunks is still recorded (with its content hash),
+        so re-indexing can skip it while it stays unchanged. Its MinHash
+        `signature`, if given, is added to the near-duplicate index.
+        """
+        with self.lock:
+            self._drop(document_id)
+            rows = self.vectors.add(vectors)
+            for chunk_index, (row, text, chunk_hash) in enumerate(zip(rows.tolist(), chunks, chunk_hashes)):
+                self.row_doc.append(document_id)
+                self.row_chunk.append(chunk_index)
+                self.row_text.append(text)
+                self.row_hash.append(chunk_hash)
+                self.lexical.add(row, tokenize(text))
+                if self._row_by_hash is not None:
+                    self._row_by_hash.setdefault(chunk_hash, row)
+            self.documents[document_id] = IndexedDocument(
+                document_id=document_id,
+                collection_id=collection_id,
+                filename=filename,
+                mime_type=mime_type,
+                created_at=to_timestamp(created_at),
+                rows=rows.tolist(),
+                content_hash=content_hash,
+            )
+            if signature is not None:
+                self.minhash.add(document_id, signature)
+            self._ops.append(
+                {"op": "add", "document": asdict(self.documents[document_id]), "signature": signature}
+            )
+
+    def remove_document(self, document_id: str) -> bool:
+        """
+        Drop a document's vectors and postings. Returns False if it was not indexed.
+        """
+        with self.lock:
+            removed = self._drop(document_id)
+            if removed:
+                self._ops.append({"op": "remove", "document_id": document_id})
+            return removed
+
+    def _drop(self, document_id: str) -> bool:
+        with self.lock:
+            doc = self.documents.pop(document_id, None)
+            if doc is None:
+                return False
+            self.minhash.remove(document_id)
+            self.vectors.remove(np.asarray(doc.rows, dtype=np.int64))
+            for row in doc.rows:
+                self.lexical.remove(row, tokenize(self.row_text[row]))
+                self.row_text[row] = ""
+                if self._row_by_hash is not None and self._row_by_hash.get(self.row_hash[row]) == row:
+                    del self._row_by_hash[self.row_hash[row]]
+            return True
+
+    def compact(self) -> None:
+        """
+        Physically drop tombstoned rows and renumber the remaining ones.
+        """
+        with self.lock:
+            remap = self.vectors.compact()
+            keep = np.flatnonzero(remap >= 0).tolist()
+            self.row_doc = [self.row_doc[i] for i in keep]
+            self.row_chunk = [self.row_chunk[i] for i in keep]
+            self.row_text = [self.row_text[i] for i in keep]
+            self.row_hash = [self.row_hash[i] for i in keep]
+            for doc in self.documents.values():
+                doc.rows = [int(remap[row]) for row in doc.rows]
+            self._row_by_hash = None
+            self._rebuild_lexical()
+            # Row ids changed: the next save must write a full snapshot.
+            self._full_save_due = True
+
+    def vectors_by_chunk_hash(self, chunk_hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Return already-computed vectors for any of the given chunk hashes,
+        so unchanged chunks of a changed document are not embedded again.
+        """
+        with self.lock:
+            if self._row_by_hash is None:
+                alive = self.vectors.alive
+                self._row_by_hash = {}
+                for row, chunk_hash in enumerate(self.row_hash):
+                    if alive[row]:
+                        self._row_by_hash.setdefault(chunk_hash, row)
+            found = {h: self._row_by_hash[h] for h in set(chunk_hashes) if h in self._row_by_hash}
+            if not found:
+                return {}
+            vectors = self.vectors.vectors(np.fromiter(found.values(), dtype=np.int64))
+            return dict(zip(found.keys(), vectors))
+
+    def near_duplicates(
+        self,
+        signature: np.ndarray,
+        threshold: float,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Indexed documents whose estimated similarity to `signature` is >= threshold, best first.
+        """
+        with self.lock:
+            return self.minhash.query(signature, threshold, exclude=exclude)
+
+    def _rebuild_lexical(self) -> None:
+        self.lexical = LexicalIndex()
+        alive = self.vectors.alive
+        for row, text in enumerate(self.row_text):
+            if alive[row]:
+                self.lexical.add(row, tokenize(text))
+
+    # --- Querying ---
+
+    def allowed_rows(self, filters: SearchFilters) -> Optional[np.ndarray]:
+        """
+        Build a boolean row mask for the filters, or None when nothing is filtered.
+
+        Work is proportional to the number of documents plus the rows of the
+        matching documents, so selective filters are cheap.
+        """
+        if filters.is_empty():
+            return None
+
+        collections = {str(c) for c in filters.collection_ids} if filters.collection_ids else None
+        after = to_timestamp(filters.created_after) if filters.created_after else None
+        before = to_timestamp(filters.created_before) if filters.created_before else None
+
+        mask = np.zeros(len(self.vectors), dtype=bool)
+        for doc in self.documents.values():
+            if collections is not None and doc.collection_id not in collections:
+                continue
+            if filters.mime_types and not _mime_matches(doc.mime_type, filters.mime_types):
+                continue
+            if after is not None and doc.created_at < after:
+                continue
+            if before is not None and doc.created_at > before:
+                continue
+            mask[doc.rows] = True
+        return mask
+
+    # --- Persistence ---
+
+    def has_changes(self) -> bool:
+        """
+        True if rows or documents changed since the last save or load.
+        """
+        return bool(self._ops) or len(self.vectors) != self._saved_rows
+
+    def _needs_snapshot(self) -> bool:
+        if len(self.vectors) and self.vectors.dead_count > COMPACT_DEAD_FRACTION * len(self.vectors):
+            return True
+        return super()._needs_snapshot()
+
+    def _manifest_fields(self) -> Dict[str, Any]:
+        return {"kb_id": self.kb_id}
+
+    def _adopt(self, manifest: Dict[str, Any]) -> None:
+        super()._adopt(manifest)
+        self._ops = []
+
+    def _write_snapshot(self, gen_dir: Path) -> None:
+        if len(self.vectors) and self.vectors.dead_count > COMPACT_DEAD_FRACTION * len(self.vectors):
+            self.compact()
+
+        self.vectors.save(gen_dir)
+        self._write_chunks(gen_dir, 0)
+
+        minhash_ids = list(self.minhash.signatures)
+        if minhash_ids:
+            np.save(gen_dir / "minhash.npy", np.vstack(list(self.minhash.signatures.values())))
+
+        snapshot = {
+            "documents": [asdict(doc) for doc in self.documents.values()],
+            "minhash_documents": minhash_ids,
+        }
+        (gen_dir / "documents.json").write_text(json.dumps(snapshot), encoding="utf-8")
+
+    def _read_snapshot(self, gen_dir: Path, manifest: Dict[str, Any]) -> None:
+        self.vectors = VectorStore.load(
+            gen_dir, self.dim, quantization=self.quantization, rerank_factor=self.rerank_factor
+        )
+        self._read_chunks(gen_dir, range(len(self.vectors)))
+        snapshot = json.loads((gen_dir / "documents.json").read_text(encoding="utf-8"))
+        self.documents = {
+            doc["document_id"]: IndexedDocument(**doc) for doc in snapshot["documents"]
+        }
+        self._rebuild_lexical()
+
+        minhash_ids = snapshot["minhash_documents"]
+        if minhash_ids:
+            signatures = np.load(gen_dir / "minhash.npy")
+            # Signatures of another length (settings changed) are dropped, not compared.
+            if signatures.shape[1] == self.num_perm:
+                for doc_id, signature in zip(minhash_ids, signatures):
+                    self.minhash.add(doc_id, signature)
+
+    def _write_delta(self, delta_dir: Path) -> None:
+        self.vectors.save_delta(delta_dir, self._saved_rows)
+        self._write_chunks(delta_dir, self._saved_rows)
+
+        signatures = []
+        with (delta_dir / "ops.jsonl").open("w", encoding="utf-8") as f:
+            for op in self._ops:
+                record = dict(op)
+                if record.get("signature") is not None:
+                    signatures.append(record["signature"])
+                    record["signature"] = len(signatures) - 1
+                f.write(json.dumps(record) + "\n")
+        if signatures:
+            np.save(delta_dir / "minhash.npy", np.vstack(signatures))
+
+    def _write_chunks(self, directory: Path, start: int) -> None:
+        with (directory / "chunks.jsonl").open("w", encoding="utf-8") as f:
+            rows = zip(self.row_doc[start:], self.row_chunk[start:], self.row_text[start:], self.row_hash[start:])
+            for doc_id, chunk_index, text, chunk_hash in rows:
+                f.write(json.dumps([doc_id, chunk_index, text, chunk_hash]) + "\n")
+
+    def _read_chunks(self, directory: Path, rows: Sequence[int]) -> None:
+        with (directory / "chunks.jsonl").open("r", encoding="utf-8") as f:
+            for row, line in zip(rows, f):
+                doc_id, chunk_index, text, chunk_hash = json.loads(line)
+                self.row_doc.append(doc_id)
+                self.row_chunk.append(chunk_index)
+                self.row_text.append(text)
+                self.row_hash.append(chunk_hash)
+
+    def _apply_delta(self, delta_dir: Path) -> None:
+        """
+        Replay a delta written by save(): append its rows, then apply its
+        document changes in order.
+        """
+        rows = self.vectors.load_delta(delta_dir).tolist()
+        self._read_chunks(delta_dir, rows)
+        for row in rows:
+            self.lexical.add(row, tokenize(self.row_text[row]))
+
+        signatures_path = delta_dir / "minhash.npy"
+        signatures = np.load(signatures_path) if signatures_path.exists() else None
+        with (delta_dir / "ops.jsonl").open("r", encoding="utf-8") as f:
+            for line in f:
+                op = json.loads(line)
+                if op["op"] == "remove":
+                    self._drop(op["document_id"])
+                    continue
+                doc = IndexedDocument(**op["document"])
+                self._drop(doc.document_id)
+                self.documents[doc.document_id] = doc
+                # Signatures of another length (settings changed) are dropped, not compared.
+                if signatures is not None and op["signature"] is not None and signatures.shape[1] == self.num_perm:
+                    self.minhash.add(doc.document_id, signatures[op["signature"]])
+        self._row_by_hash = None
+
+    def _empty_copy(self) -> "KnowledgeBaseIndex":
+        return KnowledgeBaseIndex(
+            self.kb_id,
+            self.directory,
+            self.dim,
+            quantization=self.quantization,
+            rerank_factor=self.rerank_factor,
+            num_perm=self.num_perm,
+            lsh_bands=self.lsh_bands,
+        )
+
+    @classmethod
+    def load(
+        cls,
+        kb_id: str,
+        directory: Path,
+        dim: int,
+        quantization: str = "float32",
+        rerank_factor: int = 10,
+        num_perm: int = 128,
+        lsh_bands: int = 16,
+    ) -> "KnowledgeBaseIndex":
+        index = cls(
+            kb_id,
+            directory,
+            dim,
+            quantization=quantization,
+            rerank_factor=rerank_factor,
+            num_perm=num_perm,
+            lsh_bands=lsh_bands,
+        )
+        index._read()
+        return index
+
+
+def _load(kb_id: str, directory: Path) -> KnowledgeBaseIndex:
+    settings = get_settings()
+    return KnowledgeBaseIndex.load(
+        kb_id,
+        directory,
+        settings.EMBEDDING_DIM,
+        quantization=settings.VECTOR_QUANTIZATION,
+        rerank_factor=settings.VECTOR_RERANK_FACTOR,
+        num_perm=settings.DEDUP_NUM_PERM,
+        lsh_bands=settings.DEDUP_LSH_BANDS,
+    )
+
+
+_registry: IndexRegistry[KnowledgeBaseIndex] = IndexRegistry("knowledge_bases", _load)
+
+
+def get_kb_index(knowledge_base_id: UUID | str) -> KnowledgeBaseIndex:
+    """
+    Return the index for a knowledge base, loading it from disk on first use
+    and catching up if another worker has saved a newer generation.
+    """
+    return _registry.get(str(knowledge_base_id))
+
+
+def edit_kb_index(knowledge_base_id: UUID | str) -> AbstractContextManager[KnowledgeBaseIndex]:
+    """
+    Yield a knowledge base's index for changes while holding its
+    cross-process write lock. The index is first brought up to the latest
+    generation on disk and, if anything changed, saved on exit.
+
+    If the block or the save fails, this worker's copy is dropped, so the
+    next reader loads what is on disk rather than half-applied changes.
+    """
+    return _registry.edit(str(knowledge_base_id))
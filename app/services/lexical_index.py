@@ -0,0 +1,87 @@
+"""
+Inverted index with BM25 scoring.
+
+Postings are keyed by the same integer row ids used by the vector store, so
+both retrievers can be restricted by one boolean row mask.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class LexicalIndex:
+    """
+    term -> {row: term frequency}, plus per-row lengths for BM25 normalization.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.row_len: Dict[int, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self.row_len)
+
+    def add(self, row: int, tokens: Sequence[str]) -> None:
+        for term, tf in Counter(tokens).items():
+            self.postings.setdefault(term, {})[row] = tf
+        self.row_len[row] = len(tokens)
+        self._total_len += len(tokens)
+
+    def remove(self, row: int, tokens: Iterable[str]) -> None:
+        for term in set(tokens):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(row, None)
+            if not posting:
+                del self.postings[term]
+        self._total_len -= self.row_len.pop(row, 0)
+
+    def search(
+        self,
+        terms: Sequence[str],
+        k: int,
+        allowed: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row_ids, scores) of the k best rows by BM25.
+
+        Rows outside `allowed` are skipped while walking the postings, so the
+        filter shapes the candidate set rather than trimming a finished list.
+        """
+        n_rows = len(self.row_len)
+        if n_rows == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        avg_len = self._total_len / n_rows
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1.0 + (n_rows - len(posting) + 0.5) / (len(posting) + 0.5))
+            for row, tf in posting.items():
+                if allowed is not None and (row >= allowed.shape[0] or not allowed[row]):
+                    continue
+                norm = self.k1 * (1.0 - self.b + self.b * self.row_len[row] / avg_len)
+                scores[row] = scores.get(row, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        if not scores:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        rows = np.fromiter(scores.keys(), dtype=np.int64, count=len(scores))
+        values = np.fromiter(scores.values(), dtype=np.float32, count=len(scores))
+        if rows.size > k:
+            top = np.argpartition(-values, k - 1)[:k]
+        else:
+            top = np.arange(rows.size)
+        order = top[np.argsort(-values[top], kind="stable")]
+        return rows[order], values[order]
@@ -0,0 +1,275 @@
+"""
+Async OpenRouter (OpenAI-compatible) chat completion client.
+
+- OpenRouterClient wraps one pooled httpx.AsyncClient, so connections are
+  reused across requests instead of paying TCP/TLS setup every call.
+- complete() returns a whole completion; stream() yields content deltas
+  parsed from the Server-Sent Events stream.
+- Connection errors, 429 and 5xx responses are retried with full-jitter
+  exponential backoff (honoring Retry-After); a semaphore caps in-flight
+  requests per process.
+- get_llm_client() returns the process-wide client, created on first use.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core.config import Settings, get_settings
+from app.core.logging import get_logger
+
+logger = get_logger("app.llm")
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+# httpx keeps idle connections for 5s; a client used more recently than this
+# almost certainly still has a warm connection, so prewarm() is skipped.
+WARM_CONNECTION_SECONDS = 4.0
+
+
+class LLMError(Exception):
+    """
+    Raised when OpenRouter returns an error or retries are exhausted.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _first_choice_field(payload: Any, field: str) -> Optional[str]:
+    """
+    The content of payload["choices"][0][field], "" when it is null, or
+    None when the payload does not have that shape.
+    """
+    if not isinstance(payload, dict):
+        return None
+    choices = payload.get("choices")
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        return None
+    message = choices[0].get(field)
+    if not isinstance(message, dict):
+        return None
+    content = message.get("content")
+    if content is None:
+        return ""
+    return content if isinstance(content, str) else None
+
+
+class OpenRouterClient:
+    """
+    Pooled, retrying, concurrency-capped client for the chat completions API.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        model: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        max_retries: int = 3,
+        max_concurrency: int = 16,
+        max_connections: int = 32,
+        backoff_base: float = 0.25,
+        backoff_cap: float = 8.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.model = model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._last_used = 0.0
+
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/") + "/",
+            headers=headers,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "OpenRouterClient":
+        return cls(
+            api_key=settings.OPENROUTER_API_KEY,
+            base_url=settings.OPENROUTER_BASE_URL,
+            model=settings.OPENROUTER_MODEL,
+            connect_timeout=settings.OPENROUTER_CONNECT_TIMEOUT,
+            read_timeout=settings.OPENROUTER_READ_TIMEOUT,
+            max_retries=settings.OPENROUTER_MAX_RETRIES,
+            max_concurrency=settings.OPENROUTER_MAX_CONCURRENCY,
+            max_connections=settings.OPENROUTER_MAX_CONNECTIONS,
+        )
+
+    def _payload(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str],
+        stream: bool,
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        return {"model": model or self.model, "messages": messages, "stream": stream, **params}
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_cap)
+                except ValueError:
+                    pass
+        # Full jitter: spreads retries from many clients instead of synchronizing them.
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def _send(self, payload: Dict[str, Any], stream: bool) -> httpx.Response:
+        """
+        Send a request, retrying transient failures. Returns a response with a
+        2xx status; for stream=True the body has not been read yet.
+        """
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            try:
+                request = self._http.build_request("POST", "chat/completions", json=payload)
+                response = await self._http.send(request, stream=stream)
+                self._last_used = time.monotonic()
+                if response.status_code < 400:
+                    return response
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    body = await response.aread()
+                    await response.aclose()
+                    raise LLMError(
+                        f"OpenRouter returned {response.status_code}: {body[:500]!r}",
+                        status_code=response.status_code,
+                    )
+                await response.aclose()
+            except httpx.TransportError as exc:
+                if attempt >= self.max_retries:
+                    raise LLMError(f"OpenRouter request failed: {exc!r}") from exc
+
+            delay = self._backoff(attempt, response)
+            logger.warning(
+                "Retrying OpenRouter request (attempt %d/%d) in %.2fs",
+                attempt + 1, self.max_retries, delay,
+            )
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        **params: Any,
+    ) -> str:
+        """
+        Return the full assistant message content for a chat completion.
+        """
+        async with self._semaphore:
+            response = await self._send(self._payload(messages, model, False, params), stream=False)
+            try:
+                data = response.json()
+            except ValueError as exc:
+                raise LLMError(f"OpenRouter returned a non-JSON body: {response.text[:500]!r}") from exc
+        content = _first_choice_field(data, "message")
+        if content is None:
+            raise LLMError(f"Unexpected completion payload: {str(data)[:500]}")
+        return content
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        **params: Any,
+    ) -> AsyncIterator[str]:
+        """
+        Yield content deltas of a streamed chat completion as they arrive.
+
+        Retries only happen before the first byte is received; a stream that
+        breaks midway raises LLMError instead of silently restarting.
+        """
+        async with self._semaphore:
+            response = await self._send(self._payload(messages, model, True, params), stream=True)
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        # Blank separators and ": keep-alive" comments.
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        event = json.loads(data)
+                    except ValueError:
+                        raise LLMError("OpenRouter sent a malformed stream event") from None
+                    if isinstance(event, dict) and "error" in event:
+                        raise LLMError(f"OpenRouter stream error: {event['error']!r}")
+                    if isinstance(event, dict) and not event.get("choices"):
+                        continue  # e.g. a trailing usage-only event
+                    delta = _first_choice_field(event, "delta")
+                    if delta is None:
+                        raise LLMError(f"OpenRouter sent a malformed stream event: {data[:500]}")
+                    if delta:
+                        yield delta
+            except httpx.TransportError as exc:
+                raise LLMError(f"OpenRouter stream interrupted: {exc!r}") from exc
+            finally:
+                await response.aclose()
+                self._last_used = time.monotonic()
+
+    async def prewarm(self) -> None:
+        """
+        Open a pooled connection ahead of a request (DNS + TCP + TLS).
+
+        Meant to run concurrently with work that precedes a completion, so the
+        handshake is off the critical path. Failures are ignored; the real
+        request will surface them.
+        """
+        if time.monotonic() - self._last_used < WARM_CONNECTION_SECONDS:
+            return
+        try:
+            response = await self._http.head("models")
+            await response.aclose()
+            self._last_used = time.monotonic()
+        except httpx.HTTPError:
+            logger.debug("OpenRouter prewarm failed", exc_info=True)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+_client: Optional[OpenRouterClient] = None
+
+
+def get_llm_client() -> OpenRouterClient:
+    """
+    Return the process-wide OpenRouter client, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        _client = OpenRouterClient.from_settings(get_settings())
+    return _client
+
+
+async def close_llm_client() -> None:
+    """
+    Close the process-wide client's connection pool (call on shutdown).
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,182 @@
+"""
+LLM response cache.
+
+- Exact lookups are keyed on (model, prompt hash, generation parameters).
+- Optional semantic lookups compare the query embedding with those of
+  cached answers in the same scope (knowledge base + index version + model
+  + parameters) and accept the best match above a cosine threshold.
+- Entries expire after a TTL and the cache is LRU-bounded in size.
+- Hit / miss counters are kept per knowledge base.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import numpy as np
+
+from app.core.config import get_settings
+
+
+def exact_key(model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+    """
+    Hash of everything that determines the completion.
+    """
+    prompt_hash = hashlib.sha256(
+        json.dumps(messages, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    raw = json.dumps([model, prompt_hash, params], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    content: str
+    expires_at: float
+    scope: Optional[str]
+    embedding: Optional[np.ndarray]
+
+
+@dataclass
+class CacheStats:
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / total if total else 0.0
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL + LRU cache of completions with optional semantic fallback.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        semantic_threshold: Optional[float] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # scope -> keys of entries with an embedding, plus a lazily rebuilt matrix
+        self._scopes: Dict[str, List[str]] = {}
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._stats: Dict[str, CacheStats] = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.scope is not None:
+            keys = self._scopes.get(entry.scope)
+            if keys is not None and key in keys:
+                keys.remove(key)
+                self._matrices.pop(entry.scope, None)
+                if not keys:
+                    del self._scopes[entry.scope]
+
+    def _semantic_match(self, scope: str, embedding: np.ndarray, now: float) -> Optional[_Entry]:
+        keys = self._scopes.get(scope)
+        if not keys:
+            return None
+        matrix = self._matrices.get(scope)
+        if matrix is None:
+            # Entries are only listed under a scope when they have an embedding.
+            matrix = np.vstack([cast(np.ndarray, self._entries[k].embedding) for k in keys])
+            self._matrices[scope] = matrix
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+        key = keys[best]
+        entry = self._entries[key]
+        if entry.expires_at <= now:
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(
+        self,
+        key: str,
+        stats_key: str,
+        scope: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return (content, "exact" | "semantic") on a hit, or (None, None).
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats.setdefault(stats_key, CacheStats())
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    stats.exact_hits += 1
+                    return entry.content, "exact"
+                self._drop(key)
+
+            if self.semantic_threshold is not None and scope is not None and embedding is not None:
+                entry = self._semantic_match(scope, embedding, now)
+                if entry is not None:
+                    stats.semantic_hits += 1
+                    return entry.content, "semantic"
+
+            stats.misses += 1
+            return None, None
+
+    def put(
+        self,
+        key: str,
+        content: str,
+        scope: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._drop(key)
+            semantic_scope = scope if self.semantic_threshold is not None and embedding is not None else None
+            self._entries[key] = _Entry(
+                content=content,
+                expires_at=time.monotonic() + self.ttl_seconds,
+                scope=semantic_scope,
+                embedding=np.asarray(embedding, dtype=np.float32) if semantic_scope is not None else None,
+            )
+            if semantic_scope is not None:
+                self._scopes.setdefault(semantic_scope, []).append(key)
+                self._matrices.pop(semantic_scope, None)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self, stats_key: str) -> CacheStats:
+        with self._lock:
+            stats = self._stats.get(stats_key, CacheStats())
+            return CacheStats(stats.exact_hits, stats.semantic_hits, stats.misses)
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    """
+    Return the process-wide LLM response cache configured by settings.
+    """
+    settings = get_settings()
+    return ResponseCache(
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        semantic_threshold=settings.LLM_CACHE_SEMANTIC_THRESHOLD,
+    )
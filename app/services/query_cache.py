@@ -0,0 +1,187 @@
+"""
+Search result cache.
+
+- QueryCache is a size-bounded, thread-safe LRU held in process memory,
+  optionally backed by a DiskCacheTier shared by all workers on the host.
+- make_search_key() builds the cache key from the knowledge base id, its
+  index version, the normalized query text and the canonicalized filters.
+  Because the index version is part of the key, bumping it on ingest/delete
+  makes every older entry unreachable; nothing has to be purged eagerly.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger("app.cache")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Case- and whitespace-insensitive form of a query (search is insensitive to both).
+    """
+    return " ".join(query.lower().split())
+
+
+def make_search_key(
+    knowledge_base_id: UUID | str,
+    index_version: int,
+    query: str,
+    params: Dict[str, Any],
+) -> str:
+    """
+    Build a stable cache key. `params` holds filters and top_k; list values
+    are sorted so equivalent filter sets map to the same key.
+    """
+    canonical = {
+        key: sorted(str(v) for v in value) if isinstance(value, (list, tuple, set)) else value
+        for key, value in params.items()
+        if value not in (None, [], ())
+    }
+    raw = json.dumps(
+        [str(knowledge_base_id), index_version, normalize_query(query), canonical],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskCacheTier:
+    """
+    JSON files under a shared directory, one per key.
+
+    Writes go to a temp file and are renamed into place, so concurrent
+    workers never read partial entries. The tier is pruned back to
+    max_entries (oldest first) once it grows 10% past the bound.
+    """
+
+    def __init__(self, directory: Path, max_entries: int) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._writes_since_prune = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with self._path(key).open("r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(value, f)
+            tmp.replace(path)
+        except OSError:
+            logger.warning("Could not write search cache entry %s", key, exc_info=True)
+            return
+
+        self._writes_since_prune += 1
+        if self._writes_since_prune >= max(self.max_entries // 10, 1):
+            self._writes_since_prune = 0
+            self.prune()
+
+    def prune(self) -> None:
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort()
+        for _, path in entries[:excess]:
+            path.unlink(missing_ok=True)
+
+
+class QueryCache:
+    """
+    LRU cache of JSON-serializable values with an optional disk tier.
+
+    Lookups check memory first, then disk (promoting disk hits into memory).
+    """
+
+    def __init__(self, max_entries: int, disk: Optional[DiskCacheTier] = None) -> None:
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self._put_memory(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        self._put_memory(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def _put_memory(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache
+def get_search_cache() -> QueryCache:
+    """
+    Return the process-wide search result cache configured by settings.
+    """
+    settings = get_settings()
+    disk = None
+    if settings.SEARCH_CACHE_DIR:
+        disk = DiskCacheTier(
+            Path(settings.SEARCH_CACHE_DIR),
+            max_entries=settings.SEARCH_CACHE_DISK_MAX_ENTRIES,
+        )
+    return QueryCache(max_entries=settings.SEARCH_CACHE_MAX_ENTRIES, disk=disk)
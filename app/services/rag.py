@@ -0,0 +1,90 @@
+"""
+Retrieval-augmented answering helpers.
+
+- rerank_hits() reorders fused search hits by query-term coverage and caps
+  chunks per document so the context is not dominated by one file.
+- build_messages() assembles the chat prompt from the question and context.
+- format_sse() renders one Server-Sent Events frame.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.services.chunking import tokenize
+from app.services.search import SearchHit
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant answering questions about a knowledge base. "
+    "Answer only from the numbered context passages. Cite passages as [n]. "
+    "If the context does not contain the answer, say that you don't know."
+)
+
+
+def rerank_hits(
+    question: str,
+    hits: Sequence[SearchHit],
+    limit: int,
+    max_per_document: int = 3,
+) -> List[SearchHit]:
+    """
+    Rerank fused hits: the fused score is blended with the fraction of
+    distinct question terms present in the chunk, then at most
+    `max_per_document` chunks per document are kept.
+    """
+    terms = set(tokenize(question))
+    if not hits:
+        return []
+
+    top_score = max(hit.score for hit in hits) or 1.0
+
+    def blended(hit: SearchHit) -> float:
+        coverage = len(terms & set(tokenize(hit.text))) / len(terms) if terms else 0.0
+        return 0.5 * hit.score / top_score + 0.5 * coverage
+
+    ranked = sorted(hits, key=blended, reverse=True)
+
+    per_document: Dict[str, int] = {}
+    selected: List[SearchHit] = []
+    for hit in ranked:
+        count = per_document.get(hit.document_id, 0)
+        if count >= max_per_document:
+            continue
+        per_document[hit.document_id] = count + 1
+        selected.append(hit)
+        if len(selected) >= limit:
+            break
+    return selected
+
+
+def build_messages(
+    question: str,
+    hits: Sequence[SearchHit],
+    max_context_chars: int,
+) -> List[Dict[str, str]]:
+    """
+    Build chat messages with numbered context passages, trimmed to a character budget.
+    """
+    passages: List[str] = []
+    used = 0
+    for n, hit in enumerate(hits, start=1):
+        passage = f"[{n}] ({hit.filename})\n{hit.text}"
+        if used + len(passage) > max_context_chars and passages:
+            break
+        passages.append(passage)
+        used += len(passage)
+
+    context = "\n\n".join(passages) if passages else "(no relevant passages found)"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"},
+    ]
+
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """
+    Render one SSE frame; `data` is JSON-encoded.
+    """
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
@@ -0,0 +1,92 @@
+"""
+Hybrid knowledge-base search.
+
+- Vector and BM25 retrievers each produce a ranked candidate list over the
+  rows allowed by the filters.
+- reciprocal_rank_fusion() merges the rankings: score = sum(1 / (k + rank)).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.services.chunking import tokenize
+from app.services.embeddings import get_embedder
+from app.services.kb_index import KnowledgeBaseIndex, SearchFilters
+
+
+@dataclass
+class SearchHit:
+    document_id: str
+    collection_id: str
+    filename: str
+    mime_type: Optional[str]
+    chunk_index: int
+    text: str
+    score: float
+    vector_rank: Optional[int]
+    lexical_rank: Optional[int]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]],
+    k: int,
+) -> List[Tuple[int, float]]:
+    """
+    Fuse several rankings of row ids into one, best first.
+
+    Ranks are 1-based; an item missing from a ranking contributes nothing for it.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search(
+    index: KnowledgeBaseIndex,
+    query: str,
+    filters: SearchFilters,
+    top_k: int,
+    candidates: Optional[int] = None,
+) -> List[SearchHit]:
+    """
+    Run vector + lexical retrieval under the filters and fuse the results.
+    """
+    settings = get_settings()
+    candidates = max(candidates or settings.SEARCH_CANDIDATES, top_k)
+    query_vector = get_embedder().embed_one(query)
+    terms = tokenize(query)
+
+    with index.lock:
+        allowed = index.allowed_rows(filters)
+        vector_rows, _ = index.vectors.search(query_vector, candidates, allowed)
+        lexical_rows, _ = index.lexical.search(terms, candidates, allowed)
+
+        vector_ranking = vector_rows.tolist()
+        lexical_ranking = lexical_rows.tolist()
+        vector_rank = {row: rank for rank, row in enumerate(vector_ranking, start=1)}
+        lexical_rank = {row: rank for rank, row in enumerate(lexical_ranking, start=1)}
+
+        fused = reciprocal_rank_fusion([vector_ranking, lexical_ranking], k=settings.SEARCH_RRF_K)
+
+        hits: List[SearchHit] = []
+        for row, score in fused[:top_k]:
+            doc = index.documents[index.row_doc[row]]
+            hits.append(
+                SearchHit(
+                    document_id=doc.document_id,
+                    collection_id=doc.collection_id,
+                    filename=doc.filename,
+                    mime_type=doc.mime_type,
+                    chunk_index=index.row_chunk[row],
+                    text=index.row_text[row],
+                    score=score,
+                    vector_rank=vector_rank.get(row),
+                    lexical_rank=lexical_rank.get(row),
+                )
+            )
+        return hits
@@ -0,0 +1,145 @@
+"""
+Mergeable streaming sketches.
+
+- HyperLogLog estimates the number of distinct values in fixed memory.
+- QuantileSketch is a KLL-style compactor stack that answers approximate
+  quantile queries over a stream of numbers.
+
+Both can be merged with another sketch of the same configuration and
+round-trip through to_state() / from_state() (JSON-serializable), so a
+profile can be extended with new data without rescanning the old data.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class HyperLogLog:
+    """
+    HyperLogLog with 2**precision one-byte registers (~1.04 / sqrt(2**p) relative error).
+    """
+
+    def __init__(self, precision: int = 12) -> None:
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, value: str) -> None:
+        self.update([value])
+
+    def update(self, values: Iterable[str]) -> None:
+        digests = b"".join(
+            hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest() for value in values
+        )
+        if not digests:
+            return
+        hashes = np.frombuffer(digests, dtype=">u8").astype(np.uint64)
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # bit_length(rest) via the float exponent (exact while bits <= 53).
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = (bits - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction: linear counting.
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "precision": self.precision,
+            "registers": base64.b64encode(self.registers.tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "HyperLogLog":
+        sketch = cls(state["precision"])
+        sketch.registers = np.frombuffer(base64.b64decode(state["registers"]), dtype=np.uint8).copy()
+        return sketch
+
+
+class QuantileSketch:
+    """
+    KLL-style quantile sketch.
+
+    Level h holds items of weight 2**h. When a level reaches k items it is
+    sorted and every other item (random offset) is promoted to the next
+    level, so memory stays O(k log(n / k)).
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None) -> None:
+        self.k = k
+        self.count = 0
+        self.levels: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+
+    def update(self, values: Iterable[float]) -> None:
+        before = len(self.levels[0])
+        self.levels[0].extend(values)
+        self.count += len(self.levels[0]) - before
+        self._compress()
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) >= self.k:
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                level.sort()
+                keep = [level.pop()] if len(level) % 2 else []
+                offset = self._rng.randint(0, 1)
+                self.levels[h + 1].extend(level[offset::2])
+                self.levels[h] = keep
+            h += 1
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+        values = np.concatenate([np.asarray(level, dtype=np.float64) for level in self.levels])
+        weights = np.concatenate(
+            [np.full(len(level), 1 << h, dtype=np.float64) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        targets = np.asarray(qs, dtype=np.float64) * cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, targets, side="left"), values.size - 1)
+        return [float(values[i]) for i in positions]
+
+    def merge(self, other: "QuantileSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, level in enumerate(other.levels):
+            self.levels[h].extend(level)
+        self.count += other.count
+        self._compress()
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"k": self.k, "count": self.count, "levels": self.levels}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(state["k"])
+        sketch.count = state["count"]
+        sketch.levels = [list(level) for level in state["levels"]] or [[]]
+        return sketch
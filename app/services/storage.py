@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Protocol, runtime_checkable, BinaryIO
+from typing import BinaryIO, Iterable, Protocol, runtime_checkable
 
 from app.core.config import get_settings
 
@@ -12,8 +13,20 @@ class FileStorageBackend(Protocol):
     Interface for file storage backends.
 
     Implementations can store files on local disk, S3, Mongo GridFS, etc.
+
+    Backends whose files live on the local filesystem set
+    supports_local_paths, which enables local_path(); features that need a
+    real file (memory-mapped columnar dataset copies) are skipped on other
+    backends.
     """
 
+    @property
+    def supports_local_paths(self) -> bool:
+        """
+        True if stored files are plain files on this machine (see local_path()).
+        """
+        ...
+
     def save(self, relative_path: str, data: bytes) -> str:
         """
         Save bytes at the given relative path.
@@ -22,6 +35,16 @@ class FileStorageBackend(Protocol):
         """
         ...
 
+    def save_stream(self, relative_path: str, chunks: Iterable[bytes]) -> str:
+        """
+        Save the concatenated chunks at the given relative path without
+        holding them all in memory where the backend allows it; a partial
+        file is never visible under the final path.
+
+        Returns the normalized storage path that should be stored in the DB.
+        """
+        ...
+
     def open(self, relative_path: str) -> BinaryIO:
         """
         Open a file for reading in binary mode.
@@ -34,6 +57,15 @@ class FileStorageBackend(Protocol):
         """
         ...
 
+    def local_path(self, relative_path: str) -> Path:
+        """
+        Return a local filesystem path for the given relative path, for
+        files that are memory-mapped (e.g. columnar dataset copies).
+
+        Only call this when supports_local_paths is True.
+        """
+        ...
+
 class LocalFileStorageBackend:
     """
     Store files under a local directory pointed to by STORAGE_ROOT.
@@ -41,6 +73,8 @@ class LocalFileStorageBackend:
     Example final path:
         {STORAGE_ROOT}/collections/{collection_id}/documents/{document_id}/{filename}
     """
+    supports_local_paths = True
+
     def __init__(self,root:Path) -> None:
         self.root = root
     
@@ -63,6 +97,22 @@ class LocalFileStorageBackend:
         # Return the normalized relative path to store in DB
         return str(full_path.relative_to(self.root))
 
+    def save_stream(self, relative_path: str, chunks: Iterable[bytes]) -> str:
+        full_path = self._full_path(relative_path)
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+
+        partial = full_path.with_name(full_path.name + ".partial")
+        try:
+            with partial.open("wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(partial, full_path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+        return str(full_path.relative_to(self.root))
+
     def open(self, relative_path:str) -> BinaryIO:
         full_path = self._full_path(relative_path)
         return full_path.open("rb")
@@ -75,10 +125,57 @@ class LocalFileStorageBackend:
         except FileNotFoundError:
         # Idempotent delete: ignore missing files
             return
-    
+
+    def local_path(self, relative_path: str) -> Path:
+        return self._full_path(relative_path)
+
+
+class InstrumentedStorageBackend:
+    """
+    Wrap a backend and record the latency of each call in the
+    storage_operation_duration_seconds histogram (for open(), the time to
+    open the file, not to read it).
+    """
+
+    def __init__(self, backend: FileStorageBackend) -> None:
+        from app.core.metrics import STORAGE_OPERATION_DURATION
+
+        self.backend = backend
+        self._timers = {
+            operation: STORAGE_OPERATION_DURATION.labels(operation)
+            for operation in ("save", "open", "delete")
+        }
+
+    @property
+    def supports_local_paths(self) -> bool:
+        return self.backend.supports_local_paths
+
+    def save(self, relative_path: str, data: bytes) -> str:
+        with self._timers["save"].time():
+            return self.backend.save(relative_path, data)
+
+    def save_stream(self, relative_path: str, chunks: Iterable[bytes]) -> str:
+        # Includes the time spent producing the chunks.
+        with self._timers["save"].time():
+            return self.backend.save_stream(relative_path, chunks)
+
+    def open(self, relative_path: str) -> BinaryIO:
+        with self._timers["open"].time():
+            return self.backend.open(relative_path)
+
+    def delete(self, relative_path: str) -> None:
+        with self._timers["delete"].time():
+            self.backend.delete(relative_path)
+
+    def local_path(self, relative_path: str) -> Path:
+        return self.backend.local_path(relative_path)
+
+
+@lru_cache
 def get_default_storage_backend() -> FileStorageBackend:
     """
-    Factory for the default storage backend used by the application.
+    Factory for the default storage backend used by the application
+    (constructed once per process, at app startup).
 
     For now this is local filesystem storage, but it could later be
     replaced with S3, MinIO, Mongo GridFS, etc.
@@ -86,4 +183,7 @@ def get_default_storage_backend() -> FileStorageBackend:
     settings = get_settings()
     root = Path(settings.STORAGE_ROOT)
     root.mkdir(parents=True, exist_ok=True)
-    return LocalFileStorageBackend(root=root)
+    backend = LocalFileStorageBackend(root=root)
+    if settings.METRICS_ENABLED:
+        return InstrumentedStorageBackend(backend)
+    return backend
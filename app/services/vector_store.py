@@ -0,0 +1,350 @@
+"""
+In-memory vector store with restricted (filtered) top-k search.
+
+Rows are addressed by stable integer ids. Deleted rows are tombstoned and
+only physically dropped by compact(), which returns the old -> new id map so
+owners can renumber their own per-row data.
+
+Three storage modes are supported:
+- "float32": full-precision vectors held in RAM (exact search).
+- "int8":    per-row scalar-quantized codes in RAM (4x smaller).
+- "binary":  1-bit sign codes in RAM (32x smaller), Hamming-distance search.
+
+In the quantized modes the codes only produce candidates: the top
+k * rerank_factor are re-scored exactly against full-precision vectors
+memory-mapped from the last saved vectors.npy (plus an in-RAM buffer of
+rows added since that save).
+
+save() writes every row; save_delta() / load_delta() write and replay only
+the rows appended since a given row, so owners can persist small changes
+as append-only segments.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+QUANTIZATION_MODES = ("float32", "int8", "binary")
+
+# Rows scored per block in quantized modes, bounding temporary float copies
+# (and keeping them cache-sized).
+_SCORE_BLOCK_ROWS = 4096
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantization. Returns (codes, scales) such that
+    vectors ~= codes * scales[:, None].
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    1 bit per dimension (sign), packed into uint8 bytes.
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+class VectorStore:
+    """
+    Vectors plus an alive mask, in one of QUANTIZATION_MODES.
+
+    search() accepts an optional boolean `allowed` mask: scoring only touches
+    the allowed rows, so a selective filter makes the search cheaper instead
+    of starving a fixed-size result list.
+    """
+
+    def __init__(self, dim: int, quantization: str = "float32", rerank_factor: int = 10) -> None:
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown vector quantization {quantization!r}; expected one of {QUANTIZATION_MODES}")
+        self.dim = dim
+        self.quantization = quantization
+        self.rerank_factor = max(rerank_factor, 1)
+        self._size = 0
+        self._alive = np.zeros(0, dtype=bool)
+
+        # float32 mode: the vectors themselves. Quantized modes: rows added since the last save.
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        # Quantized modes: memory-mapped full-precision rows [0, _saved) and in-RAM codes.
+        self._full = np.zeros((0, dim), dtype=np.float32)
+        self._saved = 0
+        self._codes = np.zeros((0, self._code_width), dtype=self._code_dtype)
+        self._scales = np.zeros(0, dtype=np.float32)
+
+    @property
+    def _code_width(self) -> int:
+        return (self.dim + 7) // 8 if self.quantization == "binary" else self.dim
+
+    @property
+    def _code_dtype(self) -> type:
+        return np.uint8 if self.quantization == "binary" else np.int8
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self._alive[: self._size]
+
+    @property
+    def dead_count(self) -> int:
+        return int(self._size - np.count_nonzero(self.alive))
+
+    def nbytes(self) -> int:
+        """
+        Bytes of vector data resident in RAM (memory-mapped rows excluded).
+        """
+        total = self._alive.nbytes + self._vectors.nbytes
+        if self.quantization != "float32":
+            total += self._codes.nbytes + self._scales.nbytes
+        return total
+
+    @staticmethod
+    def _grow(array: np.ndarray, used: int, needed: int) -> np.ndarray:
+        if needed <= array.shape[0]:
+            return array
+        grown = np.zeros((max(needed, array.shape[0] * 2, 64),) + array.shape[1:], dtype=array.dtype)
+        grown[:used] = array[:used]
+        return grown
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Append vectors and return their row ids.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        n = vectors.shape[0]
+        start = self._size
+        end = start + n
+
+        self._alive = self._grow(self._alive, start, end)
+        self._alive[start:end] = True
+
+        pending_start = start - self._saved if self.quantization != "float32" else start
+        self._vectors = self._grow(self._vectors, pending_start, pending_start + n)
+        self._vectors[pending_start:pending_start + n] = vectors
+
+        if self.quantization != "float32":
+            if self.quantization == "int8":
+                codes, scales = quantize_int8(vectors)
+                self._scales = self._grow(self._scales, start, end)
+                self._scales[start:end] = scales
+            else:
+                codes = quantize_binary(vectors)
+            self._codes = self._grow(self._codes, start, end)
+            self._codes[start:end] = codes
+
+        self._size = end
+        return np.arange(start, end, dtype=np.int64)
+
+    def remove(self, rows: np.ndarray) -> None:
+        """
+        Tombstone rows; they are skipped by search() until compact() drops them.
+        """
+        self._alive[np.asarray(rows, dtype=np.int64)] = False
+
+    def vectors(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Full-precision vectors for the given rows (read from disk for saved rows
+        in quantized modes).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if self.quantization == "float32":
+            return self._vectors[rows]
+
+        out = np.empty((rows.size, self.dim), dtype=np.float32)
+        on_disk = rows < self._saved
+        if on_disk.any():
+            # Sorted access keeps the page reads sequential.
+            disk_rows = rows[on_disk]
+            order = np.argsort(disk_rows)
+            out[np.flatnonzero(on_disk)[order]] = self._full[disk_rows[order]]
+        if (~on_disk).any():
+            out[~on_disk] = self._vectors[rows[~on_disk] - self._saved]
+        return out
+
+    def _approximate_scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Higher is better. int8: dequantized inner product. binary: negative Hamming distance.
+        """
+        scores = np.empty(rows.size, dtype=np.float32)
+        query_code = quantize_binary(query[None, :])[0] if self.quantization == "binary" else None
+        contiguous = rows.size == self._size
+        for start in range(0, rows.size, _SCORE_BLOCK_ROWS):
+            end = min(start + _SCORE_BLOCK_ROWS, rows.size)
+            block = slice(start, end) if contiguous else rows[start:end]
+            if query_code is None:  # int8
+                scores[start:end] = (self._codes[block].astype(np.float32) @ query) * self._scales[block]
+            else:
+                distance = np.bitwise_count(self._codes[block] ^ query_code).sum(axis=1, dtype=np.int32)
+                scores[start:end] = -distance
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        if scores.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.size)
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        allowed: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (row_ids, scores) of the k best alive rows by inner product.
+
+        In quantized modes the scores are exact: candidates are re-ranked with
+        the full-precision vectors.
+        """
+        mask = self.alive if allowed is None else (self.alive & allowed[: self._size])
+        rows = np.flatnonzero(mask)
+        if rows.size == 0 or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        query = np.asarray(query, dtype=np.float32)
+        if self.quantization == "float32":
+            if rows.size == self._size:
+                # Nothing filtered out: score the contiguous block, no gather copy.
+                scores = self._vectors[: self._size] @ query
+            else:
+                scores = self._vectors[rows] @ query
+            order = self._top(scores, k)
+            return rows[order], scores[order]
+
+        candidates = rows[self._top(self._approximate_scores(rows, query), k * self.rerank_factor)]
+        exact = self.vectors(candidates) @ query
+        order = self._top(exact, k)
+        return candidates[order], exact[order]
+
+    def compact(self) -> np.ndarray:
+        """
+        Drop tombstoned rows. Returns an array mapping old row id -> new id (-1 if dropped).
+
+        In quantized modes the surviving full-precision rows are pulled into
+        RAM until the next save() writes them back out.
+        """
+        alive = self.alive
+        remap = np.full(self._size, -1, dtype=np.int64)
+        keep = np.flatnonzero(alive)
+        remap[keep] = np.arange(keep.size)
+
+        if self.quantization == "float32":
+            self._vectors = self._vectors[keep].copy()
+        else:
+            self._vectors = self.vectors(keep)
+            self._codes = self._codes[keep].copy()
+            if self.quantization == "int8":
+                self._scales = self._scales[keep].copy()
+            self._full = np.zeros((0, self.dim), dtype=np.float32)
+            self._saved = 0
+
+        self._alive = np.ones(keep.size, dtype=bool)
+        self._size = keep.size
+        return remap
+
+    def save(self, directory: Path) -> None:
+        """
+        Persist alive and dead rows as-is (call compact() first to shrink).
+
+        In quantized modes the codes are saved too, and the store switches to
+        memory-mapping the freshly written full-precision file.
+        """
+        path = directory / "vectors.npy"
+        if self.quantization == "float32":
+            _atomic_save(path, self._vectors[: self._size])
+        else:
+            # Stream saved + pending rows into the new file without materializing them together.
+            tmp = path.with_name(path.name + ".tmp")
+            out = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(self._size, self.dim))
+            if self._saved:
+                out[: self._saved] = self._full[: self._saved]
+            out[self._saved:] = self._vectors[: self._size - self._saved]
+            out.flush()
+            del out
+            tmp.replace(path)
+
+            _atomic_save(directory / f"codes-{self.quantization}.npy", self._codes[: self._size])
+            if self.quantization == "int8":
+                _atomic_save(directory / "scales-int8.npy", self._scales[: self._size])
+
+            self._full = np.load(path, mmap_mode="r")
+            self._saved = self._size
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+
+        _atomic_save(directory / "alive.npy", self.alive)
+
+    def save_delta(self, directory: Path, start: int) -> None:
+        """
+        Persist only rows [start, len) at full precision, as one segment of
+        an append-only chain on top of a save() (see load_delta()).
+
+        The alive mask is not written: owners replay their own deletions.
+        """
+        _atomic_save(directory / "vectors.npy", self.vectors(np.arange(start, self._size)))
+
+    def load_delta(self, directory: Path) -> np.ndarray:
+        """
+        Append the rows of a segment written by save_delta() and return their ids.
+        """
+        return self.add(np.load(directory / "vectors.npy"))
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        dim: int,
+        quantization: str = "float32",
+        rerank_factor: int = 10,
+    ) -> "VectorStore":
+        store = cls(dim, quantization=quantization, rerank_factor=rerank_factor)
+        path = directory / "vectors.npy"
+        if not path.exists():
+            return store
+
+        store._alive = np.load(directory / "alive.npy").astype(bool)
+        store._size = store._alive.shape[0]
+
+        if quantization == "float32":
+            store._vectors = np.ascontiguousarray(np.load(path), dtype=np.float32).reshape(-1, dim)
+            return store
+
+        store._full = np.load(path, mmap_mode="r")
+        store._saved = store._size
+        codes_path = directory / f"codes-{quantization}.npy"
+        if codes_path.exists():
+            store._codes = np.load(codes_path)
+            if quantization == "int8":
+                store._scales = np.load(directory / "scales-int8.npy")
+        else:
+            # Index written in another mode: quantize block by block from disk.
+            store._codes = np.zeros((store._size, store._code_width), dtype=store._code_dtype)
+            store._scales = np.zeros(store._size, dtype=np.float32)
+            for start in range(0, store._size, _SCORE_BLOCK_ROWS):
+                block = np.asarray(store._full[start:start + _SCORE_BLOCK_ROWS])
+                end = start + block.shape[0]
+                if quantization == "int8":
+                    store._codes[start:end], store._scales[start:end] = quantize_int8(block)
+                else:
+                    store._codes[start:end] = quantize_binary(block)
+        return store
+
+
+def _atomic_save(path: Path, array: np.ndarray) -> None:
+    """
+    np.save to a temp file and rename, so readers never see a partial file.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as f:
+        np.save(f, array)
+    tmp.replace(path)
@@ -0,0 +1,192 @@
+"""
+Startup warm-up and readiness.
+
+- run_warmup() is started by the app's lifespan and takes the cold-path
+  costs off the first requests a new worker serves: it fills the database
+  connection pool, loads the search indexes of the most recent knowledge
+  bases and indexed datasets (and asks the OS to page their files in),
+  builds the embedder and the search / LLM response caches, and, when an
+  API key is configured, opens a connection to OpenRouter.
+- Each step is timed and logged. A failing step is logged and recorded but
+  does not stop the others: a worker that cannot prime a cache still
+  serves requests, just more slowly at first.
+- WarmupState.ready turns True once every step has run; the /ready endpoint
+  reports it, so a load balancer only routes to warmed-up workers.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import Settings
+from app.core.logging import get_logger
+
+logger = get_logger("app.warmup")
+
+_PRIME_BLOCK_BYTES = 1 << 20
+
+
+@dataclass
+class WarmupState:
+    """
+    Progress of the warm-up: per-step timings (ms) and errors.
+    """
+
+    ready: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+    total_ms: Optional[float] = None
+    steps: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "total_ms": self.total_ms,
+            "steps": self.steps,
+        }
+
+
+def _prime_file(path: Path) -> None:
+    """
+    Ask the OS to read a file into the page cache (read it where fadvise is unavailable).
+    """
+    with path.open("rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+            return
+        while f.read(_PRIME_BLOCK_BYTES):
+            pass
+
+
+def _prime_generation(index) -> int:
+    count = 0
+    for gen_dir in index.generation_dirs():
+        if not gen_dir.is_dir():
+            continue
+        for path in gen_dir.iterdir():
+            if path.is_file():
+                _prime_file(path)
+                count += 1
+    return count
+
+
+def warm_db_pool(connections: int) -> Dict[str, Any]:
+    """
+    Check out up to `connections` connections at once and run a trivial
+    query on each, so they are open and pooled before the first request.
+    """
+    from sqlalchemy import text
+
+    from app.db.session import get_engine, pool_status
+
+    engine = get_engine()
+    pool_size = pool_status().get("size")
+    if pool_size is not None:
+        # Overflow connections are closed on check-in; only fill the pool proper.
+        connections = min(connections, pool_size)
+    opened = []
+    try:
+        for _ in range(max(connections, 1)):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in opened:
+            conn.close()
+    return {"connections": len(opened)}
+
+
+def warm_indexes(max_indexes: int) -> Dict[str, Any]:
+    """
+    Load the indexes of the most recently created knowledge bases and
+    indexed datasets into this worker and page in their files.
+    """
+    from app.db.session import get_sessionmaker
+    from app.models.dataset import Dataset
+    from app.models.knowledge_base import KnowledgeBase
+    from app.services.dataset_index import get_dataset_index
+    from app.services.kb_index import get_kb_index
+
+    with get_sessionmaker()() as db:
+        kb_ids = [
+            row[0]
+            for row in db.query(KnowledgeBase.id)
+            .order_by(KnowledgeBase.created_at.desc())
+            .limit(max_indexes)
+        ]
+        dataset_ids = [
+            row[0]
+            for row in db.query(Dataset.id)
+            .filter(Dataset.indexed_columns.isnot(None))
+            .order_by(Dataset.created_at.desc())
+            .limit(max_indexes)
+        ]
+
+    files = 0
+    for kb_id in kb_ids:
+        files += _prime_generation(get_kb_index(kb_id))
+    for dataset_id in dataset_ids:
+        files += _prime_generation(get_dataset_index(dataset_id))
+    return {"knowledge_bases": len(kb_ids), "datasets": len(dataset_ids), "files_primed": files}
+
+
+def warm_caches() -> Dict[str, Any]:
+    """
+    Build the embedder and the search / LLM response caches.
+    """
+    from app.services.embeddings import get_embedder
+    from app.services.llm_cache import get_response_cache
+    from app.services.query_cache import get_search_cache
+
+    get_embedder().embed_one("warm-up")
+    get_search_cache()
+    get_response_cache()
+    return {}
+
+
+async def warm_llm() -> Dict[str, Any]:
+    from app.services.llm import get_llm_client
+
+    await get_llm_client().prewarm()
+    return {}
+
+
+async def _run_step(state: WarmupState, name: str, step: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+    start = time.perf_counter()
+    record: Dict[str, Any] = {}
+    try:
+        record.update(await step())
+        record["ok"] = True
+    except Exception as exc:  # a failed step must not keep the worker unready forever
+        record.update(ok=False, error=f"{type(exc).__name__}: {exc}")
+        logger.exception("Warm-up step %s failed", name)
+    record["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    state.steps[name] = record
+    logger.info("Warm-up step %s finished in %.1f ms", name, record["ms"], extra={"step": name, **record})
+
+
+async def run_warmup(state: WarmupState, settings: Settings) -> WarmupState:
+    """
+    Run every warm-up step in order (blocking ones in the threadpool) and
+    mark the state ready.
+    """
+    steps: List[Tuple[str, Callable[[], Awaitable[Any]]]] = [
+        ("db_pool", lambda: run_in_threadpool(warm_db_pool, settings.WARMUP_DB_CONNECTIONS)),
+        ("indexes", lambda: run_in_threadpool(warm_indexes, settings.WARMUP_MAX_INDEXES)),
+        ("caches", lambda: run_in_threadpool(warm_caches)),
+    ]
+    if settings.OPENROUTER_API_KEY:
+        steps.append(("llm", warm_llm))
+
+    for name, step in steps:
+        await _run_step(state, name, step)
+
+    state.total_ms = round((time.monotonic() - state.started_at) * 1000, 1)
+    state.ready = True
+    logger.info("Warm-up complete in %.1f ms", state.total_ms)
+    return state
@@ -0,0 +1,117 @@
+"""
+Throughput / memory benchmark for streaming dataset export.
+
+Generates a synthetic CSV (integer, float, boolean, datetime, low- and
+high-cardinality string columns), profiles it and writes its columnar
+copy, then streams it through export_chunks() for every format and
+compression. Reports rows/s, output MB/s, output size and the peak Python
+heap (tracemalloc) during a second, traced run of each export.
+
+Parquet is skipped when pyarrow is not installed.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_export.py --rows 500000
+    PYTHONPATH=. python scripts/bench_export.py --formats csv jsonl --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from app.services.columnar import ColumnarDataset, convert_csv
+from app.services.csv_profile import profile_csv
+from app.services.dataset_export import COMPRESSIONS, EXPORT_FORMATS, ExportError, export_chunks
+
+
+def synthetic_csv(rows: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    ids = np.arange(rows)
+    amounts = np.round(rng.gamma(2.0, 50.0, rows), 2).astype(str)
+    amounts[rng.random(rows) < 0.05] = ""
+    flags = np.where(rng.random(rows) < 0.5, "true", "false")
+    days = rng.integers(0, 3650, rows).astype("timedelta64[D]") + np.datetime64("2015-01-01")
+    stamps = np.datetime_as_string(days.astype("datetime64[s]") + rng.integers(0, 86400, rows).astype("timedelta64[s]"))
+    cities = np.array(["Paris", "Rome", "Oslo", "Lima", "Cairo", "Tokyo", "Quito", "Perth"])[rng.integers(0, 8, rows)]
+    notes = np.char.add("note ", rng.integers(0, rows, rows).astype(str))
+
+    out = io.StringIO()
+    out.write("id,amount,flag,created_at,city,note\n")
+    for row in zip(ids.tolist(), amounts.tolist(), flags.tolist(), stamps.tolist(), cities.tolist(), notes.tolist()):
+        out.write(",".join(map(str, row)) + "\n")
+    return out.getvalue().encode("utf-8")
+
+
+def run_export(dataset: ColumnarDataset, fmt: str, compression: str, batch_rows: int) -> int:
+    size = 0
+    for chunk in export_chunks(dataset, fmt, compression=compression, batch_rows=batch_rows):
+        size += len(chunk)
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--batch-rows", type=int, default=8192)
+    parser.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    data = synthetic_csv(args.rows, args.seed)
+    profile = profile_csv(io.BytesIO(data))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "columnar"
+        convert_csv(io.BytesIO(data), profile, directory)
+        dataset = ColumnarDataset(directory)
+
+        for fmt in args.formats:
+            for compression in COMPRESSIONS:
+                try:
+                    start = time.perf_counter()
+                    size = run_export(dataset, fmt, compression, args.batch_rows)
+                    elapsed = time.perf_counter() - start
+                except ExportError as exc:
+                    results.append({"format": fmt, "compression": compression, "skipped": str(exc)})
+                    continue
+
+                tracemalloc.start()
+                run_export(dataset, fmt, compression, args.batch_rows)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                results.append(
+                    {
+                        "format": fmt,
+                        "compression": compression,
+                        "seconds": round(elapsed, 3),
+                        "rows_per_s": round(args.rows / elapsed),
+                        "output_mb": round(size / 2**20, 2),
+                        "output_mb_per_s": round(size / 2**20 / elapsed, 1),
+                        "peak_heap_mb": round(peak / 2**20, 2),
+                    }
+                )
+
+    report = {
+        "rows": args.rows,
+        "csv_mb": round(len(data) / 2**20, 2),
+        "batch_rows": args.batch_rows,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
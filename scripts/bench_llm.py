@@ -0,0 +1,137 @@
+"""
+Throughput / latency benchmark for the OpenRouter client.
+
+Starts the local fake OpenRouter server in a background thread (unless
+--base-url is given) and drives the app's pooled client with N streamed
+completions at a fixed concurrency. Reports throughput, time to first
+token and total latency percentiles.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_llm.py --requests 500 --concurrency 50
+    PYTHONPATH=. python scripts/bench_llm.py --failure-rate 0.1 --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+from app.services.llm import LLMError, OpenRouterClient
+from scripts.fake_openrouter import FakeServerConfig, create_fake_app
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_server(config: FakeServerConfig) -> str:
+    """
+    Run the fake server in a daemon thread and return its base URL once it accepts connections.
+    """
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(create_fake_app(config), host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(base_url: str, requests: int, concurrency: int, max_retries: int) -> Dict[str, Any]:
+    client = OpenRouterClient(
+        api_key="",
+        base_url=base_url,
+        model="fake/echo",
+        max_retries=max_retries,
+        max_concurrency=concurrency,
+        max_connections=concurrency,
+        backoff_base=0.01,
+    )
+    ttfts: List[float] = []
+    totals: List[float] = []
+    errors = 0
+    queue: asyncio.Queue[None] = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker() -> None:
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            first: Optional[float] = None
+            try:
+                async for _ in client.stream([{"role": "user", "content": "benchmark prompt"}]):
+                    if first is None:
+                        first = time.perf_counter()
+            except LLMError:
+                errors += 1
+                continue
+            end = time.perf_counter()
+            ttfts.append(((first or end) - start) * 1000)
+            totals.append((end - start) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(totals) / elapsed, 2),
+        "ttft_ms": {p: round(percentile(ttfts, q), 2) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "total_ms": {p: round(percentile(totals, q), 2) for p, q in (("p50", 50), ("p95", 95), ("p99", 99))},
+        "mean_total_ms": round(statistics.fmean(totals), 2) if totals else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=None, help="Benchmark a running server instead of the fake one.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--first-token-ms", type=float, default=50.0)
+    parser.add_argument("--token-ms", type=float, default=2.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    base_url = args.base_url or start_fake_server(
+        FakeServerConfig(
+            first_token_ms=args.first_token_ms,
+            token_ms=args.token_ms,
+            failure_rate=args.failure_rate,
+        )
+    )
+    result = asyncio.run(run(base_url, args.requests, args.concurrency, args.max_retries))
+    print(json.dumps(result, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
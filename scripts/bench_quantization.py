@@ -0,0 +1,98 @@
+"""
+Memory / recall benchmark for the vector store quantization modes.
+
+Builds a float32, int8 and binary VectorStore over the same synthetic
+clustered vectors, saves and reloads each one (so quantized modes re-rank
+from the memory-mapped vectors.npy, as in production), then reports RAM
+use, query latency and recall@k against exact brute-force search.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_quantization.py --rows 200000 --dim 384 --k 10
+    PYTHONPATH=. python scripts/bench_quantization.py --rerank-factor 8 --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.services.vector_store import QUANTIZATION_MODES, VectorStore
+
+
+def synthetic_vectors(rows: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """
+    Unit vectors drawn around random centroids, so neighbours are meaningful.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, rows)
+    vectors = centroids[assignment] + 0.6 * rng.standard_normal((rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    data = synthetic_vectors(args.rows, args.dim, args.clusters, args.seed)
+    queries = synthetic_vectors(args.queries, args.dim, args.clusters, args.seed)  # same centroids
+    exact = [set(np.argsort(-(data @ q))[: args.k].tolist()) for q in queries]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in QUANTIZATION_MODES:
+            directory = Path(tmp) / mode
+            directory.mkdir()
+            store = VectorStore(args.dim, quantization=mode, rerank_factor=args.rerank_factor)
+            store.add(data)
+            store.save(directory)
+            store = VectorStore.load(directory, args.dim, quantization=mode, rerank_factor=args.rerank_factor)
+
+            latencies = []
+            hits = 0
+            for q, truth in zip(queries, exact):
+                start = time.perf_counter()
+                rows, _ = store.search(q, args.k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                hits += len(truth & set(rows.tolist()))
+
+            results.append(
+                {
+                    "mode": mode,
+                    "ram_mb": round(store.nbytes() / 2**20, 2),
+                    "disk_mb": round(sum(p.stat().st_size for p in directory.iterdir()) / 2**20, 2),
+                    f"recall@{args.k}": round(hits / (args.k * len(queries)), 4),
+                    "latency_ms_p50": round(float(np.percentile(latencies, 50)), 3),
+                    "latency_ms_p95": round(float(np.percentile(latencies, 95)), 3),
+                }
+            )
+
+    report = {
+        "rows": args.rows,
+        "dim": args.dim,
+        "k": args.k,
+        "rerank_factor": args.rerank_factor,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
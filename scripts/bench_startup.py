@@ -0,0 +1,128 @@
+"""
+Cold-start benchmark with an import-time budget.
+
+Spawns fresh interpreters (as a new worker would be) and times each
+startup phase:
+- import:    `import app.main`
+- create:    create_app() (routers, schemas, route table)
+- lifespan:  running the app's startup / shutdown (engine, storage)
+
+One extra run under `python -X importtime` gives the report of where
+import time goes: self time summed per top-level package, plus the
+slowest app.* modules (cumulative). Exits with status 1 when the median
+import + create time exceeds --budget-ms, so CI can enforce the budget.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_startup.py
+    PYTHONPATH=. python scripts/bench_startup.py --runs 10 --budget-ms 1200 --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
+
+PHASES_CODE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+application = app.main.create_app()
+t2 = time.perf_counter()
+async def run_lifespan():
+    async with application.router.lifespan_context(application):
+        pass
+asyncio.run(run_lifespan())
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create": t2 - t1, "lifespan": t3 - t2}))
+"""
+
+
+def _environment() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("PYTHONPATH", ".")
+    # Startup creates the storage root; keep it out of /data on dev machines.
+    scratch = tempfile.mkdtemp(prefix="bench-startup-")
+    env.setdefault("STORAGE_ROOT", os.path.join(scratch, "storage"))
+    env.setdefault("INDEX_ROOT", os.path.join(scratch, "indexes"))
+    env.setdefault("DATABASE_URL", f"sqlite:///{scratch}/bench.db")
+    return env
+
+
+def time_phases(runs: int, env: Dict[str, str]) -> List[Dict[str, float]]:
+    results = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PHASES_CODE], env=env, capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def import_report(env: Dict[str, str], top: int) -> Dict[str, object]:
+    """
+    Parse `-X importtime` output of one `import app.main; create_app()`.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main; app.main.create_app()"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    by_package: Dict[str, int] = defaultdict(int)
+    app_modules = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        by_package[name.split(".")[0]] += int(self_us)
+        if name.startswith("app."):
+            app_modules.append((name, int(cumulative_us)))
+
+    packages = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    app_modules.sort(key=lambda item: -item[1])
+    return {
+        "self_ms_by_package": {name: round(us / 1000, 1) for name, us in packages},
+        "slowest_app_modules_cumulative_ms": {name: round(us / 1000, 1) for name, us in app_modules[:top]},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Max median import + create time.")
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this file.")
+    args = parser.parse_args()
+
+    env = _environment()
+    runs = time_phases(args.runs, env)
+    medians = {phase: round(statistics.median(r[phase] for r in runs) * 1000, 1) for phase in runs[0]}
+    cold_start = round(statistics.median((r["import"] + r["create"]) for r in runs) * 1000, 1)
+
+    report = {
+        "runs": args.runs,
+        "median_ms": medians,
+        "import_plus_create_ms": cold_start,
+        "budget_ms": args.budget_ms,
+        "within_budget": cold_start <= args.budget_ms,
+        **import_report(env, args.top),
+    }
+    print(json.dumps(report, indent=2))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if not report["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,4 +18,6 @@ PYTHONPATH="${PROJECT_ROOT}" python scripts/init_db.py
 
 echo "[dev_up] Done."
 echo "[dev_up] You can now run the API with:"
-echo "  uvicorn app.main:app --host 0.0.0.0 --port 8000"
\ No newline at end of file
+echo "  uvicorn app.main:app --host 0.0.0.0 --port 8000"
+echo "[dev_up] and background jobs with:"
+echo "  PYTHONPATH=. python scripts/worker.py"
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Local fake OpenRouter server for offline throughput / latency tests.
+
+Implements the subset of the OpenAI-compatible API the app uses:
+- POST /chat/completions (plain JSON or SSE when "stream": true)
+- GET  /models
+
+Latency and failures are configurable so retries and timeouts can be
+exercised without network access.
+
+Usage:
+    python scripts/fake_openrouter.py --port 8100 --first-token-ms 150 --token-ms 10
+    OPENROUTER_BASE_URL=http://127.0.0.1:8100 uvicorn app.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeServerConfig:
+    first_token_ms: float = 100.0
+    token_ms: float = 5.0
+    tokens: int = 40
+    failure_rate: float = 0.0
+
+
+def create_fake_app(config: FakeServerConfig) -> FastAPI:
+    """
+    Build the fake OpenRouter ASGI app.
+    """
+    app = FastAPI(title="Fake OpenRouter")
+
+    def _tokens(messages: List[Dict[str, Any]]) -> List[str]:
+        last = messages[-1]["content"] if messages else ""
+        words = (last.split() or ["ok"]) * (config.tokens // max(len(last.split()), 1) + 1)
+        return [w + " " for w in words[: config.tokens]]
+
+    @app.get("/models")
+    async def models() -> JSONResponse:
+        return JSONResponse({"data": [{"id": "fake/echo"}]})
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if config.failure_rate and random.random() < config.failure_rate:
+            return JSONResponse({"error": {"message": "injected failure"}}, status_code=503)
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = body.get("model", "fake/echo")
+        tokens = _tokens(body.get("messages", []))
+
+        if not body.get("stream"):
+            await asyncio.sleep((config.first_token_ms + config.token_ms * len(tokens)) / 1000)
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            )
+
+        async def events():
+            yield ": OPENROUTER PROCESSING\n\n"
+            await asyncio.sleep(config.first_token_ms / 1000)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(config.token_ms / 1000)
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--first-token-ms", type=float, default=100.0)
+    parser.add_argument("--token-ms", type=float, default=5.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = FakeServerConfig(
+        first_token_ms=args.first_token_ms,
+        token_ms=args.token_ms,
+        tokens=args.tokens,
+        failure_rate=args.failure_rate,
+    )
+    uvicorn.run(create_fake_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
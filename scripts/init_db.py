@@ -1,24 +1,85 @@
 """
-CLI entrypoint for initializing the database schema.
+CLI entrypoint for initializing (and upgrading) the database schema.
+
+- Creates every table defined on Base.metadata that does not exist yet.
+- Adds columns defined on the models but missing from existing tables
+  (ALTER TABLE ... ADD COLUMN), so a database created by an older version
+  of the app keeps working. Columns are only ever added: nothing is
+  dropped, renamed or retyped.
 
 Usage:
     python scripts/init_db.py
+    python scripts/init_db.py --dry-run    # print the ALTER statements only
 """
 
+import argparse
+from typing import Any, List, Optional
+
+from sqlalchemy import Column, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
+
 from app.db.base import Base
-from app.db.session import engine
+from app.db.session import get_engine
 from app import models  # noqa: F401  -> ensures models are imported
 
 
-def init_db() -> None:
+def _add_column_ddl(engine: Engine, table_name: str, column: Column[Any]) -> str:
+    if not column.nullable and column.server_default is None:
+        raise RuntimeError(
+            f"Cannot add NOT NULL column {table_name}.{column.name} without a server default; "
+            "migrate this table by hand."
+        )
+    preparer = engine.dialect.identifier_preparer
+    spec = str(CreateColumn(column).compile(dialect=engine.dialect))
+    for fk in column.foreign_keys:
+        target = fk.column
+        spec += f" REFERENCES {preparer.quote(target.table.name)} ({preparer.quote(target.name)})"
+        if fk.ondelete:
+            spec += f" ON DELETE {fk.ondelete}"
+    return f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {spec}"
+
+
+def missing_column_statements(engine: Engine) -> List[str]:
     """
-    Create all tables defined on Base.metadata if they do not exist.
+    ALTER TABLE statements adding model columns absent from existing tables.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue  # created whole by create_all()
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in present:
+                statements.append(_add_column_ddl(engine, table.name, column))
+    return statements
+
+
+def init_db(engine: Optional[Engine] = None, dry_run: bool = False) -> List[str]:
+    """
+    Create missing tables, then add missing columns to existing ones.
+    Returns the ALTER statements (run unless `dry_run`).
     """
     # Import side effects from app.models ensure all models are registered.
     _ = models  # noqa: F841
 
+    engine = engine or get_engine()
+    statements = missing_column_statements(engine)
+    if dry_run:
+        return statements
+
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement))
+    return statements
 
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Print the ALTER statements without running them.")
+    args = parser.parse_args()
+    for statement in init_db(dry_run=args.dry_run):
+        print(statement + ";")
@@ -0,0 +1,57 @@
+"""
+CLI entrypoint for a background job worker (see app.services.jobs).
+
+Claims due jobs from the jobs table and runs their handlers until stopped
+(SIGINT / SIGTERM finish the running jobs first). Run as many workers, on
+as many hosts, as needed: they share the queue without coordination.
+
+Usage:
+    python scripts/worker.py
+    python scripts/worker.py --concurrency 8 --batch-size 20 --kinds reindex_collection,export_dataset
+    python scripts/worker.py --drain    # run what is due, then exit
+"""
+
+import argparse
+import signal
+import threading
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging, shutdown_logging
+from app.db.session import dispose_engine, get_sessionmaker
+from app.services import job_handlers  # noqa: F401  -> registers the built-in handlers
+from app.services.jobs import Worker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=None, help="Jobs run at once (JOBS_WORKER_CONCURRENCY).")
+    parser.add_argument("--batch-size", type=int, default=None, help="Jobs claimed per query (JOBS_BATCH_SIZE).")
+    parser.add_argument("--poll-interval", type=float, default=None, help="Idle poll interval in seconds.")
+    parser.add_argument("--kinds", default=None, help="Comma-separated job kinds to take (default: all).")
+    parser.add_argument("--worker-id", default=None, help="Name recorded on claimed jobs (default: host:pid:random).")
+    parser.add_argument("--drain", action="store_true", help="Exit once no job is due and none is running.")
+    args = parser.parse_args()
+
+    configure_logging(get_settings())
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    worker = Worker(
+        get_sessionmaker(),
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        kinds=args.kinds.split(",") if args.kinds else None,
+    )
+    try:
+        worker.run(stop, drain=args.drain)
+    finally:
+        dispose_engine()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Shared test setup.
+
+- Settings are read from the environment, so the database, storage and
+  index directories are pointed at a per-session temporary directory
+  before any app module caches them.
+- `client` is a TestClient over the app with the schema created in a
+  SQLite database; `seed` creates a workspace, knowledge base and
+  collection through the API.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator
+
+import pytest
+
+if TYPE_CHECKING:
+    from fastapi.testclient import TestClient
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+_DATA = Path(tempfile.mkdtemp(prefix="yaya-tests-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DATA / 'test.db'}")
+os.environ.setdefault("STORAGE_ROOT", str(_DATA / "storage"))
+os.environ.setdefault("INDEX_ROOT", str(_DATA / "indexes"))
+os.environ.setdefault("DEBUG", "false")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator["TestClient"]:
+    from fastapi.testclient import TestClient
+
+    from app import models  # noqa: F401  (registers the tables)
+    from app.db.base import Base
+    from app.db.session import get_engine
+    from app.main import app
+
+    Base.metadata.create_all(get_engine())
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def seed(client: "TestClient") -> Dict[str, str]:
+    name = uuid.uuid4().hex
+    workspace = client.post("/api/v1/workspaces", json={"name": name}).json()["id"]
+    knowledge_base = client.post(
+        f"/api/v1/workspaces/{workspace}/knowledge-bases", json={"name": name}
+    ).json()["id"]
+    collection = client.post(
+        f"/api/v1/knowledge-bases/{knowledge_base}/collections", json={"name": name}
+    ).json()["id"]
+    return {"workspace": workspace, "knowledge_base": knowledge_base, "collection": collection}
@@ -0,0 +1,84 @@
+"""
+Coalescing of identical concurrent GETs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+import httpx
+
+from app.core.coalescing import CoalescingMiddleware
+
+
+class _Gate:
+    """
+    The wrapped app: counts calls and holds every request until `release` is set.
+    """
+
+    def __init__(self, status: int = 200) -> None:
+        self.status = status
+        self.calls: List[str] = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, scope, receive, send) -> None:
+        self.calls.append(scope["path"])
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": self.status, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": f"call {len(self.calls)}".encode()})
+
+
+def _run(gate: _Gate, requests) -> List[httpx.Response]:
+    """
+    Send `requests` ((path, headers)) concurrently, then let the app answer.
+    """
+
+    async def run() -> List[httpx.Response]:
+        transport = httpx.ASGITransport(app=CoalescingMiddleware(gate))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            tasks = [asyncio.create_task(client.get(path, headers=headers)) for path, headers in requests]
+            await asyncio.sleep(0.05)
+            gate.release.set()
+            return list(await asyncio.gather(*tasks))
+
+    return asyncio.run(run())
+
+
+def test_identical_concurrent_gets_share_one_computation() -> None:
+    gate = _Gate()
+    responses = _run(gate, [("/api/v1/workspaces", {})] * 5)
+
+    assert gate.calls == ["/api/v1/workspaces"]
+    assert {(r.status_code, r.text) for r in responses} == {(200, "call 1")}
+
+
+def test_different_keys_and_error_responses() -> None:
+    gate = _Gate(status=404)
+    responses = _run(
+        gate,
+        [
+            ("/api/v1/workspaces", {}),
+            ("/api/v1/workspaces", {}),
+            ("/api/v1/workspaces", {"Authorization": "Bearer other"}),
+            ("/health", {}),
+            ("/health", {}),
+        ],
+    )
+
+    # One computation per (path, headers) key; routes outside the list always run.
+    assert sorted(gate.calls) == ["/api/v1/workspaces", "/api/v1/workspaces", "/health", "/health"]
+    assert [r.status_code for r in responses] == [404] * 5
+    assert responses[0].text == responses[1].text
+
+
+def test_a_finished_response_is_not_reused() -> None:
+    gate = _Gate()
+    gate.release.set()
+
+    async def run() -> List[str]:
+        transport = httpx.ASGITransport(app=CoalescingMiddleware(gate))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [(await client.get("/api/v1/workspaces")).text for _ in range(2)]
+
+    assert asyncio.run(run()) == ["call 1", "call 2"]
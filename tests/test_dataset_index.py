@@ -0,0 +1,110 @@
+"""
+Dataset row index: incremental sync, persistence and concurrent workers.
+"""
+
+from __future__ import annotations
+
+import io
+import multiprocessing
+import uuid
+from pathlib import Path
+from typing import List, Tuple
+
+from app.core.config import get_settings
+from app.services import dataset_index
+from app.services.dataset_index import DatasetRowIndex, get_dataset_index, sync_index
+from app.services.dataset_rows import RowSource
+from app.services.embeddings import get_embedder
+
+
+def _segment(sequence: int, rows: int) -> Tuple[int, RowSource]:
+    data = "id,text\n" + "".join(
+        f"{sequence * 1000 + j},row {sequence} {j} word{j % 7}\n" for j in range(rows)
+    )
+    encoded = data.encode()
+    return sequence, RowSource(lambda: io.BytesIO(encoded), ",")
+
+
+SEGMENTS = [_segment(i, 20 + i) for i in range(6)]
+TOTAL_ROWS = sum(20 + i for i in range(6))
+
+
+def _state(index: DatasetRowIndex):
+    return index.columns, index.segments, index.row_count, index._rows[: len(index.vectors)].tolist()
+
+
+def _reference(tmp_path: Path, segments: List[Tuple[int, RowSource]]) -> DatasetRowIndex:
+    index = DatasetRowIndex("ref", tmp_path, get_settings().EMBEDDING_DIM)
+    index.reset(["text"])
+    for sequence, source in segments:
+        index.index_segment(sequence, source, get_embedder(), 7)
+    return index
+
+
+def test_sync_reads_only_new_segments(tmp_path: Path) -> None:
+    key = str(uuid.uuid4())
+    assert sync_index(key, ["text"], SEGMENTS[:5], get_embedder(), 7) == (110, 110)
+    assert sync_index(key, ["text"], SEGMENTS, get_embedder(), 7) == (25, TOTAL_ROWS)
+    assert sync_index(key, ["text"], SEGMENTS, get_embedder(), 7) == (0, TOTAL_ROWS)
+
+    index = get_dataset_index(key)
+    assert index.deltas == [2], "a small append is saved as a delta"
+    assert _state(index) == _state(_reference(tmp_path, SEGMENTS))
+
+
+def test_late_sync_of_an_older_version_keeps_the_index(tmp_path: Path) -> None:
+    key = str(uuid.uuid4())
+    sync_index(key, ["text"], SEGMENTS, get_embedder(), 7)
+    generation = get_dataset_index(key).generation
+
+    assert sync_index(key, ["text"], SEGMENTS[:2], get_embedder(), 7) == (0, TOTAL_ROWS)
+    assert get_dataset_index(key).generation == generation
+
+
+def test_column_change_rebuilds_as_a_snapshot() -> None:
+    key = str(uuid.uuid4())
+    sync_index(key, ["text"], SEGMENTS, get_embedder(), 7)
+    sync_index(key, ["id", "text"], SEGMENTS[:2], get_embedder(), 7)
+
+    index = get_dataset_index(key)
+    assert (index.columns, index.segments, index.deltas) == (["id", "text"], [0, 1], [])
+
+
+def test_reload_and_refresh_match_the_writer(tmp_path: Path) -> None:
+    dim = get_settings().EMBEDDING_DIM
+    writer = DatasetRowIndex("ds", tmp_path, dim)
+    writer.reset(["text"])
+    for sequence, source in SEGMENTS[:4]:
+        writer.index_segment(sequence, source, get_embedder(), 7)
+    writer.save()
+    reader = DatasetRowIndex.load("ds", tmp_path, dim)
+
+    sequence, source = SEGMENTS[4]
+    writer.index_segment(sequence, source, get_embedder(), 7)
+    writer.save()
+
+    assert reader.refreshed() is reader
+    assert _state(reader) == _state(writer) == _state(DatasetRowIndex.load("ds", tmp_path, dim))
+    query = get_embedder().embed_one("row 3 word2")
+    assert reader.search(query, 5) == writer.search(query, 5)
+
+
+def _sync_growing(key: str) -> None:
+    for upto in range(1, len(SEGMENTS) + 1):
+        sync_index(key, ["text"], SEGMENTS[:upto], get_embedder(), 7)
+
+
+def test_concurrent_workers_index_every_row_once(tmp_path: Path) -> None:
+    key = str(uuid.uuid4())
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_sync_growing, args=(key,)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(120)
+        assert worker.exitcode == 0
+
+    directory = dataset_index._registry.directory(key)
+    loaded = DatasetRowIndex.load(key, directory, get_settings().EMBEDDING_DIM)
+    assert loaded.generation == len(SEGMENTS)
+    assert _state(loaded) == _state(_reference(tmp_path, SEGMENTS))
@@ -0,0 +1,55 @@
+"""
+Aggregates of the vectorized dataset query engine.
+"""
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from app.services.columnar import ColumnarDataset, convert_csv
+from app.services.csv_profile import profile_csv
+from app.services.dataset_query import Aggregate, Order, Query, QueryPlan
+
+INT64_MAX = 2**63 - 1
+
+
+def _dataset(tmp_path: Path, lines: List[str], row_group_size: int = 3) -> ColumnarDataset:
+    data = "\n".join(lines).encode()
+    profile = profile_csv(io.BytesIO(data))
+    convert_csv(io.BytesIO(data), profile, tmp_path / "columnar", row_group_size)
+    return ColumnarDataset(tmp_path / "columnar")
+
+
+def _run(dataset: ColumnarDataset, query: Query) -> List[List[Any]]:
+    return [row for batch in QueryPlan(dataset, query).rows() for row in batch]
+
+
+def test_integer_sums_are_exact_above_2_53(tmp_path: Path) -> None:
+    big = 2**53 + 1
+    dataset = _dataset(tmp_path, ["g,v"] + [f"{'ab'[i % 2]},{big}" for i in range(10)])
+    rows = _run(
+        dataset,
+        Query(
+            group_by=["g"],
+            aggregates=[Aggregate("sum", "v"), Aggregate("mean", "v", "avg")],
+            order_by=[Order("g")],
+        ),
+    )
+    assert [row[:2] for row in rows] == [["a", 5 * big], ["b", 5 * big]]
+    assert rows[0][2] == pytest.approx(big)
+
+
+@pytest.mark.parametrize("value", [INT64_MAX, -INT64_MAX - 1])
+def test_integer_sums_do_not_wrap_at_int64(tmp_path: Path, value: int) -> None:
+    # All values land in one row group, so the overflow would happen inside it.
+    dataset = _dataset(tmp_path, ["v"] + [str(value)] * 4, row_group_size=10)
+    assert _run(dataset, Query(aggregates=[Aggregate("sum", "v")])) == [[4 * value]]
+
+
+def test_boolean_sum_counts_true_values(tmp_path: Path) -> None:
+    dataset = _dataset(tmp_path, ["b"] + ["true", "false", "true", "true"])
+    assert _run(dataset, Query(aggregates=[Aggregate("sum", "b"), Aggregate("count", None, "n")])) == [[3, 4]]
@@ -0,0 +1,42 @@
+"""
+Document upload records the indexing outcome on the document row.
+"""
+
+from __future__ import annotations
+
+from typing import Dict
+
+import pytest
+
+from app.api.v1 import documents
+
+
+def _upload(client, collection: str, text: str):
+    return client.post(
+        f"/api/v1/collections/{collection}/documents",
+        files={"file": ("notes.txt", text.encode(), "text/plain")},
+    )
+
+
+def test_upload_indexes_the_document(client, seed: Dict[str, str]) -> None:
+    response = _upload(client, seed["collection"], "Cats purr and hunt mice in the barn.")
+    assert response.status_code == 201
+    assert response.json()["status"] == "indexed"
+
+    hits = client.post(
+        f"/api/v1/knowledge-bases/{seed['knowledge_base']}/search", json={"query": "cats hunt mice"}
+    ).json()["results"]
+    assert [hit["document_id"] for hit in hits] == [response.json()["id"]]
+
+
+def test_failed_indexing_is_recorded(client, seed: Dict[str, str], monkeypatch: pytest.MonkeyPatch) -> None:
+    def broken(*args, **kwargs):
+        raise RuntimeError("embedder unavailable")
+
+    monkeypatch.setattr(documents, "index_document", broken)
+    response = _upload(client, seed["collection"], "Rockets reach orbit.")
+    assert response.status_code == 201
+    assert response.json()["status"] == "failed"
+
+    listed = client.get(f"/api/v1/collections/{seed['collection']}/documents").json()
+    assert [doc["status"] for doc in listed] == ["failed"]
@@ -0,0 +1,49 @@
+"""
+scripts/init_db.py upgrades a database created before columns were added.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from sqlalchemy import MetaData, Table, create_engine, inspect, text
+
+from app.db.base import Base
+from scripts.init_db import init_db
+
+# Columns added to tables that existed before this release.
+ADDED = {
+    "knowledge_bases": {"index_version"},
+    "documents": {"content_hash", "duplicate_of_id", "duplicate_similarity"},
+    "datasets": {"row_count", "profile", "columnar_path", "indexed_columns", "current_version"},
+}
+OLD_TABLES = {"workspaces", "knowledge_bases", "collections", "documents", "datasets"}
+
+
+def _old_schema() -> MetaData:
+    metadata = MetaData()
+    for table in Base.metadata.sorted_tables:
+        if table.name in OLD_TABLES:
+            columns = [c._copy() for c in table.columns if c.name not in ADDED.get(table.name, ())]
+            Table(table.name, metadata, *columns)
+    return metadata
+
+
+def test_init_db_adds_missing_tables_and_columns(tmp_path: Path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    _old_schema().create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO knowledge_bases (id, workspace_id, name) VALUES ('kb', 'ws', 'k')"))
+
+    assert len(init_db(engine, dry_run=True)) == sum(len(names) for names in ADDED.values())
+    init_db(engine)
+
+    inspector = inspect(engine)
+    assert {"jobs", "dataset_segments", "dataset_versions"} <= set(inspector.get_table_names())
+    for table, names in ADDED.items():
+        assert names <= {column["name"] for column in inspector.get_columns(table)}
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT index_version FROM knowledge_bases")).scalar() == 0
+
+    # A second run has nothing left to do.
+    assert init_db(engine) == []
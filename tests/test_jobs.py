@@ -0,0 +1,100 @@
+"""
+Job queue: claiming, lease expiry and fencing of outcomes, retries.
+"""
+
+from __future__ import annotations
+
+import uuid
+from typing import Iterator
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+from app.services import jobs
+from app.services.jobs import DEAD, DONE, QUEUED, RUNNING, claim, complete, enqueue, fail
+
+
+@pytest.fixture
+def db(client) -> Iterator[Session]:
+    from app.db.session import get_sessionmaker
+
+    with get_sessionmaker()() as session:
+        yield session
+
+
+@pytest.fixture
+def kind() -> str:
+    # Jobs of other tests share the database: claim only this test's kind.
+    return f"test_{uuid.uuid4().hex}"
+
+
+def _enqueue(db: Session, kind: str, **options) -> uuid.UUID:
+    job = enqueue(db, kind, {"n": 1}, **options)
+    db.commit()
+    return job.id
+
+
+def _status(db: Session, job_id: uuid.UUID) -> Job:
+    db.expire_all()
+    return db.query(Job).filter(Job.id == job_id).one()
+
+
+def test_a_claimed_job_is_not_claimed_again_while_leased(db: Session, kind: str) -> None:
+    job_id = _enqueue(db, kind)
+
+    [first] = claim(db, "a", 10, visibility_timeout=60, kinds=[kind])
+    assert first.id == job_id and first.attempts == 1 and first.status == RUNNING
+    assert claim(db, "b", 10, visibility_timeout=60, kinds=[kind]) == []
+
+    assert complete(db, first, {"ok": True})
+    stored = _status(db, job_id)
+    assert stored.status == DONE and stored.result == {"ok": True} and stored.locked_by is None
+
+
+def test_outcome_of_an_expired_claim_is_dropped(db: Session, kind: str) -> None:
+    job_id = _enqueue(db, kind)
+
+    [stale] = claim(db, "a", 10, visibility_timeout=-1, kinds=[kind])  # lease already over
+    [current] = claim(db, "b", 10, visibility_timeout=60, kinds=[kind])
+    assert current.attempts == stale.attempts + 1
+
+    assert not complete(db, stale, {"by": "a"})
+    assert fail(db, stale, "late failure") == QUEUED  # computed, but not recorded
+    stored = _status(db, job_id)
+    assert stored.status == RUNNING and stored.locked_by == "b"
+
+    assert complete(db, current, {"by": "b"})
+    assert _status(db, job_id).result == {"by": "b"}
+
+
+def test_failures_back_off_then_go_dead(db: Session, kind: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(jobs, "backoff_seconds", lambda attempt, base, cap: 0.0)
+    job_id = _enqueue(db, kind, max_attempts=2)
+
+    [job] = claim(db, "a", 1, visibility_timeout=60, kinds=[kind])
+    assert fail(db, job, "boom") == QUEUED
+    [job] = claim(db, "a", 1, visibility_timeout=60, kinds=[kind])
+    assert job.attempts == 2
+    assert fail(db, job, "boom again") == DEAD
+
+    stored = _status(db, job_id)
+    assert stored.status == DEAD and stored.last_error == "boom again"
+    assert claim(db, "a", 1, visibility_timeout=60, kinds=[kind]) == []
+
+
+def test_permanent_errors_are_not_retried(db: Session, kind: str) -> None:
+    job_id = _enqueue(db, kind)
+    [job] = claim(db, "a", 1, visibility_timeout=60, kinds=[kind])
+    assert fail(db, job, "gone", permanent=True) == DEAD
+    assert _status(db, job_id).attempts == 1
+
+
+def test_higher_priority_is_claimed_first(db: Session, kind: str) -> None:
+    low = _enqueue(db, kind)
+    high = _enqueue(db, kind, priority=5)
+    later = _enqueue(db, kind, priority=9, delay_seconds=3600)
+
+    claimed = claim(db, "a", 10, visibility_timeout=60, kinds=[kind])
+    assert [job.id for job in claimed] == [high, low]
+    assert _status(db, later).status == QUEUED
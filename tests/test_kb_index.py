@@ -0,0 +1,179 @@
+"""
+Knowledge-base index persistence (snapshot + deltas) and cross-worker locking.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.core.config import get_settings
+from app.services import kb_index
+from app.services.kb_index import KnowledgeBaseIndex, edit_kb_index, get_kb_index
+
+DIM = 16
+
+
+def _add(index: KnowledgeBaseIndex, document_id: str, chunks: int = 3, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    texts = [f"{document_id} chunk {i}" for i in range(chunks)]
+    index.add_document(
+        document_id=document_id,
+        collection_id="c1",
+        filename=f"{document_id}.txt",
+        mime_type="text/plain",
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        chunks=texts,
+        vectors=rng.standard_normal((chunks, index.dim)).astype(np.float32),
+        chunk_hashes=[f"{document_id}-{i}" for i in range(chunks)],
+        content_hash=f"hash-{document_id}",
+    )
+
+
+def _state(index: KnowledgeBaseIndex):
+    alive = index.vectors.alive
+    rows = sorted(
+        (index.row_doc[row], index.row_chunk[row], index.row_text[row])
+        for row in range(len(index.vectors))
+        if alive[row]
+    )
+    return sorted(index.documents), rows
+
+
+@pytest.mark.parametrize("quantization", ["float32", "int8", "binary"])
+def test_reload_matches_after_snapshot_and_deltas(tmp_path: Path, quantization: str) -> None:
+    index = KnowledgeBaseIndex("kb", tmp_path, DIM, quantization=quantization)
+    for i in range(8):
+        _add(index, f"doc{i}", seed=i)
+    index.save()
+    assert index.deltas == []
+
+    _add(index, "doc8", seed=8)
+    index.remove_document("doc2")
+    index.save()
+    assert index.deltas == [index.generation]
+    assert (tmp_path / f"delta-{index.generation}").is_dir()
+
+    loaded = KnowledgeBaseIndex.load("kb", tmp_path, DIM, quantization=quantization)
+    assert loaded.generation == index.generation
+    assert _state(loaded) == _state(index)
+    assert "doc2" not in loaded.documents
+
+    query = index.vectors.vectors(np.array([0]))[0]
+    assert index.vectors.search(query, 3)[0].tolist() == loaded.vectors.search(query, 3)[0].tolist()
+
+
+def test_refreshed_replays_deltas_in_place(tmp_path: Path) -> None:
+    writer = KnowledgeBaseIndex("kb", tmp_path, DIM)
+    for i in range(8):
+        _add(writer, f"doc{i}", seed=i)
+    writer.save()
+
+    reader = KnowledgeBaseIndex.load("kb", tmp_path, DIM)
+    _add(writer, "doc8", seed=8)
+    writer.save()
+
+    assert reader.is_stale()
+    assert reader.refreshed() is reader
+    assert _state(reader) == _state(writer)
+
+
+def test_large_changes_fold_into_a_snapshot(tmp_path: Path) -> None:
+    index = KnowledgeBaseIndex("kb", tmp_path, DIM)
+    _add(index, "doc0", chunks=10)
+    index.save()
+
+    _add(index, "doc1", seed=1)
+    index.save()
+    assert index.deltas == [2]
+
+    # 6 rows in deltas exceed half of the 10-row snapshot.
+    _add(index, "doc2", seed=2)
+    index.save()
+    assert (index.base_generation, index.deltas) == (3, [])
+    # The generation before it stays on disk for readers mid-load.
+    assert sorted(path.name for path in tmp_path.glob("gen-*")) == ["gen-1", "gen-3"]
+
+
+def test_save_of_a_stale_copy_raises(tmp_path: Path) -> None:
+    first = KnowledgeBaseIndex("kb", tmp_path, DIM)
+    _add(first, "doc0")
+    first.save()
+
+    second = KnowledgeBaseIndex.load("kb", tmp_path, DIM)
+    _add(second, "doc1")
+    second.save()
+
+    _add(first, "doc2")
+    with pytest.raises(RuntimeError):
+        first.save()
+
+
+def test_failed_edit_drops_the_registry_copy() -> None:
+    kb_id = str(uuid.uuid4())
+    with edit_kb_index(kb_id) as index:
+        _add(index, "doc0")
+
+    with pytest.raises(ValueError):
+        with edit_kb_index(kb_id) as index:
+            _add(index, "half-applied")
+            raise ValueError("boom")
+
+    reloaded = get_kb_index(kb_id)
+    assert reloaded is not index
+    assert sorted(reloaded.documents) == ["doc0"]
+
+
+def test_slow_load_does_not_block_other_knowledge_bases(monkeypatch: pytest.MonkeyPatch) -> None:
+    ready, cold = str(uuid.uuid4()), str(uuid.uuid4())
+    get_kb_index(ready)
+
+    started, release = threading.Event(), threading.Event()
+    original = KnowledgeBaseIndex.load.__func__
+
+    def slow_load(cls, kb_id, *args, **kwargs):
+        if kb_id == cold:
+            started.set()
+            release.wait(5)
+        return original(cls, kb_id, *args, **kwargs)
+
+    monkeypatch.setattr(KnowledgeBaseIndex, "load", classmethod(slow_load))
+    loader = threading.Thread(target=get_kb_index, args=(cold,))
+    loader.start()
+    try:
+        assert started.wait(5)
+        finished = threading.Event()
+        threading.Thread(target=lambda: (get_kb_index(ready), finished.set())).start()
+        assert finished.wait(1), "a cold load held up another knowledge base"
+    finally:
+        release.set()
+        loader.join(5)
+
+
+def _write_documents(kb_id: str, worker: int, count: int) -> None:
+    for i in range(count):
+        with edit_kb_index(kb_id) as index:
+            _add(index, f"w{worker}-doc{i}", chunks=2, seed=worker * 100 + i)
+
+
+def test_concurrent_workers_lose_no_documents() -> None:
+    kb_id = str(uuid.uuid4())
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_documents, args=(kb_id, w, 6)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    settings = get_settings()
+    loaded = KnowledgeBaseIndex.load(kb_id, kb_index._registry.directory(kb_id), settings.EMBEDDING_DIM)
+    assert len(loaded.documents) == 24
+    assert get_kb_index(kb_id).generation == loaded.generation
+    assert sorted(get_kb_index(kb_id).documents) == sorted(loaded.documents)
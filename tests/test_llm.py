@@ -0,0 +1,125 @@
+"""
+OpenRouterClient maps every malformed upstream payload to LLMError.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List
+
+import httpx
+import pytest
+
+from app.services.llm import LLMError, OpenRouterClient
+
+
+def _client(handler) -> OpenRouterClient:
+    return OpenRouterClient(
+        api_key="",
+        base_url="http://openrouter.test",
+        model="test/model",
+        max_retries=0,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def _complete(body: bytes) -> str:
+    client = _client(lambda request: httpx.Response(200, content=body))
+
+    async def run() -> str:
+        try:
+            return await client.complete([{"role": "user", "content": "hi"}])
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def _stream(events: List[str]) -> List[str]:
+    body = "".join(f"data: {event}\n\n" for event in events) + "data: [DONE]\n\n"
+    client = _client(
+        lambda request: httpx.Response(
+            200, content=body.encode(), headers={"Content-Type": "text/event-stream"}
+        )
+    )
+
+    async def run() -> List[str]:
+        try:
+            return [delta async for delta in client.stream([{"role": "user", "content": "hi"}])]
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_complete_returns_content() -> None:
+    body = {"choices": [{"message": {"role": "assistant", "content": "hello"}}]}
+    assert _complete(json.dumps(body).encode()) == "hello"
+
+
+def test_complete_null_content_is_empty() -> None:
+    body = {"choices": [{"message": {"role": "assistant", "content": None}}]}
+    assert _complete(json.dumps(body).encode()) == ""
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"<html>bad gateway</html>",
+        b"[]",
+        b"null",
+        b'{"choices": []}',
+        b'{"choices": null}',
+        b'{"choices": [1]}',
+        b'{"choices": [{"message": null}]}',
+        b'{"choices": [{"message": "text"}]}',
+        b'{"choices": [{"message": {"content": 5}}]}',
+    ],
+)
+def test_complete_malformed_payload_raises_llm_error(body: bytes) -> None:
+    with pytest.raises(LLMError):
+        _complete(body)
+
+
+def test_stream_yields_deltas() -> None:
+    events = [
+        json.dumps({"choices": [{"delta": {"role": "assistant"}}]}),
+        json.dumps({"choices": [{"delta": {"content": "hel"}}]}),
+        json.dumps({"choices": [{"delta": {"content": "lo"}}]}),
+        json.dumps({"choices": [{"delta": {}, "finish_reason": "stop"}]}),
+        json.dumps({"choices": [], "usage": {"total_tokens": 3}}),
+    ]
+    assert _stream(events) == ["hel", "lo"]
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        "not json",
+        "[1, 2]",
+        "null",
+        '{"choices": [1]}',
+        '{"choices": [{"delta": null}]}',
+        '{"choices": [{"delta": "text"}]}',
+        '{"choices": [{"delta": {"content": 5}}]}',
+        '{"error": {"message": "overloaded"}}',
+    ],
+)
+def test_stream_malformed_event_raises_llm_error(event: str) -> None:
+    with pytest.raises(LLMError):
+        _stream([json.dumps({"choices": [{"delta": {"content": "ok"}}]}), event])
+
+
+def test_non_retryable_status_raises_llm_error() -> None:
+    client = _client(lambda request: httpx.Response(400, json={"error": "bad request"}))
+
+    async def run() -> None:
+        try:
+            await client.complete([{"role": "user", "content": "hi"}])
+        finally:
+            await client.aclose()
+
+    with pytest.raises(LLMError) as exc_info:
+        asyncio.run(run())
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,37 @@
+"""
+Profiling authentication: signed X-Profile headers and the admin token.
+"""
+
+from __future__ import annotations
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1 import profiles
+from app.core.config import Settings
+from app.core.profiling import sign_profile_request, verify_profile_header
+
+SECRET = "s3cret"
+
+
+def test_signed_header_is_accepted_until_it_expires() -> None:
+    value = sign_profile_request(SECRET, "GET", "/api/v1/workspaces", 2000)
+    assert verify_profile_header(SECRET, "get", "/api/v1/workspaces", value, now=1000)
+    assert not verify_profile_header(SECRET, "GET", "/api/v1/other", value, now=1000)
+    assert not verify_profile_header(SECRET, "GET", "/api/v1/workspaces", value, now=3000)
+
+
+@pytest.mark.parametrize("value", ["2000:sïgnature", "2000:" + "é" * 64, "²:abc", "٢٠٠٠:abc"])
+def test_non_ascii_header_is_rejected_not_an_error(value: str) -> None:
+    assert not verify_profile_header(SECRET, "GET", "/api/v1/workspaces", value, now=1000)
+
+
+def test_admin_token_check_rejects_non_ascii_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
+    settings = Settings(PROFILING_ENABLED=True, PROFILING_SECRET=SECRET)
+    monkeypatch.setattr(profiles, "get_settings", lambda: settings)
+
+    profiles._require_profiling_admin(f"Bearer {SECRET}")
+    for authorization in ["Bearer wröng", "Bearer s3crét", None]:
+        with pytest.raises(HTTPException) as raised:
+            profiles._require_profiling_admin(authorization)
+        assert raised.value.status_code == 403
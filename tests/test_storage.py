@@ -0,0 +1,69 @@
+"""
+Storage backends: streamed saves and the local-path capability.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterator
+
+import pytest
+
+from app.api.v1 import datasets
+from app.services import dataset_versions
+from app.services.storage import LocalFileStorageBackend
+
+CSV = b"id,city,score\n1,Paris,3\n2,Rome,4\n3,Lima,5\n"
+
+
+def test_save_stream_writes_the_concatenated_chunks(tmp_path: Path) -> None:
+    storage = LocalFileStorageBackend(tmp_path)
+    path = storage.save_stream("exports/a/out.csv", iter([b"id\n", b"1\n", b"2\n"]))
+    with storage.open(path) as f:
+        assert f.read() == b"id\n1\n2\n"
+
+
+def test_failed_save_stream_leaves_nothing_behind(tmp_path: Path) -> None:
+    storage = LocalFileStorageBackend(tmp_path)
+
+    def chunks() -> Iterator[bytes]:
+        yield b"id\n"
+        raise ValueError("export failed")
+
+    with pytest.raises(ValueError):
+        storage.save_stream("exports/a/out.csv", chunks())
+    assert list((tmp_path / "exports" / "a").iterdir()) == []
+
+
+class _RemoteStorage(LocalFileStorageBackend):
+    """
+    A backend without local files (like an object store).
+    """
+
+    supports_local_paths = False
+
+    def local_path(self, relative_path: str) -> Path:
+        raise AssertionError("local_path() called on a backend without local paths")
+
+
+def test_dataset_upload_without_local_paths_keeps_the_csv(
+    client, seed: Dict[str, str], tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    remote = _RemoteStorage(tmp_path)
+    monkeypatch.setattr(datasets, "get_default_storage_backend", lambda: remote)
+    monkeypatch.setattr(dataset_versions, "get_default_storage_backend", lambda: remote)
+
+    response = client.post(
+        f"/api/v1/workspaces/{seed['workspace']}/datasets",
+        data={"name": "cities"},
+        files={"file": ("cities.csv", CSV, "text/csv")},
+    )
+    assert response.status_code == 201
+    dataset = response.json()["id"]
+
+    preview = client.get(f"/api/v1/workspaces/{seed['workspace']}/datasets/{dataset}/preview")
+    assert preview.status_code == 200
+    assert preview.json()["rows"][0] == ["1", "Paris", "3"]
+
+    query = client.post(f"/api/v1/workspaces/{seed['workspace']}/datasets/{dataset}/query", json={})
+    assert query.status_code == 409